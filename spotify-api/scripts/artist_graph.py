@@ -0,0 +1,271 @@
+"""
+Spotify Related-Artist Graph Crawler
+
+Breadth-first expansion over the related-artists graph:
+- Bounded concurrency (a fixed-size thread pool per BFS level)
+- Visited-node dedup and a hard request budget
+- On-disk adjacency cache so repeated crawls cost no API calls
+- Compact CSR adjacency arrays for the resulting graph
+"""
+
+import json
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from spotify_client import SpotifyClient, is_lookup_miss
+
+
+class ArtistGraph:
+    """Related-artist graph stored as compressed sparse row (CSR) arrays."""
+
+    def __init__(self, artist_ids: Sequence[str], names: Sequence[str],
+                 depths: Sequence[int], indptr: Sequence[int], indices: Sequence[int]):
+        """
+        Initialize graph.
+
+        Args:
+            artist_ids: Artist ID per node, in BFS order
+            names: Artist name per node
+            depths: BFS depth per node (seeds are 0)
+            indptr: Offsets into indices; node i links to indices[indptr[i]:indptr[i+1]]
+            indices: Neighbour node numbers
+        """
+        self.artist_ids = list(artist_ids)
+        self.names = list(names)
+        self.depths = array("h", depths)
+        self.indptr = array("l", indptr)
+        self.indices = array("l", indices)
+        self.index = {artist_id: node for node, artist_id in enumerate(self.artist_ids)}
+
+    def __len__(self) -> int:
+        return len(self.artist_ids)
+
+    def __contains__(self, artist_id: str) -> bool:
+        return artist_id in self.index
+
+    @property
+    def edge_count(self) -> int:
+        """Number of directed edges."""
+        return len(self.indices)
+
+    def neighbors(self, artist_id: str) -> List[str]:
+        """Related artists of a node that are part of the graph."""
+        node = self.index[artist_id]
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return [self.artist_ids[i] for i in self.indices[start:end]]
+
+    def degree(self, artist_id: str) -> int:
+        """Number of outgoing edges for a node."""
+        node = self.index[artist_id]
+        return self.indptr[node + 1] - self.indptr[node]
+
+    def in_degrees(self) -> List[int]:
+        """Incoming edge count per node (how often an artist is related to others)."""
+        counts = [0] * len(self)
+        for node in self.indices:
+            counts[node] += 1
+        return counts
+
+    def at_depth(self, depth: int) -> List[str]:
+        """Artist IDs discovered at a given BFS depth."""
+        return [a for a, d in zip(self.artist_ids, self.depths) if d == depth]
+
+    def to_dict(self) -> Dict:
+        """Serializable representation."""
+        return {
+            "artist_ids": self.artist_ids,
+            "names": self.names,
+            "depths": self.depths.tolist(),
+            "indptr": self.indptr.tolist(),
+            "indices": self.indices.tolist()
+        }
+
+
+class ArtistGraphCrawler:
+    """Crawl the related-artists graph with bounded concurrency and caching."""
+
+    def __init__(self, client: SpotifyClient, max_workers: int = 8,
+                 request_budget: int = 200, cache_path: Optional[str] = None,
+                 cache_ttl: float = 7 * 24 * 3600):
+        """
+        Initialize crawler.
+
+        Args:
+            client: Authenticated Spotify client
+            max_workers: Maximum concurrent API requests
+            request_budget: Maximum API calls per crawl (cache hits are free)
+            cache_path: JSON file for the adjacency cache (no cache if None)
+            cache_ttl: Seconds before a cached adjacency list is refetched
+        """
+        self.client = client
+        self.max_workers = max(1, max_workers)
+        self.request_budget = request_budget
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.cache_ttl = cache_ttl
+        self.requests_made = 0
+        self._lock = threading.Lock()
+        self._cache = self._load_cache()
+        self._names: Dict[str, str] = {}
+
+    def crawl(self, seed_artist_ids: Iterable[str], depth: int = 2,
+              max_artists: int = None, related_limit: int = 20,
+              seed_names: Dict[str, str] = None) -> ArtistGraph:
+        """
+        Breadth-first crawl from seed artists.
+
+        Nodes that cannot be expanded within the request budget stay in the
+        graph as leaves.
+
+        Args:
+            seed_artist_ids: Starting artist IDs (depth 0)
+            depth: Number of hops to expand
+            max_artists: Stop adding new nodes after this many
+            related_limit: Related artists kept per node (Spotify returns up to 20)
+            seed_names: Known names of seed artists (seeds are named only
+                if they show up as someone's related artist otherwise)
+
+        Returns:
+            ArtistGraph with nodes in BFS order
+        """
+        self.requests_made = 0
+        for artist_id, name in (seed_names or {}).items():
+            if name:
+                self._names[artist_id] = name
+        order: List[str] = []
+        depths: Dict[str, int] = {}
+        adjacency: Dict[str, List[str]] = {}
+
+        def visit(artist_id: str, level: int) -> bool:
+            if artist_id in depths:
+                return False
+            if max_artists and len(order) >= max_artists:
+                return False
+            depths[artist_id] = level
+            order.append(artist_id)
+            return True
+
+        frontier = [a for a in dict.fromkeys(seed_artist_ids) if visit(a, 0)]
+        for level in range(depth):
+            if not frontier:
+                break
+            related = self._expand(frontier)
+            next_frontier = []
+            for artist_id in frontier:
+                neighbours = related.get(artist_id)
+                if neighbours is None:
+                    continue
+                adjacency[artist_id] = neighbours[:related_limit]
+                for neighbour in adjacency[artist_id]:
+                    if visit(neighbour, level + 1):
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+
+        self._save_cache()
+        return self._build(order, depths, adjacency)
+
+    def _expand(self, artist_ids: List[str]) -> Dict[str, List[str]]:
+        """Fetch related artists for a BFS level, from cache or concurrently."""
+        result = {}
+        pending = []
+        now = time.time()
+        for artist_id in artist_ids:
+            entry = self._cache.get(artist_id)
+            if entry and now - entry.get("fetched_at", 0) < self.cache_ttl:
+                result[artist_id] = entry["related"]
+            else:
+                pending.append(artist_id)
+
+        # Only spend what is left of the budget; the rest stay leaves
+        with self._lock:
+            allowed = max(0, self.request_budget - self.requests_made)
+            pending = pending[:allowed]
+            self.requests_made += len(pending)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                for artist_id, artists in zip(pending, pool.map(self._fetch_related, pending)):
+                    if artists is None:
+                        continue
+                    related = [a["id"] for a in artists if a.get("id")]
+                    for artist in artists:
+                        self._names[artist["id"]] = artist.get("name", "")
+                    self._cache[artist_id] = {"related": related, "fetched_at": now}
+                    result[artist_id] = related
+        return result
+
+    def _fetch_related(self, artist_id: str) -> Optional[List[Dict]]:
+        """Fetch one adjacency list; an unknown artist stays unexpanded."""
+        try:
+            return self.client.get_related_artists(artist_id)
+        except Exception as e:
+            if not is_lookup_miss(e):
+                raise
+            return None
+
+    def _build(self, order: List[str], depths: Dict[str, int],
+               adjacency: Dict[str, List[str]]) -> ArtistGraph:
+        """Convert crawl state into CSR arrays, keeping only in-graph edges."""
+        index = {artist_id: node for node, artist_id in enumerate(order)}
+        indptr = [0]
+        indices = []
+        for artist_id in order:
+            indices.extend(index[n] for n in adjacency.get(artist_id, []) if n in index)
+            indptr.append(len(indices))
+
+        names = [
+            self._names.get(a) or self._cache.get(a, {}).get("name", "")
+            for a in order
+        ]
+        return ArtistGraph(order, names, [depths[a] for a in order], indptr, indices)
+
+    # Cache
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        """Load adjacency cache from disk."""
+        if not self.cache_path or not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        """Persist adjacency cache (atomically, so crashes never corrupt it)."""
+        if not self.cache_path:
+            return
+        for artist_id, name in self._names.items():
+            if artist_id in self._cache:
+                self._cache[artist_id]["name"] = name
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._cache, f, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+
+
+def fetch_top_tracks(client: SpotifyClient, artist_ids: Sequence[str],
+                     max_workers: int = 8, market: str = "US") -> Dict[str, List[Dict]]:
+    """
+    Fetch top tracks for many artists concurrently.
+
+    Returns:
+        Mapping of artist ID to top tracks (empty list for unknown artists)
+    """
+    def fetch(artist_id: str) -> List[Dict]:
+        try:
+            return client.get_artist_top_tracks(artist_id, market=market)
+        except Exception as e:
+            if not is_lookup_miss(e):
+                raise
+            return []
+
+    if not artist_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(artist_ids)))) as pool:
+        return dict(zip(artist_ids, pool.map(fetch, artist_ids)))
@@ -0,0 +1,326 @@
+"""
+Spotify Audio Feature Matrix
+
+Batch-fetches audio features for many tracks into a NumPy matrix so
+energy/tempo-based curation can be done with vectorized operations:
+- Normalization (min-max or z-score)
+- Pairwise distance matrices
+- Filtering by feature ranges
+- Nearest-neighbour similarity search
+"""
+
+import warnings
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+try:
+    import numpy as np
+except ImportError as e:
+    print("Missing required dependencies. Install with:")
+    print("pip install numpy")
+    raise e
+
+from spotify_client import SpotifyClient
+
+
+# Numeric audio feature columns, in matrix column order
+FEATURE_COLUMNS: Tuple[str, ...] = (
+    "danceability",
+    "energy",
+    "key",
+    "loudness",
+    "mode",
+    "speechiness",
+    "acousticness",
+    "instrumentalness",
+    "liveness",
+    "valence",
+    "tempo",
+    "duration_ms",
+    "time_signature",
+)
+
+# Columns used for similarity when the caller does not choose any
+DEFAULT_SIMILARITY_COLUMNS: Tuple[str, ...] = (
+    "danceability",
+    "energy",
+    "valence",
+    "tempo",
+    "acousticness",
+    "instrumentalness",
+)
+
+
+class AudioFeatureMatrix:
+    """Audio features for a set of tracks stored as an (n_tracks, n_features) array."""
+
+    def __init__(self, track_ids: Sequence[str], values: "np.ndarray",
+                 columns: Sequence[str] = FEATURE_COLUMNS,
+                 missing: Sequence[str] = ()):
+        """
+        Initialize matrix.
+
+        Args:
+            track_ids: Track IDs, one per row
+            values: Feature values with shape (len(track_ids), len(columns))
+            columns: Feature names, one per column
+            missing: Track IDs that had no audio features
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(track_ids), len(columns)):
+            raise ValueError(
+                f"Expected shape {(len(track_ids), len(columns))}, got {values.shape}"
+            )
+
+        self.track_ids = list(track_ids)
+        self.values = values
+        self.columns = tuple(columns)
+        self.missing = list(missing)
+        self.index = {track_id: row for row, track_id in enumerate(self.track_ids)}
+        self._column_index = {name: col for col, name in enumerate(self.columns)}
+
+    # Construction
+
+    @classmethod
+    def from_features(cls, features: Iterable[Optional[Dict]],
+                      columns: Sequence[str] = FEATURE_COLUMNS) -> "AudioFeatureMatrix":
+        """
+        Build matrix from audio feature dicts as returned by the API.
+
+        None entries are skipped; duplicate track IDs keep the first row.
+        """
+        track_ids = []
+        rows = []
+        seen = set()
+        for feature in features:
+            if not feature or feature.get("id") in seen:
+                continue
+            seen.add(feature["id"])
+            track_ids.append(feature["id"])
+            rows.append([feature.get(name, np.nan) for name in columns])
+
+        values = np.array(rows, dtype=np.float64).reshape(len(rows), len(columns))
+        return cls(track_ids, values, columns)
+
+    @classmethod
+    def fetch(cls, client: SpotifyClient, track_ids: Sequence[str],
+              columns: Sequence[str] = FEATURE_COLUMNS) -> "AudioFeatureMatrix":
+        """
+        Fetch audio features for tracks in batches of 100.
+
+        Args:
+            client: Authenticated Spotify client
+            track_ids: Track IDs to fetch (duplicates are fetched once)
+            columns: Feature columns to keep
+
+        Returns:
+            Matrix with one row per track that has audio features
+        """
+        unique_ids = list(dict.fromkeys(t for t in track_ids if t))
+        features = []
+        for i in range(0, len(unique_ids), 100):
+            batch = unique_ids[i:i+100]
+            features.extend(client.get_audio_features(batch))
+
+        matrix = cls.from_features(features, columns)
+        matrix.missing = [t for t in unique_ids if t not in matrix.index]
+        return matrix
+
+    @classmethod
+    def from_playlist(cls, client: SpotifyClient, playlist_id: str,
+                      columns: Sequence[str] = FEATURE_COLUMNS) -> "AudioFeatureMatrix":
+        """Fetch audio features for every track in a playlist."""
+        items = client.iter_playlist_tracks(playlist_id, fields="items(track(id)),total")
+        track_ids = [item["track"]["id"] for item in items
+                     if item.get("track") and item["track"].get("id")]
+        return cls.fetch(client, track_ids, columns)
+
+    # Access
+
+    def __len__(self) -> int:
+        return len(self.track_ids)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self.index
+
+    def column(self, name: str) -> "np.ndarray":
+        """Get a single feature column as a 1-D array."""
+        return self.values[:, self._column_index[name]]
+
+    def row(self, track_id: str) -> Dict[str, float]:
+        """Get features for one track as a dict."""
+        values = self.values[self.index[track_id]]
+        return dict(zip(self.columns, values.tolist()))
+
+    def select(self, columns: Sequence[str] = None) -> "np.ndarray":
+        """Get a sub-matrix with the requested columns (all if None)."""
+        if not columns:
+            return self.values
+        return self.values[:, [self._column_index[name] for name in columns]]
+
+    def subset(self, rows: Union[Sequence[int], "np.ndarray"]) -> "AudioFeatureMatrix":
+        """Create a new matrix from row indices or a boolean mask."""
+        rows = np.asarray(rows)
+        # An empty list would otherwise become a float array
+        rows = np.flatnonzero(rows) if rows.dtype == bool else rows.astype(np.intp)
+        return AudioFeatureMatrix(
+            [self.track_ids[r] for r in rows.tolist()],
+            self.values[rows],
+            self.columns
+        )
+
+    def take(self, track_ids: Sequence[str]) -> "AudioFeatureMatrix":
+        """Create a new matrix with the given tracks, in the given order."""
+        return self.subset([self.index[t] for t in track_ids if t in self.index])
+
+    # Vectorized operations
+
+    def normalized(self, columns: Sequence[str] = None,
+                   method: str = "minmax") -> "np.ndarray":
+        """
+        Normalize feature columns.
+
+        Args:
+            columns: Columns to include (all if None)
+            method: "minmax" (scale to 0-1) or "zscore" (zero mean, unit variance)
+
+        Returns:
+            Normalized array; constant columns become 0
+        """
+        values = self.select(columns)
+        with warnings.catch_warnings():
+            # All-NaN columns (features missing for every track) stay NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return self._normalize(values, method)
+
+    @staticmethod
+    def _normalize(values: "np.ndarray", method: str) -> "np.ndarray":
+        """Column-wise normalization of a raw feature array."""
+        if method == "minmax":
+            low = np.nanmin(values, axis=0) if len(values) else 0.0
+            span = (np.nanmax(values, axis=0) - low) if len(values) else 1.0
+            span = np.where(span > 0, span, 1.0)
+            return (values - low) / span
+        if method == "zscore":
+            mean = np.nanmean(values, axis=0) if len(values) else 0.0
+            std = np.nanstd(values, axis=0) if len(values) else 1.0
+            std = np.where(std > 0, std, 1.0)
+            return (values - mean) / std
+        raise ValueError(f"Unknown normalization method: {method}")
+
+    def _weighted(self, columns: Sequence[str], weights: Optional[Dict[str, float]],
+                  normalize: str) -> "np.ndarray":
+        """Normalized, weighted feature array used for distances."""
+        columns = tuple(columns or DEFAULT_SIMILARITY_COLUMNS)
+        values = self.normalized(columns, normalize) if normalize else self.select(columns)
+        values = np.nan_to_num(values)
+        if weights:
+            values = values * np.array([weights.get(c, 1.0) for c in columns])
+        return values
+
+    def distance_matrix(self, columns: Sequence[str] = None,
+                        weights: Dict[str, float] = None,
+                        normalize: str = "minmax") -> "np.ndarray":
+        """
+        Pairwise Euclidean distances between all tracks.
+
+        Args:
+            columns: Features to compare (defaults to DEFAULT_SIMILARITY_COLUMNS)
+            weights: Optional per-column weights
+            normalize: Normalization applied first ("minmax", "zscore" or None)
+
+        Returns:
+            Symmetric (n, n) distance array
+        """
+        values = self._weighted(columns, weights, normalize)
+        squared = np.einsum("ij,ij->i", values, values)
+        dist = squared[:, None] + squared[None, :] - 2.0 * (values @ values.T)
+        np.maximum(dist, 0.0, out=dist)
+        np.fill_diagonal(dist, 0.0)
+        return np.sqrt(dist, out=dist)
+
+    def mask(self, **ranges: Tuple[Optional[float], Optional[float]]) -> "np.ndarray":
+        """
+        Boolean mask of tracks whose features fall inside the given ranges.
+
+        Example:
+            matrix.mask(energy=(0.7, None), tempo=(120, 140))
+        """
+        keep = np.ones(len(self), dtype=bool)
+        for name, (low, high) in ranges.items():
+            column = self.column(name)
+            if low is not None:
+                keep &= column >= low
+            if high is not None:
+                keep &= column <= high
+        return keep
+
+    def filter(self, **ranges: Tuple[Optional[float], Optional[float]]) -> "AudioFeatureMatrix":
+        """New matrix containing only tracks inside the given feature ranges."""
+        return self.subset(self.mask(**ranges))
+
+    def nearest(self, target: Union[str, Dict[str, float]], k: int = 10,
+                columns: Sequence[str] = None, weights: Dict[str, float] = None,
+                normalize: str = "minmax") -> List[Tuple[str, float]]:
+        """
+        Find the k tracks most similar to a track or a target feature profile.
+
+        Args:
+            target: Track ID in this matrix, or dict of feature values
+            k: Number of neighbours to return
+            columns: Features to compare (defaults to DEFAULT_SIMILARITY_COLUMNS)
+            weights: Optional per-column weights
+            normalize: Normalization applied first ("minmax", "zscore" or None)
+
+        Returns:
+            List of (track_id, distance), closest first; a seed track is excluded
+        """
+        columns = tuple(columns or DEFAULT_SIMILARITY_COLUMNS)
+        if not len(self):
+            return []
+
+        values = self._weighted(columns, weights, normalize)
+        exclude = None
+        if isinstance(target, str):
+            exclude = self.index[target]
+            point = values[exclude]
+        else:
+            # Project the raw profile into the same normalized space
+            raw = self.select(columns)
+            point = np.array([target.get(c, np.nan) for c in columns], dtype=np.float64)
+            point = np.where(np.isnan(point), np.nanmean(raw, axis=0), point)
+            if normalize == "minmax":
+                low = np.nanmin(raw, axis=0)
+                span = np.nanmax(raw, axis=0) - low
+                point = (point - low) / np.where(span > 0, span, 1.0)
+            elif normalize == "zscore":
+                std = np.nanstd(raw, axis=0)
+                point = (point - np.nanmean(raw, axis=0)) / np.where(std > 0, std, 1.0)
+            if weights:
+                point = point * np.array([weights.get(c, 1.0) for c in columns])
+
+        dist = np.sqrt(((values - point) ** 2).sum(axis=1))
+        if exclude is not None:
+            dist[exclude] = np.inf
+
+        k = min(k, len(self) - (exclude is not None))
+        if k <= 0:
+            return []
+        candidates = np.argpartition(dist, k - 1)[:k]
+        candidates = candidates[np.argsort(dist[candidates])]
+        return [(self.track_ids[r], float(dist[r])) for r in candidates]
+
+    def summary(self, columns: Sequence[str] = None) -> Dict[str, Dict[str, float]]:
+        """Mean/min/max/std per feature column."""
+        columns = tuple(columns or self.columns)
+        values = self.select(columns)
+        if not len(values):
+            return {}
+        stats = {
+            "mean": np.nanmean(values, axis=0),
+            "min": np.nanmin(values, axis=0),
+            "max": np.nanmax(values, axis=0),
+            "std": np.nanstd(values, axis=0),
+        }
+        return {
+            name: {stat: float(arr[col]) for stat, arr in stats.items()}
+            for col, name in enumerate(columns)
+        }
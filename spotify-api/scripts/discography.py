@@ -0,0 +1,187 @@
+"""
+Spotify Discography Fetcher
+
+Resolves an artist's full discography quickly:
+- Pages the artist's albums, then batch-fetches album objects (20 per call)
+- Expands long albums and looks up ISRCs concurrently
+- Deduplicates re-releases and remasters by ISRC and normalized title
+- Streams tracks in release order as each batch completes
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List
+
+from spotify_client import SpotifyClient
+
+
+# Title suffixes that mark a reissue of the same recording rather than a new one
+REISSUE_PATTERN = re.compile(
+    r"\b(\d{4}\s+)?(re-?master(ed)?|remaster(ed)? version|deluxe|expanded|"
+    r"anniversary|edition|mono|stereo|single version|album version|"
+    r"bonus track|re-?issue|\d{4}\s+mix)\b",
+    re.IGNORECASE
+)
+SUFFIX_PATTERN = re.compile(r"\s*(\([^)]*\)|\[[^\]]*\]|\s-\s.*)$")
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+
+# Same-title tracks closer than this in length are treated as one recording
+DURATION_SLACK_MS = 10000
+
+
+@lru_cache(maxsize=65536)
+def normalize_title(title: str) -> str:
+    """
+    Normalize a track title so reissues of one recording compare equal.
+
+    Strips trailing "(Remastered 2011)", "- Deluxe Edition" and similar
+    markers while keeping ones that denote a different recording
+    ("Live", "Acoustic", "Remix").
+    """
+    name = title or ""
+    while True:
+        match = SUFFIX_PATTERN.search(name)
+        if not match or not REISSUE_PATTERN.search(match.group(1)):
+            break
+        name = name[:match.start()]
+    name = PUNCTUATION_PATTERN.sub(" ", name.lower())
+    return " ".join(name.split())
+
+
+class DiscographyFetcher:
+    """Fetch every track an artist has released, deduplicated."""
+
+    def __init__(self, client: SpotifyClient, max_workers: int = 8):
+        """
+        Initialize fetcher.
+
+        Args:
+            client: Authenticated Spotify client
+            max_workers: Maximum concurrent API requests
+        """
+        self.client = client
+        self.max_workers = max(1, max_workers)
+
+    def iter_tracks(self, artist_id: str,
+                    include_groups: str = "album,single,compilation",
+                    dedupe: bool = True, fetch_isrc: bool = True) -> Iterator[Dict]:
+        """
+        Stream an artist's tracks, oldest release first.
+
+        Originals win over later remasters because releases are processed
+        chronologically. Tracks on compilations are only kept when the
+        artist performs on them.
+
+        Args:
+            artist_id: Spotify artist ID
+            include_groups: Album groups to include
+            dedupe: Skip reissues already yielded
+            fetch_isrc: Look up full track objects (ISRC, popularity); costs
+                        one extra call per 50 tracks
+
+        Yields:
+            Track dicts with an "album" summary attached
+        """
+        albums = list(self.client.iter_artist_albums(artist_id, include_groups=include_groups))
+        albums.sort(key=lambda a: a.get("release_date") or "")
+        album_ids = list(dict.fromkeys(a["id"] for a in albums if a.get("id")))
+        batches = [album_ids[i:i+20] for i in range(0, len(album_ids), 20)]
+
+        seen_isrc = set()
+        seen_titles: Dict[str, List[int]] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Every album batch starts at once; results are consumed in
+            # release order so originals are seen before their reissues
+            album_futures = [pool.submit(self._load_albums, batch, artist_id)
+                             for batch in batches]
+            for album_future in album_futures:
+                tracks = album_future.result()
+                chunks = [tracks[i:i+50] for i in range(0, len(tracks), 50)]
+                if fetch_isrc:
+                    chunk_futures = [pool.submit(self._with_full_tracks, c) for c in chunks]
+                    chunks = (f.result() for f in chunk_futures)
+
+                for chunk in chunks:
+                    for track in chunk:
+                        if dedupe and self._is_duplicate(track, seen_isrc, seen_titles):
+                            continue
+                        yield track
+
+    @staticmethod
+    def _is_duplicate(track: Dict, seen_isrc: set,
+                      seen_titles: Dict[str, List[int]]) -> bool:
+        """Check a track against what was already yielded, then record it."""
+        isrc = (track.get("external_ids") or {}).get("isrc")
+        title = normalize_title(track.get("name", ""))
+        duration = track.get("duration_ms") or 0
+        if isrc and isrc in seen_isrc:
+            return True
+        durations = seen_titles.setdefault(title, [])
+        if any(abs(duration - d) <= DURATION_SLACK_MS for d in durations):
+            return True
+        if isrc:
+            seen_isrc.add(isrc)
+        durations.append(duration)
+        return False
+
+    def get_tracks(self, artist_id: str, **kwargs) -> List[Dict]:
+        """Collect iter_tracks into a list."""
+        return list(self.iter_tracks(artist_id, **kwargs))
+
+    def _load_albums(self, album_ids: List[str], artist_id: str) -> List[Dict]:
+        """Fetch up to 20 albums and all their tracks."""
+        albums = [a for a in self.client.get_albums(album_ids) if a]
+        albums.sort(key=lambda a: a.get("release_date") or "")
+
+        tracks = []
+        for album in albums:
+            page = album.get("tracks") or {}
+            items = list(page.get("items", []))
+            total = page.get("total", len(items))
+            if len(items) < total:
+                items.extend(self._remaining_album_tracks(album["id"], len(items), total))
+
+            summary = {
+                "id": album.get("id"),
+                "name": album.get("name"),
+                "album_type": album.get("album_type"),
+                "release_date": album.get("release_date"),
+                "images": album.get("images", [])
+            }
+            for item in items:
+                if not item or not item.get("id"):
+                    continue
+                if album.get("album_type") == "compilation" and not any(
+                    a.get("id") == artist_id for a in item.get("artists", [])
+                ):
+                    continue
+                tracks.append(dict(item, album=summary))
+        return tracks
+
+    def _remaining_album_tracks(self, album_id: str, offset: int, total: int) -> List[Dict]:
+        """Page through album tracks beyond the first page."""
+        items = []
+        while offset < total:
+            page = self.client.get_album_tracks(album_id, limit=50, offset=offset)
+            if not page:
+                break
+            items.extend(page)
+            offset += len(page)
+        return items
+
+    def _with_full_tracks(self, tracks: List[Dict]) -> List[Dict]:
+        """Merge full track objects (ISRC, popularity) into up to 50 simplified tracks."""
+        full = {
+            track["id"]: track
+            for track in self.client.get_tracks([t["id"] for t in tracks])
+            if track
+        }
+        return [
+            dict(
+                track,
+                external_ids=full.get(track["id"], {}).get("external_ids", {}),
+                popularity=full.get(track["id"], {}).get("popularity")
+            )
+            for track in tracks
+        ]
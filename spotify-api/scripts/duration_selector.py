@@ -0,0 +1,150 @@
+"""
+Spotify Duration-Targeted Track Selection
+
+Picks tracks from a candidate pool so the playlist runs for a target
+length (workout blocks, broadcast slots), preferring the most valuable
+tracks (popularity or search relevance).
+
+Selection is a 0/1 knapsack over durations quantized to whole seconds,
+solved with a vectorized dynamic program; pools of several thousand
+tracks resolve in a fraction of a second.
+"""
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+try:
+    import numpy as np
+except ImportError as e:
+    print("Missing required dependencies. Install with:")
+    print("pip install numpy")
+    raise e
+
+
+# Largest DP table (items x duration buckets) before the resolution is coarsened
+MAX_TABLE_CELLS = 40_000_000
+
+
+def track_values(tracks: Sequence[Dict], value: Union[str, Callable[[Dict], float]] = "popularity"
+                 ) -> "np.ndarray":
+    """
+    Compute a value for each track.
+
+    Args:
+        tracks: Track objects
+        value: "popularity", "relevance" (earlier in the pool is better),
+               or a callable taking a track and returning a number
+
+    Returns:
+        Array of non-negative values, one per track
+    """
+    n = len(tracks)
+    if callable(value):
+        values = [float(value(track)) for track in tracks]
+    elif value == "popularity":
+        # +1 so zero-popularity tracks still count for something
+        values = [float(track.get("popularity") or 0) + 1.0 for track in tracks]
+    elif value == "relevance":
+        values = [float(n - i) for i in range(n)]
+    else:
+        raise ValueError(f"Unknown value '{value}'. Use 'popularity', 'relevance' or a callable")
+    return np.maximum(np.asarray(values, dtype=np.float64), 0.0)
+
+
+def select_by_duration(tracks: Sequence[Dict], target_duration_ms: int,
+                       tolerance_ms: int = 30000,
+                       value: Union[str, Callable[[Dict], float]] = "popularity",
+                       resolution_ms: int = 1000) -> Tuple[List[Dict], int]:
+    """
+    Select tracks whose total duration is as close as possible to a target.
+
+    Maximizes total value among selections within target +/- tolerance. If
+    no selection lands inside the window, the closest achievable total is
+    used instead.
+
+    Args:
+        tracks: Candidate track objects (must include duration_ms)
+        target_duration_ms: Desired total playlist length
+        tolerance_ms: Allowed deviation from the target
+        value: How to value tracks (see track_values)
+        resolution_ms: Duration quantization step for the DP
+
+    Returns:
+        (selected tracks in candidate order, achieved duration in ms)
+    """
+    if target_duration_ms <= 0:
+        raise ValueError("target_duration_ms must be positive")
+
+    pool = [t for t in tracks if t and (t.get("duration_ms") or 0) > 0]
+    if not pool:
+        return [], 0
+
+    durations = np.array([t["duration_ms"] for t in pool], dtype=np.int64)
+    values = track_values(pool, value)
+
+    upper_ms = target_duration_ms + tolerance_ms
+    fits = durations <= upper_ms
+    pool = [t for t, ok in zip(pool, fits) if ok]
+    durations, values = durations[fits], values[fits]
+    if not pool:
+        return [], 0
+
+    # Coarsen the resolution if the table would be too large
+    resolution = max(1, resolution_ms)
+    while len(pool) * (upper_ms // resolution + 1) > MAX_TABLE_CELLS:
+        resolution *= 2
+
+    capacity = int(upper_ms // resolution)
+    weights = np.maximum(np.rint(durations / resolution).astype(np.int64), 1)
+
+    # best[w] = highest value reaching exactly w buckets (-inf if unreachable)
+    best = np.full(capacity + 1, -np.inf)
+    best[0] = 0.0
+    taken = np.zeros((len(pool), capacity + 1), dtype=bool)
+    for i, (w, v) in enumerate(zip(weights.tolist(), values.tolist())):
+        if w > capacity:
+            continue
+        candidate = best[:capacity + 1 - w] + v
+        improves = candidate > best[w:]
+        best[w:] = np.where(improves, candidate, best[w:])
+        taken[i, w:] = improves
+
+    reachable = np.flatnonzero(np.isfinite(best))
+    low = max(0, (target_duration_ms - tolerance_ms)) / resolution
+    high = upper_ms / resolution
+    in_window = reachable[(reachable >= low) & (reachable <= high)]
+
+    # Try buckets in order of preference and check real (unrounded) totals
+    if len(in_window):
+        order = in_window[np.lexsort((np.abs(in_window * resolution - target_duration_ms),
+                                      -best[in_window]))]
+    else:
+        order = reachable[np.argsort(np.abs(reachable * resolution - target_duration_ms))]
+
+    fallback = None
+    for bucket in order[:64].tolist():
+        chosen = _backtrack(taken, weights, bucket)
+        achieved = int(durations[chosen].sum())
+        if abs(achieved - target_duration_ms) <= tolerance_ms:
+            return [pool[i] for i in chosen], achieved
+        if fallback is None or abs(achieved - target_duration_ms) < abs(fallback[1] - target_duration_ms):
+            fallback = (chosen, achieved)
+
+    chosen, achieved = fallback
+    return [pool[i] for i in chosen], achieved
+
+
+def _backtrack(taken: "np.ndarray", weights: "np.ndarray", bucket: int) -> List[int]:
+    """Recover item indices (ascending) for a DP bucket."""
+    chosen = []
+    w = bucket
+    for i in range(len(weights) - 1, -1, -1):
+        if w <= 0:
+            break
+        if taken[i, w]:
+            chosen.append(i)
+            w -= int(weights[i])
+    return chosen[::-1]
+
+
+def total_duration_ms(tracks: Sequence[Dict[str, Any]]) -> int:
+    """Sum of duration_ms over tracks."""
+    return sum((t or {}).get("duration_ms") or 0 for t in tracks)
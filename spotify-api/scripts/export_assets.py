@@ -0,0 +1,177 @@
+"""
+Album-art and image assets for offline exports.
+
+Exported records reference images by CDN URL. AssetDownloader fetches the
+one image per record that matches a chosen size, concurrently and once
+per URL, and stores it under its content hash, so identical images behind
+different URLs are kept once. Records are then rewritten to point at the
+local files:
+
+    "images": [{"url": "assets/3f9a0c1d2e4b5a67.jpg", "width": 300, "height": 300,
+                "remote_url": "https://i.scdn.co/image/..."}]
+
+assets/index.json remembers every downloaded URL, so later runs only fetch
+images they have not seen. The HTTP session is injectable (any object with
+requests' get()), e.g. to test against a local image server.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# File extension per image Content-Type
+IMAGE_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+
+def choose_image(images: List[Dict[str, Any]], size: int) -> Optional[Dict[str, Any]]:
+    """
+    The smallest image at least `size` pixels wide (else the largest).
+
+    Images without dimensions (e.g. playlist mosaics) rank after sized
+    ones; with none sized, the first is used.
+    """
+    images = [image for image in images or [] if image.get("url")]
+    sized = [image for image in images if image.get("width")]
+    if not sized:
+        return images[0] if images else None
+    large_enough = [image for image in sized if image["width"] >= size]
+    if large_enough:
+        return min(large_enough, key=lambda image: image["width"])
+    return max(sized, key=lambda image: image["width"])
+
+
+class AssetDownloader:
+    """Concurrent, deduplicating image downloader with a persistent URL index."""
+
+    def __init__(self, directory: str, size: int = 300, max_workers: int = 8,
+                 session: requests.Session = None, timeout: float = 30.0):
+        """
+        Args:
+            directory: Asset directory inside the export (local paths in
+                records are relative to its parent, the export directory)
+            size: Preferred image width in pixels (Spotify offers 640, 300 and 64)
+            max_workers: Concurrent downloads
+            session: HTTP session (a new one without Spotify credentials if None)
+            timeout: Seconds per download
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_maxsize=self.max_workers))
+        self.session = session
+        self.index_path = self.directory / "index.json"
+        # URL -> {"file": path relative to the export, "sha256", "bytes"}
+        self.index: Dict[str, Dict[str, Any]] = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        self.failed: Dict[str, str] = {}
+        self.stats = {"downloaded": 0, "bytes_downloaded": 0, "cached": 0,
+                      "duplicates": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def image_urls(self, record: Any) -> Iterator[str]:
+        """Remote URL of the chosen image of every `images` list in a record."""
+        if isinstance(record, list):
+            for value in record:
+                yield from self.image_urls(value)
+        elif isinstance(record, dict):
+            for key, value in record.items():
+                if key == "images" and isinstance(value, list):
+                    image = choose_image(value, self.size)
+                    if image and _is_remote(image["url"]):
+                        yield image["url"]
+                else:
+                    yield from self.image_urls(value)
+
+    def download(self, urls: Iterable[str]) -> Dict[str, Any]:
+        """
+        Download every URL not already stored, concurrently.
+
+        Returns:
+            Download statistics (failures are in self.failed)
+        """
+        pending = []
+        for url in dict.fromkeys(urls):
+            entry = self.index.get(url)
+            if entry and (self.directory.parent / entry["file"]).exists():
+                self.stats["cached"] += 1
+            else:
+                pending.append(url)
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                list(pool.map(self._download, pending))
+        self.save()
+        return dict(self.stats)
+
+    def localize(self, record: Any) -> Any:
+        """Copy of a record whose `images` lists hold just the local chosen image."""
+        if isinstance(record, list):
+            return [self.localize(value) for value in record]
+        if not isinstance(record, dict):
+            return record
+        localized = {}
+        for key, value in record.items():
+            if key == "images" and isinstance(value, list):
+                image = choose_image(value, self.size)
+                entry = self.index.get(image["url"]) if image else None
+                if entry:
+                    value = [dict(image, url=entry["file"], remote_url=image["url"])]
+            else:
+                value = self.localize(value)
+            localized[key] = value
+        return localized
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, sort_keys=True, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+
+    def _download(self, url: str):
+        """Fetch one image and store it under its content hash."""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            with self._lock:
+                self.failed[url] = f"{type(e).__name__}: {e}"
+                self.stats["failed"] += 1
+            return
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        path = self.directory / f"{digest[:16]}{IMAGE_TYPES.get(content_type, '.jpg')}"
+        with self._lock:
+            duplicate = path.exists()
+            if not duplicate:
+                tmp_path = path.with_name(path.name + ".tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            self.index[url] = {"file": path.relative_to(self.directory.parent).as_posix(),
+                               "sha256": digest, "bytes": len(content)}
+            self.stats["duplicates" if duplicate else "downloaded"] += 1
+            self.stats["bytes_downloaded"] += len(content)
+
+
+def _is_remote(url: str) -> bool:
+    return url.startswith(("http://", "https://"))
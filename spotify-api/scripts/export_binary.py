@@ -0,0 +1,263 @@
+"""
+Compact binary (MessagePack) export format.
+
+Layout of a .msgpack export file:
+
+    magic "SPXM" | header length (uint32) | header
+    record, record, ...
+    footer | footer offset (uint64) | magic "SPXM"
+
+The header is a MessagePack map with the format version and the record
+fields; records with exactly those fields are stored as arrays of values,
+so keys are not repeated per record. Objects in SHARED_FIELDS (albums with
+their names and image URLs, artists, owners) are stored once in the
+footer's table and referenced by index, so an album repeated across
+thousands of tracks costs a few bytes after the first time. Everything else
+(mostly unique per record) stays inline, where it is cheapest to read back.
+
+The reader memory-maps the file, loads the shared table from the footer
+and unpacks records one at a time.
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+try:
+    import msgpack
+except ImportError as e:
+    print("Missing required dependencies. Install with:")
+    print("pip install msgpack")
+    raise e
+
+from export_writers import ContentHashes, NDJSONWriter, RecordWriter, read_records
+
+
+MAGIC = b"SPXM"
+FORMAT_VERSION = 1
+# MessagePack extension type of a shared table reference
+SHARED_REF = 1
+# Record fields whose objects (or lists of objects) repeat across records
+SHARED_FIELDS = frozenset({"artists", "album", "owner", "images"})
+
+_LENGTH = struct.Struct(">I")
+_OFFSET = struct.Struct(">Q")
+
+
+class MessagePackWriter(RecordWriter):
+    """MessagePack records with a schema header and a table of shared objects."""
+
+    extension = ".msgpack"
+    binary = True
+
+    def __init__(self, path: str, hashes: ContentHashes = None):
+        self.fields: Optional[List[str]] = None
+        self._field_set = None
+        # Packed bytes of each shared object -> its table index
+        self._shared_index: Dict[bytes, int] = {}
+        self._packer = msgpack.Packer(use_bin_type=True)
+        super().__init__(path, hashes)
+
+    @staticmethod
+    def encode(record: Dict[str, Any]) -> str:
+        # Records are packed against the file's schema and shared table,
+        # so they have no standalone encoding; resumable exports stage
+        # them as NDJSON and write() them when finishing
+        return NDJSONWriter.encode(record)
+
+    def write(self, record: Dict[str, Any]):
+        if self.fields is None:
+            self._write_header(list(record))
+        shared = self._shared
+        if record.keys() == self._field_set:
+            value = [shared(record[f]) if f in SHARED_FIELDS else record[f]
+                     for f in self.fields]
+        else:
+            value = {k: shared(v) if k in SHARED_FIELDS else v for k, v in record.items()}
+        self._emit(self._packer.pack(value))
+        self.count += 1
+
+    def write_encoded(self, line: str):
+        self.write(json.loads(line))
+
+    def _finish(self):
+        if self.fields is None:
+            self._write_header([])
+        footer_offset = self._file.tell()
+        self._emit(self._packer.pack({"count": self.count,
+                                      "shared": len(self._shared_index)}))
+        for packed in self._shared_index:
+            self._emit(packed)
+        self._emit(_OFFSET.pack(footer_offset) + MAGIC)
+
+    def _write_header(self, fields: List[str]):
+        self.fields = fields
+        self._field_set = set(fields)
+        header = self._packer.pack({"version": FORMAT_VERSION, "fields": fields})
+        self._emit(MAGIC + _LENGTH.pack(len(header)) + header)
+
+    def _emit(self, data: bytes):
+        self._file.write(data)
+        self._digest.update(data)
+
+    def _shared(self, value: Any) -> Any:
+        """Replace an object (or each object of a list) with a table reference."""
+        if isinstance(value, list):
+            return [self._shared(v) for v in value]
+        if not isinstance(value, dict):
+            return value
+        packed = self._packer.pack(value)
+        index = self._shared_index.setdefault(packed, len(self._shared_index))
+        size = 1 if index < 0x100 else 2 if index < 0x10000 else 4
+        return msgpack.ExtType(SHARED_REF, index.to_bytes(size, "big"))
+
+
+class MessagePackReader:
+    """
+    Memory-mapped reader of a .msgpack export.
+
+    Only the shared table is held in memory; records are unpacked from
+    the mapping as they are iterated. Records referencing the same shared
+    object (e.g. tracks of one album) get the same dict, so copy it before
+    modifying it.
+    """
+
+    def __init__(self, path: str, read_size: int = 1 << 16):
+        """
+        Args:
+            path: File written by MessagePackWriter
+            read_size: Bytes the unpacker takes from the mapping at a time
+        """
+        self.path = Path(path)
+        self.read_size = read_size
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:4] != MAGIC or self._map[-4:] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a MessagePack export")
+        (header_length,) = _LENGTH.unpack_from(self._map, 4)
+        header = msgpack.unpackb(self._map[8:8 + header_length])
+        if header["version"] > FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} uses format version {header['version']}; "
+                             f"this reader supports up to {FORMAT_VERSION}")
+        self.version = header["version"]
+        self.fields: List[str] = header["fields"]
+        self._records_offset = 8 + header_length
+        (footer_offset,) = _OFFSET.unpack_from(self._map, len(self._map) - 12)
+        self._map.seek(footer_offset)
+        footer = msgpack.Unpacker(self._map, read_size=self.read_size, strict_map_key=False)
+        summary = footer.unpack()
+        self.count: int = summary["count"]
+        self._shared: List[Any] = [footer.unpack() for _ in range(summary["shared"])]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self._map.seek(self._records_offset)
+        unpacker = msgpack.Unpacker(self._map, read_size=self.read_size,
+                                    ext_hook=self._ext_hook, strict_map_key=False)
+        fields = self.fields
+        for value in islice(unpacker, self.count):
+            yield dict(zip(fields, value)) if isinstance(value, list) else value
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "MessagePackReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code == SHARED_REF:
+            return self._shared[int.from_bytes(data, "big")]
+        return msgpack.ExtType(code, data)
+
+
+def read_msgpack_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from a .msgpack export."""
+    with MessagePackReader(path) as reader:
+        yield from reader
+
+
+def convert(path: str, output: str = None) -> Path:
+    """Convert a JSON or NDJSON export file to .msgpack; returns the new file."""
+    path = Path(path)
+    output = Path(output) if output else path.with_suffix(MessagePackWriter.extension)
+    with MessagePackWriter(output) as writer:
+        writer.write_all(read_records(path))
+    return output
+
+
+def benchmark(path: str, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Compare size and full-parse time of one export file as pretty-printed
+    JSON (indent=2), streamed JSON/NDJSON and MessagePack.
+
+    Args:
+        path: A JSON or NDJSON export file
+        repeat: Parses per format (the fastest counts)
+
+    Returns:
+        {format: {"bytes": size, "seconds": parse time}}
+    """
+    path = Path(path)
+    records = list(read_records(path))
+    work = path.with_name(path.stem + ".bench")
+    work.mkdir(exist_ok=True)
+    pretty = work / "pretty.json"
+    with open(pretty, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    binary = convert(path, work / f"records{MessagePackWriter.extension}")
+
+    def load_pretty():
+        with open(pretty, 'r', encoding='utf-8') as f:
+            return len(json.load(f))
+
+    parsers = {
+        "json (indent=2)": (pretty, load_pretty),
+        path.suffix.lstrip("."): (path, lambda: sum(1 for _ in read_records(path))),
+        "msgpack": (binary, lambda: sum(1 for _ in read_msgpack_records(binary))),
+    }
+    results = {}
+    for name, (file, parse) in parsers.items():
+        timings = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            parse()
+            timings.append(time.perf_counter() - started)
+        results[name] = {"bytes": file.stat().st_size, "seconds": round(min(timings), 4)}
+    for file in work.iterdir():
+        file.unlink()
+    work.rmdir()
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    """Convert export files to MessagePack, or benchmark them against JSON."""
+    parser = argparse.ArgumentParser(description="Compact binary Spotify exports")
+    parser.add_argument("files", nargs="+", help="JSON or NDJSON export files")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare size and parse time instead of converting")
+    args = parser.parse_args(argv)
+
+    for file in args.files:
+        if not args.benchmark:
+            print(f"✓ {file} -> {convert(file)}")
+            continue
+        print(f"\n📊 {file}")
+        for name, result in benchmark(file).items():
+            print(f"   {name:16} {result['bytes'] / 1e6:8.2f} MB  {result['seconds'] * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
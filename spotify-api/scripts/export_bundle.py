@@ -0,0 +1,251 @@
+"""
+Sharded web bundles for front-end apps.
+
+Instead of one large JSON file per collection (which a bundler ships
+wholesale), collections are split into fixed-size chunks that an app
+fetches on demand:
+
+    web/index.json                  collections with record and chunk counts
+    web/<collection>/<n>.json       records n*chunk_size ... (n+1)*chunk_size - 1
+    web/search/<xx>.json            prefix index for words starting with "xx"
+
+Every file can get precompressed .gz/.br copies for static hosts that serve
+them with Content-Encoding. Search shards map each word prefix (2 to
+max_prefix characters) to the records containing it, with a label to show,
+so autocomplete needs one small fetch per query.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from export_writers import ContentHashes
+
+try:
+    import brotli
+except ImportError:
+    # Brotli copies are optional; gzip needs nothing extra
+    brotli = None
+
+
+COMPRESSIONS = {"gzip": ".gz", "br": ".br"}
+MIN_PREFIX = 2
+
+
+class WebBundleWriter:
+    """Thread-safe writer of a chunked, searchable web bundle."""
+
+    def __init__(self, directory: str, chunk_size: int = 500,
+                 compression: Sequence[str] = ("gzip",), max_prefix: int = 4,
+                 max_hits: int = 50, hashes: ContentHashes = None):
+        """
+        Args:
+            directory: Bundle directory (created if needed)
+            chunk_size: Records per chunk file
+            compression: Precompressed copies to write: "gzip" and/or "br"
+            max_prefix: Longest word prefix indexed for search
+            max_hits: Most records listed per search prefix
+            hashes: Registry used to leave unchanged files untouched
+        """
+        unknown = set(compression) - set(COMPRESSIONS)
+        if unknown:
+            raise ValueError(f"Unknown compression: {sorted(unknown)}. Use {sorted(COMPRESSIONS)}")
+        if "br" in compression and brotli is None:
+            raise ValueError("Brotli compression requires: pip install brotli")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = max(1, chunk_size)
+        self.compression = tuple(dict.fromkeys(compression))
+        self.max_prefix = max(MIN_PREFIX, max_prefix)
+        self.max_hits = max(1, max_hits)
+        self.hashes = hashes
+        self.collections: Dict[str, Dict[str, int]] = {}
+        self._previous: Dict[str, Dict[str, int]] = {}
+        if (self.directory / "index.json").exists():
+            with open(self.directory / "index.json", 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            # Chunks of a bundle with other settings cannot be kept as they are
+            if (previous.get("chunk_size") == self.chunk_size
+                    and tuple(previous.get("compression", ())) == self.compression):
+                self._previous = previous["collections"]
+        # Search reference per record ID: (collection, position, label)
+        self._refs: Dict[str, Tuple[str, int, str]] = {}
+        self._files = set()
+        self._lock = threading.Lock()
+
+    def add_collection(self, name: str, records: Iterable[Dict[str, Any]],
+                       label: Callable[[Dict[str, Any]], Optional[str]] = None) -> int:
+        """
+        Write a collection as chunks, as its records stream in.
+
+        Args:
+            name: Collection path inside the bundle, e.g. "playlist_tracks/<id>"
+            records: Records in display order
+            label: Searchable text of a record (None to leave it out of search)
+
+        Returns:
+            Number of records written
+        """
+        count, chunk = 0, []
+        for record in records:
+            if label:
+                self._add_ref(record, name, count, label(record))
+            chunk.append(record)
+            count += 1
+            if len(chunk) == self.chunk_size:
+                self._write_chunk(name, count // self.chunk_size - 1, chunk)
+                chunk = []
+        if chunk:
+            self._write_chunk(name, count // self.chunk_size, chunk)
+        with self._lock:
+            self.collections[name] = {"count": count, "chunks": -(-count // self.chunk_size)}
+        return count
+
+    def keep(self, name: str) -> bool:
+        """
+        Keep a collection of the previous bundle as it is, e.g. one that
+        failed to refresh. Its records drop out of search until rewritten.
+
+        Returns:
+            False if the previous bundle had no such collection, or was
+            written with another chunk size or compression
+        """
+        entry = self._previous.get(name)
+        if entry is None:
+            return False
+        with self._lock:
+            self.collections[name] = entry
+            for number in range(entry["chunks"]):
+                path = self.directory / name / f"{number}.json"
+                self._files.add(path)
+                self._files.update(path.with_name(path.name + COMPRESSIONS[c])
+                                   for c in self.compression)
+        return True
+
+    def close(self, prune: bool = True) -> Dict[str, Any]:
+        """
+        Write the search shards and index.
+
+        Args:
+            prune: Delete files of earlier bundles that were not written again
+
+        Returns:
+            The index
+        """
+        shards: Dict[str, Dict[str, Any]] = {}
+        for record_id in sorted(self._refs, key=self._refs.__getitem__):
+            collection, position, text = self._refs[record_id]
+            for prefix in sorted(self._prefixes(text)):
+                shard = shards.setdefault(prefix[:MIN_PREFIX], {"refs": [], "prefixes": {}})
+                hits = shard["prefixes"].setdefault(prefix, [])
+                if len(hits) >= self.max_hits:
+                    continue
+                if not shard["refs"] or shard["refs"][-1][:2] != [collection, position]:
+                    shard["refs"].append([collection, position, text])
+                hits.append(len(shard["refs"]) - 1)
+        for key, shard in shards.items():
+            self._put(self.directory / "search" / f"{key}.json", shard)
+
+        index = {
+            "chunk_size": self.chunk_size,
+            "compression": list(self.compression),
+            "collections": self.collections,
+            "search": {"min_prefix": MIN_PREFIX, "max_prefix": self.max_prefix,
+                       "max_hits": self.max_hits, "shards": sorted(shards)}
+        }
+        self._put(self.directory / "index.json", index)
+        if prune:
+            self._prune()
+        return index
+
+    def __enter__(self) -> "WebBundleWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def _add_ref(self, record: Dict[str, Any], collection: str, position: int,
+                 text: Optional[str]):
+        """Index a record for search; a record listed twice keeps its first reference."""
+        if not text:
+            return
+        record_id = record.get("id") or f"{collection}:{position}"
+        ref = (collection, position, text)
+        with self._lock:
+            if record_id not in self._refs or ref < self._refs[record_id]:
+                self._refs[record_id] = ref
+
+    def _prefixes(self, text: str) -> set:
+        """Word prefixes of MIN_PREFIX to max_prefix characters."""
+        return {word[:n] for word in re.findall(r"\w+", normalize(text))
+                for n in range(MIN_PREFIX, min(len(word), self.max_prefix) + 1)}
+
+    def _write_chunk(self, collection: str, number: int, records: List[Dict[str, Any]]):
+        self._put(self.directory / collection / f"{number}.json", records)
+
+    def _put(self, path: Path, data: Any):
+        """Write one file and its compressed copies, unless all are unchanged."""
+        encoded = json.dumps(data, ensure_ascii=False, separators=(",", ":"),
+                             sort_keys=True).encode('utf-8')
+        copies = [(path.with_name(path.name + COMPRESSIONS[c]), c) for c in self.compression]
+        with self._lock:
+            self._files.add(path)
+            self._files.update(copy for copy, _ in copies)
+        digest = hashlib.sha256(encoded).hexdigest()
+        if (self.hashes and self.hashes.is_current(path, digest)
+                and all(copy.exists() for copy, _ in copies)):
+            for file in [path] + [copy for copy, _ in copies]:
+                self.hashes.skip(file)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._replace(path, encoded, digest)
+        for copy, compression in copies:
+            self._replace(copy, compress(encoded, compression))
+
+    def _replace(self, path: Path, data: bytes, digest: str = None):
+        """Atomically replace path with data (through the hash registry if any)."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        if self.hashes:
+            self.hashes.commit(tmp_path, path, digest or hashlib.sha256(data).hexdigest())
+        else:
+            os.replace(tmp_path, path)
+
+    def _prune(self):
+        """Remove files (and emptied directories) not part of this bundle."""
+        for path in sorted(self.directory.rglob("*"), reverse=True):
+            if path.is_file() and path not in self._files:
+                path.unlink()
+                if self.hashes:
+                    self.hashes.forget(path)
+            elif path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+
+
+def normalize(text: str) -> str:
+    """Lower-case text without accents, as used for search prefixes."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    """Compress at the highest level (reproducibly: gzip gets no timestamp)."""
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def track_label(record: Dict[str, Any]) -> Optional[str]:
+    """Search label of a track record: "Title — Artist, Artist"."""
+    if not record.get("name"):
+        return None
+    artists = ", ".join(a["name"] for a in record.get("artists", []) if a.get("name"))
+    return f"{record['name']} — {artists}" if artists else record["name"]
@@ -0,0 +1,234 @@
+"""
+Columnar (Parquet) library export for analytics.
+
+Normalizes playlists, playlist items and saved tracks into typed tables
+joined by Spotify IDs:
+
+    playlists        id, name, owner_id, snapshot_id, ...
+    playlist_items   playlist_id -> playlists.id, track_id -> tracks.id
+    saved_tracks     track_id -> tracks.id
+    tracks           id, album_id -> albums.id, ...
+    track_artists    track_id -> tracks.id, artist_id -> artists.id
+    albums, artists  one row per ID
+
+Rows are buffered per table and flushed as Parquet row groups while they
+stream in; strings are dictionary-encoded and columns compressed. Tables
+are written to .tmp files and only replace the previous export once every
+table is complete.
+"""
+
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as e:
+    print("Missing required dependencies. Install with:")
+    print("pip install pyarrow")
+    raise e
+
+
+UTC_TIMESTAMP = pa.timestamp("s", tz="UTC")
+
+SCHEMAS: Dict[str, pa.Schema] = {
+    "playlists": pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("description", pa.string()),
+        ("owner_id", pa.string()),
+        ("snapshot_id", pa.string()),
+        ("public", pa.bool_()),
+        ("collaborative", pa.bool_()),
+        ("tracks_total", pa.int32()),
+    ]),
+    "playlist_items": pa.schema([
+        ("playlist_id", pa.string()),
+        ("position", pa.int32()),
+        ("track_id", pa.string()),
+        ("added_at", UTC_TIMESTAMP),
+    ]),
+    "saved_tracks": pa.schema([
+        ("track_id", pa.string()),
+        ("added_at", UTC_TIMESTAMP),
+    ]),
+    "tracks": pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("album_id", pa.string()),
+        ("duration_ms", pa.int32()),
+        ("popularity", pa.int16()),
+        ("explicit", pa.bool_()),
+        ("isrc", pa.string()),
+    ]),
+    "track_artists": pa.schema([
+        ("track_id", pa.string()),
+        ("artist_id", pa.string()),
+        ("position", pa.int8()),
+    ]),
+    "albums": pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("album_type", pa.string()),
+        ("release_date", pa.string()),
+        ("image_url", pa.string()),
+    ]),
+    "artists": pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+    ]),
+}
+
+# Projection used when reading playlist items and saved tracks
+ITEM_FIELDS = ("items(added_at,track(id,name,duration_ms,popularity,explicit,external_ids(isrc),"
+               "album(id,name,album_type,release_date,images),artists(id,name))),total")
+
+COMPRESSIONS = ("zstd", "snappy", "gzip", "none")
+
+
+class ColumnarLibraryWriter:
+    """Thread-safe writer of the normalized library tables, one Parquet file each."""
+
+    def __init__(self, directory: str, compression: str = "zstd",
+                 row_group_size: int = 50000):
+        """
+        Open one Parquet writer per table.
+
+        Args:
+            directory: Output directory (created if needed)
+            compression: "zstd", "snappy", "gzip" or "none"
+            row_group_size: Rows buffered per table before a row group is written
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}. Use {list(COMPRESSIONS)}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = max(1, row_group_size)
+        self.rows = {table: 0 for table in SCHEMAS}
+        self._buffers = {table: {name: [] for name in schema.names}
+                         for table, schema in SCHEMAS.items()}
+        self.paths = {table: self.directory / f"{table}.parquet" for table in SCHEMAS}
+        self._writers = {
+            table: pq.ParquetWriter(_tmp_path(self.paths[table]), schema,
+                                    compression=compression, use_dictionary=True)
+            for table, schema in SCHEMAS.items()
+        }
+        self._seen = {"tracks": set(), "albums": set(), "artists": set()}
+        self._lock = threading.Lock()
+
+    def add_playlist(self, playlist: Dict[str, Any]):
+        """Add a playlist (simplified playlist object from the API)."""
+        with self._lock:
+            self._append("playlists", (
+                playlist.get("id"), playlist.get("name"), playlist.get("description"),
+                (playlist.get("owner") or {}).get("id"), playlist.get("snapshot_id"),
+                playlist.get("public"), playlist.get("collaborative"),
+                (playlist.get("tracks") or {}).get("total")
+            ))
+
+    def add_playlist_items(self, playlist_id: str, items: List[Dict[str, Any]]) -> int:
+        """Add all of a playlist's items (raw API items) in order; returns how many."""
+        with self._lock:
+            for position, item in enumerate(items):
+                track = item.get("track") or {}
+                self._append("playlist_items", (
+                    playlist_id, position, track.get("id"), _timestamp(item.get("added_at"))
+                ))
+                self._add_track(track)
+        return len(items)
+
+    def add_saved_tracks(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Add saved-track items (raw API items); returns how many."""
+        count = 0
+        for item in items:
+            track = item.get("track") or {}
+            if not track.get("id"):
+                continue
+            with self._lock:
+                self._append("saved_tracks", (track["id"], _timestamp(item.get("added_at"))))
+                self._add_track(track)
+            count += 1
+        return count
+
+    def close(self, commit: bool = True):
+        """
+        Finish every file.
+
+        Args:
+            commit: Flush remaining rows and replace the previous tables;
+                if False, discard the new files and keep the previous ones
+        """
+        with self._lock:
+            for table, writer in self._writers.items():
+                if commit:
+                    self._flush(table)
+                writer.close()
+            for path in self.paths.values():
+                if commit:
+                    os.replace(_tmp_path(path), path)
+                else:
+                    _tmp_path(path).unlink(missing_ok=True)
+
+    def __enter__(self) -> "ColumnarLibraryWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failed export must not leave truncated tables in place of good ones
+        self.close(commit=exc_type is None)
+
+    def _add_track(self, track: Dict[str, Any]):
+        """Add a track, its album and artists once each (caller holds the lock)."""
+        if not track.get("id") or track["id"] in self._seen["tracks"]:
+            return
+        self._seen["tracks"].add(track["id"])
+        album = track.get("album") or {}
+        self._append("tracks", (
+            track["id"], track.get("name"), album.get("id"), track.get("duration_ms"),
+            track.get("popularity"), track.get("explicit"),
+            (track.get("external_ids") or {}).get("isrc")
+        ))
+        if album.get("id") and album["id"] not in self._seen["albums"]:
+            self._seen["albums"].add(album["id"])
+            images = album.get("images") or []
+            self._append("albums", (
+                album["id"], album.get("name"), album.get("album_type"),
+                album.get("release_date"), images[0].get("url") if images else None
+            ))
+        for position, artist in enumerate(a for a in track.get("artists", []) if a.get("id")):
+            self._append("track_artists", (track["id"], artist["id"], position))
+            if artist["id"] not in self._seen["artists"]:
+                self._seen["artists"].add(artist["id"])
+                self._append("artists", (artist["id"], artist.get("name")))
+
+    def _append(self, table: str, row: tuple):
+        buffer = self._buffers[table]
+        for name, value in zip(buffer, row):
+            buffer[name].append(value)
+        self.rows[table] += 1
+        if len(buffer[next(iter(buffer))]) >= self.row_group_size:
+            self._flush(table)
+
+    def _flush(self, table: str):
+        """Write buffered rows of one table as a row group."""
+        buffer = self._buffers[table]
+        if not buffer[next(iter(buffer))]:
+            return
+        self._writers[table].write_table(pa.table(buffer, schema=SCHEMAS[table]))
+        for column in buffer.values():
+            column.clear()
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(path.name + ".tmp")
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse Spotify's ISO 8601 timestamps ("2024-05-01T12:00:00Z")."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
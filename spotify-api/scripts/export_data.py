@@ -3,32 +3,77 @@ Export Spotify data as JSON for use in applications without API calls.
 
 This script fetches data from Spotify API and saves it as JSON files that can be
 imported directly into React/web applications, avoiding runtime API calls.
+Records are streamed to disk as pages arrive (as a JSON array or NDJSON), so
+memory stays flat however large the library is.
 """
 
+import argparse
 import json
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-from spotify_client import create_client_from_env, validate_credentials, get_validation_errors
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from export_writers import (EXTENSIONS, FORMATS, ContentHashes, ExportCheckpoint,
+                            RecordWriter, canonical_hash, open_writer, read_records,
+                            writer_class)
+from spotify_client import (
+    SpotifyClient, create_client_from_env, validate_credentials, get_validation_errors
+)
+
+
+TIME_RANGES = ("short_term", "medium_term", "long_term")
+# Page sizes of the paged reads (resumed exports restart at a page boundary)
+PLAYLIST_PAGE = 100
+SAVED_PAGE = 50
+
+# Projection used when reading playlist items (only what _track_record keeps)
+ITEM_FIELDS = ("items(added_at,track(id,name,duration_ms,external_urls,"
+               "artists(id,name),album(id,name,images))),total")
 
 
 class SpotifyDataExporter:
     """Export Spotify data to JSON files."""
     
-    def __init__(self, output_dir: str = "exported_data"):
+    def __init__(self, output_dir: str = "exported_data", client: SpotifyClient = None,
+                 max_workers: int = 8, format: str = "json"):
         """
         Initialize exporter.
         
         Args:
             output_dir: Directory to save exported JSON files
+            client: Authenticated Spotify client (created from env if None)
+            max_workers: Sections exported at the same time by export_all
+            format: "json" (one array per file), "ndjson" (one record per line)
+                or "msgpack" (compact binary, see export_binary)
         """
+        # Fails early on an unknown format or a missing msgpack package
+        writer_class(format)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.max_workers = max(1, max_workers)
+        self.format = format
+        self._checkpoint: Optional[ExportCheckpoint] = None
+        # Content hashes of written files; unchanged files are not rewritten
+        self.hashes = ContentHashes(self.output_dir)
         
         # Initialize client
-        self.client = create_client_from_env()
-        if self.client.refresh_token:
-            self.client.refresh_access_token()
+        if client is None:
+            client = create_client_from_env()
+            if client.refresh_token:
+                client.refresh_access_token()
+        self.client = client
+        
+        # requests keeps 10 connections per host by default
+        if self.max_workers > 10:
+            self.client.session.mount(
+                "https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            )
     
     def export_user_profile(self) -> Dict:
         """
@@ -62,35 +107,36 @@ class SpotifyDataExporter:
         Export user's playlists.
         
         Args:
-            limit: Maximum number of playlists to export
+            limit: Maximum number of playlists to export (all if None)
             
         Returns:
             List of playlist dictionaries
         """
-        print(f"📊 Exporting playlists (limit: {limit})...")
-        playlists = self.client.get_user_playlists(limit=limit)
-        
-        # Sanitize data for export
-        exported = []
-        for playlist in playlists:
-            exported.append({
-                'id': playlist.get('id'),
-                'name': playlist.get('name'),
-                'description': playlist.get('description'),
-                'public': playlist.get('public'),
-                'tracks_total': playlist.get('tracks', {}).get('total', 0),
-                'images': playlist.get('images', []),
-                'external_urls': playlist.get('external_urls', {}),
-                'owner': {
-                    'id': playlist.get('owner', {}).get('id'),
-                    'display_name': playlist.get('owner', {}).get('display_name')
-                }
-            })
-        
-        self._save_json('playlists.json', exported)
-        print(f"   ✓ Saved {len(exported)} playlists to {self.output_dir}/playlists.json")
+        print(f"📊 Exporting playlists (limit: {limit or 'all'})...")
+        exported = list(self.iter_playlists(limit))
+        self._write_records(self.output_dir, 'playlists', exported, 'playlists')
         return exported
     
+    def stream_playlists(self, limit: int = None) -> int:
+        """
+        Export user's playlists, streamed to disk page by page.
+        
+        Args:
+            limit: Maximum number of playlists to export (all if None)
+            
+        Returns:
+            Number of playlists exported
+        """
+        print(f"📊 Streaming playlists (limit: {limit or 'all'})...")
+        return self._write_records(self.output_dir, 'playlists',
+                                   self.iter_playlists(limit), 'playlists')
+    
+    def iter_playlists(self, limit: int = None) -> Iterator[Dict]:
+        """Yield sanitized playlist records as pages arrive."""
+        for playlist in islice(self.client.iter_user_playlists(), limit):
+            if playlist:
+                yield self._playlist_record(playlist)
+    
     def export_top_artists(self, time_range: str = 'medium_term', limit: int = 20) -> List[Dict]:
         """
         Export user's top artists.
@@ -103,12 +149,20 @@ class SpotifyDataExporter:
             List of artist dictionaries
         """
         print(f"📊 Exporting top artists ({time_range}, limit: {limit})...")
-        artists = self.client.get_user_top_artists(time_range=time_range, limit=limit)
-        
-        # Sanitize data for export
-        exported = []
-        for artist in artists:
-            exported.append({
+        exported = list(self.iter_top_artists(time_range, limit))
+        self._write_records(self.output_dir, f'top_artists_{time_range}', exported, 'artists')
+        return exported
+    
+    def stream_top_artists(self, time_range: str = 'medium_term', limit: int = 20) -> int:
+        """Like export_top_artists, but streamed; returns the number of artists."""
+        print(f"📊 Streaming top artists ({time_range}, limit: {limit})...")
+        return self._write_records(self.output_dir, f'top_artists_{time_range}',
+                                   self.iter_top_artists(time_range, limit), 'artists')
+    
+    def iter_top_artists(self, time_range: str = 'medium_term', limit: int = 20) -> Iterator[Dict]:
+        """Yield sanitized top-artist records."""
+        for artist in self.client.get_top_items("artists", limit=limit, time_range=time_range):
+            yield {
                 'id': artist.get('id'),
                 'name': artist.get('name'),
                 'genres': artist.get('genres', []),
@@ -116,12 +170,7 @@ class SpotifyDataExporter:
                 'followers': artist.get('followers', {}).get('total', 0),
                 'images': artist.get('images', []),
                 'external_urls': artist.get('external_urls', {})
-            })
-        
-        filename = f'top_artists_{time_range}.json'
-        self._save_json(filename, exported)
-        print(f"   ✓ Saved {len(exported)} artists to {self.output_dir}/{filename}")
-        return exported
+            }
     
     def export_top_tracks(self, time_range: str = 'medium_term', limit: int = 20) -> List[Dict]:
         """
@@ -135,34 +184,27 @@ class SpotifyDataExporter:
             List of track dictionaries
         """
         print(f"📊 Exporting top tracks ({time_range}, limit: {limit})...")
-        tracks = self.client.get_user_top_tracks(time_range=time_range, limit=limit)
-        
-        # Sanitize data for export
-        exported = []
-        for track in tracks:
-            exported.append({
-                'id': track.get('id'),
-                'name': track.get('name'),
-                'artists': [{'id': a.get('id'), 'name': a.get('name')} for a in track.get('artists', [])],
-                'album': {
-                    'id': track.get('album', {}).get('id'),
-                    'name': track.get('album', {}).get('name'),
-                    'images': track.get('album', {}).get('images', [])
-                },
-                'duration_ms': track.get('duration_ms'),
-                'popularity': track.get('popularity'),
-                'preview_url': track.get('preview_url'),
-                'external_urls': track.get('external_urls', {})
-            })
-        
-        filename = f'top_tracks_{time_range}.json'
-        self._save_json(filename, exported)
-        print(f"   ✓ Saved {len(exported)} tracks to {self.output_dir}/{filename}")
+        exported = list(self.iter_top_tracks(time_range, limit))
+        self._write_records(self.output_dir, f'top_tracks_{time_range}', exported, 'tracks')
         return exported
     
+    def stream_top_tracks(self, time_range: str = 'medium_term', limit: int = 20) -> int:
+        """Like export_top_tracks, but streamed; returns the number of tracks."""
+        print(f"📊 Streaming top tracks ({time_range}, limit: {limit})...")
+        return self._write_records(self.output_dir, f'top_tracks_{time_range}',
+                                   self.iter_top_tracks(time_range, limit), 'tracks')
+    
+    def iter_top_tracks(self, time_range: str = 'medium_term', limit: int = 20) -> Iterator[Dict]:
+        """Yield sanitized top-track records."""
+        for track in self.client.get_top_items("tracks", limit=limit, time_range=time_range):
+            record = self._track_record(track)
+            record['popularity'] = track.get('popularity')
+            record['preview_url'] = track.get('preview_url')
+            yield record
+    
     def export_playlist_tracks(self, playlist_id: str, playlist_name: Optional[str] = None) -> List[Dict]:
         """
-        Export tracks from a specific playlist.
+        Export every track of a specific playlist.
         
         Args:
             playlist_id: Spotify playlist ID
@@ -172,68 +214,788 @@ class SpotifyDataExporter:
             List of track dictionaries
         """
         print(f"📊 Exporting playlist tracks (ID: {playlist_id})...")
-        tracks = self.client.get_playlist_tracks(playlist_id)
-        
-        # Sanitize data for export
-        exported = []
-        for item in tracks:
-            track = item.get('track', {})
-            if track:
-                exported.append({
-                    'id': track.get('id'),
-                    'name': track.get('name'),
-                    'artists': [{'id': a.get('id'), 'name': a.get('name')} for a in track.get('artists', [])],
-                    'album': {
-                        'id': track.get('album', {}).get('id'),
-                        'name': track.get('album', {}).get('name'),
-                        'images': track.get('album', {}).get('images', [])
-                    },
-                    'duration_ms': track.get('duration_ms'),
-                    'added_at': item.get('added_at'),
-                    'external_urls': track.get('external_urls', {})
-                })
-        
-        filename = f'playlist_{playlist_name or playlist_id}.json'
-        filename = filename.replace(' ', '_').replace('/', '_')
-        self._save_json(filename, exported)
-        print(f"   ✓ Saved {len(exported)} tracks to {self.output_dir}/{filename}")
+        exported = list(self.iter_playlist_tracks(playlist_id))
+        self._write_records(self.output_dir, self._playlist_file_name(playlist_id, playlist_name),
+                            exported, 'tracks')
         return exported
     
-    def export_all(self):
-        """Export all available data."""
+    def stream_playlist_tracks(self, playlist_id: str, playlist_name: Optional[str] = None) -> int:
+        """
+        Export every track of a specific playlist, streamed to disk page by page.
+        
+        Args:
+            playlist_id: Spotify playlist ID
+            playlist_name: Optional name for the output file
+            
+        Returns:
+            Number of tracks exported
+        """
+        print(f"📊 Streaming playlist tracks (ID: {playlist_id})...")
+        return self._write_records(self.output_dir,
+                                   self._playlist_file_name(playlist_id, playlist_name),
+                                   self.iter_playlist_tracks(playlist_id), 'tracks')
+    
+    def iter_playlist_tracks(self, playlist_id: str, offset: int = 0) -> Iterator[Dict]:
+        """Yield sanitized track records for every item of a playlist (from `offset`)."""
+        items = self.client.iter_playlist_tracks(playlist_id, fields=ITEM_FIELDS, offset=offset)
+        for item in items:
+            record = self._item_record(item)
+            if record:
+                yield record
+    
+    @staticmethod
+    def _playlist_file_name(playlist_id: str, playlist_name: Optional[str] = None) -> str:
+        return f'playlist_{playlist_name or playlist_id}'.replace(' ', '_').replace('/', '_')
+    
+    @classmethod
+    def _item_record(cls, item: Dict) -> Optional[Dict]:
+        """Record of a playlist or saved-track item (None if the track is unavailable)."""
+        track = (item or {}).get('track') or {}
+        if not track:
+            return None
+        record = cls._track_record(track)
+        record['added_at'] = item.get('added_at')
+        return record
+    
+    @staticmethod
+    def _playlist_record(playlist: Dict) -> Dict:
+        """Sanitize a playlist for export."""
+        return {
+            'id': playlist.get('id'),
+            'name': playlist.get('name'),
+            'description': playlist.get('description'),
+            'public': playlist.get('public'),
+            'tracks_total': playlist.get('tracks', {}).get('total', 0),
+            'images': playlist.get('images', []),
+            'external_urls': playlist.get('external_urls', {}),
+            'owner': {
+                'id': playlist.get('owner', {}).get('id'),
+                'display_name': playlist.get('owner', {}).get('display_name')
+            }
+        }
+    
+    @staticmethod
+    def _track_record(track: Dict) -> Dict:
+        """Sanitize a track for export."""
+        return {
+            'id': track.get('id'),
+            'name': track.get('name'),
+            'artists': [{'id': a.get('id'), 'name': a.get('name')} for a in track.get('artists', [])],
+            'album': {
+                'id': track.get('album', {}).get('id'),
+                'name': track.get('album', {}).get('name'),
+                'images': track.get('album', {}).get('images', [])
+            },
+            'duration_ms': track.get('duration_ms'),
+            'external_urls': track.get('external_urls', {})
+        }
+    
+    def export_all(self, concurrent: bool = True,
+                   time_ranges: Tuple[str, ...] = TIME_RANGES,
+                   resume: bool = False) -> Dict[str, Any]:
+        """
+        Export all available data.
+        
+        Sections share nothing but the client, so by default they run in
+        parallel and the total time is bounded by the slowest section.
+        Finished sections are checkpointed; with resume=True a failed run
+        continues with the sections it had not finished.
+        
+        Args:
+            concurrent: Run sections in parallel (False runs them in order)
+            time_ranges: Time ranges to export top artists and tracks for
+            resume: Skip sections finished by an interrupted previous run
+            
+        Returns:
+            {"sections": {name: seconds}, "skipped": [...], "total_seconds": wall time,
+             "files": {files/bytes written and skipped}}
+        """
         print("\n" + "=" * 60)
         print("🎵 Spotify Data Export")
         print("=" * 60 + "\n")
         
+        self._checkpoint = ExportCheckpoint(self.output_dir / '.export_checkpoint.json', resume)
+        sections = self._sections(time_ranges)
+        skipped = [name for name, _ in sections if self._checkpoint.done(name) is not None]
+        sections = [section for section in sections if section[0] not in skipped]
+        self.hashes.reset_stats()
+        started = time.perf_counter()
         try:
-            self.export_user_profile()
-            self.export_playlists()
-            self.export_top_artists()
-            self.export_top_tracks()
-            
-            print("\n" + "=" * 60)
-            print("✅ Export complete!")
-            print(f"📁 Files saved to: {self.output_dir.absolute()}")
-            print("=" * 60 + "\n")
+            if concurrent:
+                workers = min(self.max_workers, len(sections))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    timings = list(pool.map(self._timed, sections))
+            else:
+                timings = [self._timed(section) for section in sections]
             
         except Exception as e:
-            print(f"\n❌ Export failed: {str(e)}\n")
+            self._checkpoint.save()
+            self.hashes.save()
+            print(f"\n❌ Export failed: {str(e)}")
+            print("   Run again with resume to continue where it stopped.\n")
+            raise
+        self._checkpoint.remove()
+        self.hashes.save()
+        
+        report = {
+            "sections": dict(timings),
+            "skipped": skipped,
+            "total_seconds": round(time.perf_counter() - started, 3),
+            "files": dict(self.hashes.stats)
+        }
+        
+        print("\n" + "=" * 60)
+        print("✅ Export complete!")
+        for name, seconds in report["sections"].items():
+            print(f"   {name}: {seconds:.2f}s")
+        if skipped:
+            print(f"   (resumed: {len(skipped)} sections already exported)")
+        print(f"   {self._write_summary()}")
+        print(f"⏱  Total: {report['total_seconds']:.2f}s")
+        print(f"📁 Files saved to: {self.output_dir.absolute()}")
+        print("=" * 60 + "\n")
+        return report
+    
+    def export_library(self, max_workers: int = None, incremental: bool = False,
+                       resume: bool = False) -> Dict[str, Any]:
+        """
+        Export the whole library: every playlist with all its items, plus
+        all saved tracks.
+        
+        Playlists are paged and each one's items are fetched as soon as it
+        is listed, up to max_workers at a time, each streamed to its own file
+        under library/playlists/. A manifest describing every file is written
+        last, to library/manifest.json.
+        
+        Incremental exports use library/sync_state.json from the previous
+        run: playlists whose snapshot_id is unchanged are skipped entirely,
+        only saved tracks newer than the newest exported one are read, and
+        the changes are also written to library/deltas/<timestamp>/.
+        
+        Progress is checkpointed per page to library/.checkpoint.json and
+        every file is committed atomically. With resume=True, an interrupted
+        run skips finished playlists and continues partly read ones from
+        their last committed page (playlists whose snapshot_id changed in
+        the meantime start over). Failed playlists keep the checkpoint, so
+        resuming retries just those.
+        
+        Files whose content is unchanged since the last export are left
+        untouched (see ContentHashes).
+        
+        Args:
+            max_workers: Concurrent playlist reads (defaults to the exporter's)
+            incremental: Only fetch what changed since the last export
+            resume: Continue an interrupted export
+            
+        Returns:
+            The manifest, plus "files" with bytes written and skipped
+        """
+        print(f"📊 Exporting library{' (incremental)' if incremental else ''}...")
+        library_dir = self.output_dir / 'library'
+        (library_dir / 'playlists').mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        
+        self._checkpoint = ExportCheckpoint(library_dir / '.checkpoint.json', resume)
+        self.hashes.reset_stats()
+        state = self._load_sync_state(library_dir) if incremental else None
+        previous = state['playlists'] if state else {}
+        delta_dir = None
+        if state:
+            delta_dir = library_dir / 'deltas' / datetime.now().strftime('%Y%m%dT%H%M%S.%f')
+            delta_dir.mkdir(parents=True, exist_ok=True)
+        
+        workers = max(1, max_workers or self.max_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+                if state:
+                    saved = pool.submit(self._export_new_saved_tracks, library_dir,
+                                        state['saved_tracks'], delta_dir)
+                else:
+                    saved = pool.submit(self._export_saved_tracks, library_dir)
+                entries = []
+                with self._open_writer(library_dir, 'playlists') as writer:
+                    for playlist in self.client.iter_user_playlists():
+                        if not playlist or not playlist.get('id'):
+                            continue
+                        writer.write(self._playlist_record(playlist))
+                        old = previous.get(playlist['id'])
+                        entries.append((playlist, old, pool.submit(
+                            self._export_playlist, library_dir, playlist, old
+                        )))
+                
+                playlists = []
+                changes = {'added': [], 'updated': [], 'unchanged': 0, 'removed': []}
+                for playlist, old, future in entries:
+                    entry = {
+                        'id': playlist['id'],
+                        'name': playlist.get('name'),
+                        'snapshot_id': playlist.get('snapshot_id')
+                    }
+                    if (old and 'error' not in old
+                            and old.get('snapshot_id') == playlist.get('snapshot_id')):
+                        changes['unchanged'] += 1
+                    elif old:
+                        changes['updated'].append(playlist['id'])
+                    else:
+                        changes['added'].append(playlist['id'])
+                    try:
+                        entry.update(future.result())
+                    except Exception as e:
+                        entry['error'] = f"{type(e).__name__}: {e}"
+                        # The previous file is still in place; keep track of it
+                        if old and old.get('file'):
+                            entry.update(file=old['file'], count=old.get('count', 0))
+                    playlists.append(entry)
+                saved_tracks = saved.result()
+        except Exception:
+            # Keep the progress so far for a resumed run
+            self._checkpoint.save()
+            self.hashes.save()
             raise
+        
+        # Playlists no longer listed (deleted or unfollowed)
+        listed = {p['id'] for p in playlists}
+        for playlist_id, old in previous.items():
+            if playlist_id not in listed:
+                changes['removed'].append(playlist_id)
+                # Failed entries of older sync states have no file
+                file = old.get('file') or f"playlists/{playlist_id}{writer.extension}"
+                path = library_dir / file
+                path.unlink(missing_ok=True)
+                self.hashes.forget(path)
+        
+        failed = [p for p in playlists if 'error' in p]
+        if failed:
+            self._checkpoint.save()
+        else:
+            self._checkpoint.remove()
+        manifest = {
+            'exported_at': self._get_timestamp(),
+            'format': self.format,
+            'playlists': {'file': f'playlists{writer.extension}', 'count': len(playlists),
+                          'failed': len(failed), 'items': playlists},
+            'saved_tracks': {'file': saved_tracks['file'], 'count': saved_tracks['count']},
+            'tracks_total': saved_tracks['count'] + sum(p.get('count', 0) for p in playlists),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        if state:
+            changes['new_saved_tracks'] = saved_tracks['new']
+            changes['removed_saved_tracks'] = saved_tracks['removed']
+            manifest['changes'] = changes
+            self._save_json(str((delta_dir / 'changes.json').relative_to(self.output_dir)),
+                            dict(changes, exported_at=manifest['exported_at']))
+        
+        self._save_json('library/sync_state.json', {
+            'format': self.format,
+            'playlists': {p['id']: p for p in playlists},
+            'saved_tracks': saved_tracks
+        })
+        self._save_json('library/manifest.json', manifest)
+        self.hashes.save()
+        
+        if state:
+            print(f"   ✓ {len(changes['added'])} new, {len(changes['updated'])} changed, "
+                  f"{changes['unchanged']} unchanged, {len(changes['removed'])} removed "
+                  f"playlists; {saved_tracks['new']} new, "
+                  f"{len(saved_tracks['removed'])} removed saved tracks "
+                  f"in {manifest['seconds']:.1f}s")
+        else:
+            print(f"   ✓ Saved {len(playlists)} playlists ({len(failed)} failed) and "
+                  f"{saved_tracks['count']} saved tracks to {library_dir} "
+                  f"in {manifest['seconds']:.1f}s")
+        print(f"   ✓ {self._write_summary()}")
+        return dict(manifest, files=dict(self.hashes.stats))
+    
+    def export_library_columnar(self, max_workers: int = None, compression: str = "zstd",
+                                row_group_size: int = 50000) -> Dict[str, Any]:
+        """
+        Export the whole library as normalized Parquet tables for analytics.
+        
+        Writes playlists, playlist_items, saved_tracks, tracks, track_artists,
+        albums and artists to library_parquet/<table>.parquet, joined by
+        Spotify IDs. Playlist items are read concurrently as in
+        export_library and streamed into row groups. Requires pyarrow.
+        
+        Args:
+            max_workers: Concurrent playlist reads (defaults to the exporter's)
+            compression: "zstd", "snappy", "gzip" or "none"
+            row_group_size: Rows per Parquet row group
+            
+        Returns:
+            Manifest with row counts per table
+        """
+        from export_columnar import ColumnarLibraryWriter, ITEM_FIELDS as COLUMNAR_FIELDS
+        
+        print("📊 Exporting library (Parquet)...")
+        directory = self.output_dir / 'library_parquet'
+        started = time.perf_counter()
+        failed = {}
+        
+        def read_playlist(playlist_id: str) -> int:
+            # Read fully before writing, so a failed read leaves no partial rows
+            items = list(self.client.iter_playlist_tracks(playlist_id, fields=COLUMNAR_FIELDS))
+            return writer.add_playlist_items(playlist_id, items)
+        
+        workers = max(1, max_workers or self.max_workers)
+        with ColumnarLibraryWriter(directory, compression, row_group_size) as writer:
+            with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+                saved = pool.submit(writer.add_saved_tracks, self.client.iter_saved_tracks())
+                pending = []
+                for playlist in self.client.iter_user_playlists():
+                    if not playlist or not playlist.get('id'):
+                        continue
+                    writer.add_playlist(playlist)
+                    pending.append((playlist['id'], pool.submit(read_playlist, playlist['id'])))
+                for playlist_id, future in pending:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed[playlist_id] = f"{type(e).__name__}: {e}"
+                saved.result()
+        
+        manifest = {
+            'exported_at': self._get_timestamp(),
+            'format': 'parquet',
+            'compression': compression,
+            'tables': {table: {'file': f'{table}.parquet', 'rows': rows}
+                       for table, rows in writer.rows.items()},
+            'failed_playlists': failed,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        self._save_json('library_parquet/manifest.json', manifest)
+        self.hashes.save()
+        print(f"   ✓ Saved {writer.rows['playlists']} playlists, "
+              f"{writer.rows['tracks']} unique tracks to {directory} "
+              f"in {manifest['seconds']:.1f}s")
+        return manifest
+    
+    def export_web_bundle(self, chunk_size: int = 500, compression: Tuple[str, ...] = ("gzip",),
+                          max_workers: int = None, max_prefix: int = 4) -> Dict[str, Any]:
+        """
+        Export playlists, their items, saved tracks and top items as a
+        sharded web bundle that front-ends load page by page.
+        
+        Collections are split into chunks of chunk_size records under web/,
+        described by a small web/index.json, with precompressed copies and
+        prefix search shards (see export_bundle). Playlist items are read
+        concurrently as in export_library; only changed chunks are rewritten.
+        
+        Args:
+            chunk_size: Records per chunk file
+            compression: Precompressed copies: "gzip" and/or "br" (needs brotli)
+            max_workers: Concurrent playlist reads (defaults to the exporter's)
+            max_prefix: Longest word prefix indexed for search
+            
+        Returns:
+            The index, plus failed playlists, files written/skipped and seconds
+        """
+        from export_bundle import WebBundleWriter, track_label
+        
+        print("📊 Exporting web bundle...")
+        directory = self.output_dir / 'web'
+        started = time.perf_counter()
+        self.hashes.reset_stats()
+        failed = {}
+        
+        def name_label(record: Dict) -> Optional[str]:
+            return record.get('name')
+        
+        def read_playlist(playlist_id: str) -> int:
+            # Read fully before writing, so a failed read leaves the old chunks alone
+            records = list(self.iter_playlist_tracks(playlist_id))
+            return bundle.add_collection(f'playlist_tracks/{playlist_id}', records, track_label)
+        
+        workers = max(1, max_workers or self.max_workers)
+        bundle = WebBundleWriter(directory, chunk_size, compression, max_prefix, hashes=self.hashes)
+        with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+            pending = []
+            
+            def listed() -> Iterator[Dict]:
+                for playlist in self.client.iter_user_playlists():
+                    if playlist and playlist.get('id'):
+                        pending.append((playlist['id'], pool.submit(read_playlist, playlist['id'])))
+                        yield self._playlist_record(playlist)
+            
+            saved = pool.submit(bundle.add_collection, 'saved_tracks',
+                                self.iter_saved_tracks(), track_label)
+            bundle.add_collection('playlists', listed(), name_label)
+            for time_range in TIME_RANGES:
+                bundle.add_collection(f'top_artists_{time_range}',
+                                      self.iter_top_artists(time_range), name_label)
+                bundle.add_collection(f'top_tracks_{time_range}',
+                                      self.iter_top_tracks(time_range), track_label)
+            for playlist_id, future in pending:
+                try:
+                    future.result()
+                except Exception as e:
+                    failed[playlist_id] = f"{type(e).__name__}: {e}"
+                    # Serve the previous export of this playlist until it reads again
+                    bundle.keep(f'playlist_tracks/{playlist_id}')
+            saved.result()
+        index = bundle.close()
+        self.hashes.save()
+        seconds = round(time.perf_counter() - started, 3)
+        print(f"   ✓ Saved {len(index['collections'])} collections in chunks of {chunk_size} "
+              f"({len(failed)} failed playlists) to {directory} in {seconds:.1f}s")
+        print(f"   ✓ {self._write_summary()}")
+        return dict(index, failed_playlists=failed, files=dict(self.hashes.stats),
+                    seconds=seconds)
+    
+    def export_assets(self, size: int = 300, max_workers: int = None,
+                      session: requests.Session = None) -> Dict[str, Any]:
+        """
+        Download the images referenced by exported records and rewrite the
+        records to use the local copies.
+        
+        Covers the user profile and every record file (JSON, NDJSON or
+        MessagePack) in the export directory and under library/. One image
+        per `images` list is kept: the smallest at least `size` pixels wide.
+        Images are fetched concurrently, once per URL, stored by content
+        hash under assets/, and not fetched again by later runs.
+        
+        Args:
+            size: Preferred image width in pixels (Spotify offers 640, 300 and 64)
+            max_workers: Concurrent downloads (defaults to the exporter's)
+            session: HTTP session for the downloads (e.g. pointed at a test server)
+            
+        Returns:
+            Download statistics, failed URLs, and files written/skipped
+        """
+        from export_assets import AssetDownloader
+        
+        print(f"📊 Downloading images ({size}px)...")
+        started = time.perf_counter()
+        self.hashes.reset_stats()
+        downloader = AssetDownloader(self.output_dir / 'assets', size,
+                                     max_workers or self.max_workers, session)
+        profile_path = self.output_dir / 'user_profile.json'
+        profile = None
+        if profile_path.exists():
+            with open(profile_path, 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+        files = self._record_files()
+        
+        def urls() -> Iterator[str]:
+            yield from downloader.image_urls(profile)
+            for path in files:
+                for record in read_records(path):
+                    yield from downloader.image_urls(record)
+        
+        stats = downloader.download(urls())
+        if profile:
+            self._save_json('user_profile.json', downloader.localize(profile))
+        for path in files:
+            with open_writer(path.parent, path.stem, EXTENSIONS[path.suffix],
+                             hashes=self.hashes) as writer:
+                writer.write_all(downloader.localize(record) for record in read_records(path))
+        self.hashes.save()
+        
+        seconds = round(time.perf_counter() - started, 3)
+        print(f"   ✓ {stats['downloaded']} images downloaded "
+              f"({stats['bytes_downloaded'] / 1e6:.2f} MB), {stats['cached']} already stored, "
+              f"{stats['duplicates']} duplicates, {stats['failed']} failed in {seconds:.1f}s")
+        print(f"   ✓ {self._write_summary()}")
+        return dict(stats, failed_urls=downloader.failed, files=dict(self.hashes.stats),
+                    seconds=seconds)
+    
+    def iter_saved_tracks(self, offset: int = 0) -> Iterator[Dict]:
+        """Yield sanitized records for every saved track, newest first (from `offset`)."""
+        for item in self.client.iter_saved_tracks(offset=offset):
+            record = self._item_record(item)
+            if record:
+                yield record
+    
+    def _export_saved_tracks(self, library_dir: Path) -> Dict[str, Any]:
+        """Export every saved track and note the newest ones for the next sync."""
+        done = self._checkpoint.done('saved_tracks')
+        if done and (library_dir / done['file']).exists():
+            return done
+        newest = {'newest_added_at': None, 'newest_ids': []}
+        
+        def tracked(records):
+            seen = set()
+            for record in records:
+                # Tracks saved while a resumed read was paused shift the
+                # pages, so the same track can be read twice
+                if record['id'] in seen:
+                    continue
+                seen.add(record['id'])
+                if newest['newest_added_at'] is None:
+                    newest['newest_added_at'] = record['added_at']
+                if record['added_at'] == newest['newest_added_at']:
+                    newest['newest_ids'].append(record['id'])
+                yield record
+        
+        result = self._export_stream(library_dir / 'saved_tracks', 'saved_tracks',
+                                     lambda offset: self.client.iter_saved_tracks(offset=offset),
+                                     SAVED_PAGE, finish=tracked)
+        result = dict(result, new=result['count'], removed=[], **newest)
+        self._checkpoint.mark_done('saved_tracks', result)
+        return result
+    
+    def _export_new_saved_tracks(self, library_dir: Path, state: Dict[str, Any],
+                                 delta_dir: Path) -> Dict[str, Any]:
+        """
+        Read saved tracks newer than the last export (newest first, stopping
+        at the first known one), write them as a delta and merge them into
+        the consolidated file.
+        
+        The first page's total tells whether anything else changed: if it
+        is not the previous item count plus the new items, tracks were
+        un-saved, and all saved tracks are read again to find them.
+        """
+        newest = state.get('newest_added_at')
+        known = set(state.get('newest_ids', []))
+        page = self.client.get_saved_tracks_page(limit=SAVED_PAGE)
+        
+        def items():
+            yield from page.get('items', [])
+            if len(page.get('items', [])) == SAVED_PAGE:
+                yield from self.client.iter_saved_tracks(offset=SAVED_PAGE)
+        
+        new, read = [], 0
+        for item in items():
+            record = self._item_record(item)
+            if record:
+                added_at = record.get('added_at') or ''
+                if newest and (added_at < newest or (added_at == newest and record['id'] in known)):
+                    break
+                new.append(record)
+            read += 1
+        
+        if state.get('items') is None or page.get('total') != state['items'] + read:
+            return self._export_changed_saved_tracks(library_dir, state, delta_dir)
+        
+        with self._open_writer(delta_dir, 'saved_tracks') as writer:
+            writer.write_all(new)
+        if not new:
+            return dict(state, new=0, removed=[])
+        
+        # Re-saved tracks move to the top, so their old records are dropped;
+        # the writer only replaces the consolidated file once it is complete
+        new_ids = {r['id'] for r in new}
+        with self._open_writer(library_dir, 'saved_tracks') as writer:
+            writer.write_all(new)
+            writer.write_all(r for r in read_records(library_dir / state['file'])
+                             if r['id'] not in new_ids)
+        
+        newest_ids = [r['id'] for r in new if r['added_at'] == new[0]['added_at']]
+        if new[0]['added_at'] == newest:
+            newest_ids += list(known)
+        return dict(state, count=writer.count, items=state['items'] + read, new=len(new),
+                    removed=[], newest_added_at=new[0]['added_at'], newest_ids=newest_ids)
+    
+    def _export_changed_saved_tracks(self, library_dir: Path, state: Dict[str, Any],
+                                     delta_dir: Path) -> Dict[str, Any]:
+        """Re-read all saved tracks and diff them against the previous export."""
+        old_ids = {r['id'] for r in read_records(library_dir / state['file'])}
+        result = self._export_saved_tracks(library_dir)
+        ids = set()
+        with self._open_writer(delta_dir, 'saved_tracks') as writer:
+            for record in read_records(library_dir / result['file']):
+                ids.add(record['id'])
+                if record['id'] not in old_ids:
+                    writer.write(record)
+        return dict(result, new=writer.count, removed=sorted(old_ids - ids))
+    
+    def _load_sync_state(self, library_dir: Path) -> Optional[Dict[str, Any]]:
+        """The previous export's sync state, if it is usable for an incremental run."""
+        path = library_dir / 'sync_state.json'
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        # A format switch, or a lost saved-tracks file, needs a full export
+        saved = state.get('saved_tracks') or {}
+        if (state.get('format') != self.format or not saved.get('file')
+                or not (library_dir / saved['file']).exists()):
+            return None
+        return state
+    
+    def _export_playlist(self, library_dir: Path, playlist: Dict,
+                         previous: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Export one playlist's items unless an up-to-date file already exists."""
+        playlist_id, snapshot_id = playlist['id'], playlist.get('snapshot_id')
+        for known in (previous, self._checkpoint.done(f"playlist:{playlist_id}")):
+            if (known and 'error' not in known and known.get('snapshot_id') == snapshot_id
+                    and (library_dir / known['file']).exists()):
+                return {'file': known['file'], 'count': known['count']}
+        
+        result = self._export_stream(
+            library_dir / 'playlists' / playlist_id, f"playlist:{playlist_id}",
+            lambda offset: self.client.iter_playlist_tracks(playlist_id, fields=ITEM_FIELDS,
+                                                            offset=offset),
+            PLAYLIST_PAGE, version=snapshot_id
+        )
+        result = {'file': result['file'], 'count': result['count']}
+        self._checkpoint.mark_done(f"playlist:{playlist_id}", dict(result, snapshot_id=snapshot_id))
+        return result
+    
+    def _export_stream(self, path: Path, key: str, fetch: Callable[[int], Iterator[Dict]],
+                       page_size: int, version: str = None,
+                       finish: Callable[[Iterator[Dict]], Iterator[Dict]] = None) -> Dict[str, Any]:
+        """
+        Export one paged read resumably.
+        
+        Records are appended to a part file, one per line, and committed to the
+        checkpoint after every page; a resumed run truncates the part file
+        to the last committed page and reads on from there (unless `version`
+        changed). Once complete, the part file is rewritten atomically in
+        the export format, through `finish` if given.
+        
+        The API offset counts raw items, including unavailable tracks that
+        produce no record, so it is checkpointed separately from the number
+        of records written.
+        
+        Args:
+            path: Output file without extension
+            key: Checkpoint key of this read
+            fetch: Returns the raw API items starting at an offset
+            page_size: Items per API page
+            version: Invalidates saved progress when it changes (snapshot_id)
+        """
+        # The part file holds records already encoded for the final format,
+        # so finishing it is a line copy unless `finish` needs the records
+        # (binary formats stage NDJSON lines and pack them when finishing)
+        encode = writer_class(self.format).encode
+        part = path.with_name(path.name + '.part')
+        progress = self._checkpoint.stream(key)
+        if not (progress and progress.get('version') == version and 'offset' in progress
+                and part.exists()):
+            progress = {'version': version, 'offset': 0, 'count': 0, 'bytes': 0}
+        
+        with open(part, 'r+b' if progress['bytes'] else 'wb') as f:
+            f.truncate(progress['bytes'])
+            f.seek(progress['bytes'])
+            offset, count = progress['offset'], progress['count']
+            for item in fetch(offset):
+                offset += 1
+                record = self._item_record(item)
+                if record:
+                    f.write(encode(record).encode('utf-8'))
+                    f.write(b'\n')
+                    count += 1
+                if offset % page_size == 0:
+                    f.flush()
+                    self._checkpoint.update_stream(key, version=version, offset=offset,
+                                                   count=count, bytes=f.tell())
+        
+        with self._open_writer(path.parent, path.name) as writer:
+            if finish:
+                writer.write_all(finish(read_records(part)))
+            else:
+                with open(part, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        writer.write_encoded(line.rstrip('\n'))
+        part.unlink()
+        return {'file': str(writer.path.relative_to(self.output_dir / 'library')),
+                'count': writer.count, 'items': offset}
+    
+    def _sections(self, time_ranges: Tuple[str, ...]) -> List[Tuple[str, Callable[[], Any]]]:
+        """Independent export steps as (name, callable) pairs."""
+        sections = [
+            ("user_profile", self.export_user_profile),
+            ("playlists", self.stream_playlists),
+        ]
+        for time_range in time_ranges:
+            sections.append((f"top_artists_{time_range}",
+                             lambda r=time_range: self.stream_top_artists(time_range=r)))
+            sections.append((f"top_tracks_{time_range}",
+                             lambda r=time_range: self.stream_top_tracks(time_range=r)))
+        return sections
+    
+    def _timed(self, section: Tuple[str, Callable[[], Any]]) -> Tuple[str, float]:
+        """Run one section, checkpoint it, and return its name and wall time."""
+        name, export = section
+        started = time.perf_counter()
+        export()
+        self._checkpoint.mark_done(name, {})
+        return name, round(time.perf_counter() - started, 3)
+    
+    def _record_files(self) -> List[Path]:
+        """Exported record files: the top-level exports and everything under library/."""
+        candidates = list(self.output_dir.glob('*')) + list((self.output_dir / 'library').rglob('*'))
+        files = []
+        for path in sorted(candidates):
+            if not path.is_file() or path.suffix not in EXTENSIONS:
+                continue
+            if path.suffix == '.json':
+                # Manifests and the profile are single objects, record files arrays
+                with open(path, 'r', encoding='utf-8') as f:
+                    if f.read(1) != '[':
+                        continue
+            files.append(path)
+        return files
+    
+    def _open_writer(self, directory: Path, name: str) -> RecordWriter:
+        """Open a writer in the export format that skips unchanged files."""
+        return open_writer(directory, name, self.format, hashes=self.hashes)
+    
+    def _write_records(self, directory: Path, name: str, records: Iterable[Dict],
+                       noun: str) -> int:
+        """Write records to one export file; returns how many were written."""
+        with self._open_writer(directory, name) as writer:
+            count = writer.write_all(records)
+            print(f"   ✓ Saved {count} {noun} to {writer.path}")
+        return count
     
     def _save_json(self, filename: str, data: any):
-        """Save data as JSON file."""
+        """
+        Save data as JSON file (atomically, with sorted keys).
+        
+        Skipped when the file already holds the same data; volatile fields
+        such as exported_at do not count as a change.
+        """
         filepath = self.output_dir / filename
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        digest = canonical_hash(data)
+        if self.hashes.is_current(filepath, digest):
+            self.hashes.skip(filepath)
+            return
+        tmp_path = filepath.with_suffix(filepath.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+        self.hashes.commit(tmp_path, filepath, digest)
+    
+    def _write_summary(self) -> str:
+        """Files and bytes written vs skipped as unchanged, for progress output."""
+        stats = self.hashes.stats
+        return (f"Wrote {stats['files_written']} files ({stats['bytes_written'] / 1e6:.2f} MB), "
+                f"skipped {stats['files_skipped']} unchanged "
+                f"({stats['bytes_skipped'] / 1e6:.2f} MB)")
     
     def _get_timestamp(self) -> str:
         """Get current timestamp."""
-        from datetime import datetime
         return datetime.now().isoformat()
 
 
-def main():
+def main(argv: List[str] = None) -> int:
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Export Spotify data for offline use")
+    parser.add_argument("--output", default="exported_data", help="Output directory")
+    parser.add_argument("--format", choices=FORMATS, default="json",
+                        help="json (one array per file), ndjson (one record per line) "
+                             "or msgpack (compact binary, requires msgpack)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests")
+    parser.add_argument("--library", action="store_true",
+                        help="Export every playlist with all its items and all saved tracks")
+    parser.add_argument("--incremental", action="store_true",
+                        help="With --library: only fetch what changed since the last export")
+    parser.add_argument("--parquet", action="store_true",
+                        help="Export the library as Parquet tables (requires pyarrow)")
+    parser.add_argument("--web", action="store_true",
+                        help="Export a chunked, searchable bundle for web apps (web/)")
+    parser.add_argument("--chunk-size", type=int, default=500,
+                        help="With --web: records per chunk file")
+    parser.add_argument("--compress", nargs="*", choices=["gzip", "br"], default=["gzip"],
+                        help="With --web: precompressed copies to write (br needs brotli)")
+    parser.add_argument("--assets", action="store_true",
+                        help="Then download referenced images and point records at them")
+    parser.add_argument("--image-size", type=int, default=300,
+                        help="With --assets: preferred image width in pixels")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted export from its checkpoint")
+    args = parser.parse_args(argv)
+    
     # Validate credentials first
     validation = validate_credentials()
     
@@ -247,12 +1009,28 @@ def main():
     
     # Export data
     try:
-        exporter = SpotifyDataExporter()
-        exporter.export_all()
+        exporter = SpotifyDataExporter(args.output, max_workers=args.workers,
+                                       format=args.format)
+        if args.parquet:
+            exporter.export_library_columnar()
+            return 0
+        if args.web:
+            index = exporter.export_web_bundle(args.chunk_size, tuple(args.compress))
+            return 2 if index['failed_playlists'] else 0
+        if args.library:
+            manifest = exporter.export_library(incremental=args.incremental,
+                                               resume=args.resume)
+            if args.assets:
+                exporter.export_assets(size=args.image_size)
+            return 2 if manifest['playlists']['failed'] else 0
+        exporter.export_all(resume=args.resume)
+        if args.assets:
+            exporter.export_assets(size=args.image_size)
         
         print("💡 Usage in React/Web apps:")
-        print("   import userData from './exported_data/user_profile.json';")
-        print("   import playlists from './exported_data/playlists.json';")
+        print(f"   import userData from './{args.output}/user_profile.json';")
+        if args.format == "json":
+            print(f"   import playlists from './{args.output}/playlists.json';")
         print()
         
         return 0
@@ -0,0 +1,344 @@
+"""
+Streaming record writers for data exports.
+
+Records are serialized one at a time as they arrive, so memory stays flat
+however large the export is:
+- NDJSON: one JSON object per line (easy to stream back in)
+- JSON: a single array, written incrementally (importable as-is by web apps)
+- MessagePack: compact binary with a string table (export_binary, needs msgpack)
+
+Files are written under a temporary name and renamed into place on close,
+so a crash never leaves a half-written export behind. With a ContentHashes
+registry, a file whose content hash is unchanged is not replaced at all, so
+its mtime stays put and file watchers see no change.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Type
+
+
+class RecordWriter:
+    """Base class: write records to a file one at a time."""
+
+    extension = ""
+    binary = False
+
+    def __init__(self, path: str, hashes: "ContentHashes" = None):
+        """
+        Open a writer.
+
+        Args:
+            path: Output file (replaced when the writer closes)
+            hashes: Registry used to leave unchanged files untouched
+        """
+        self.path = Path(path)
+        self.count = 0
+        self.hashes = hashes
+        self._digest = hashlib.sha256()
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        if self.binary:
+            self._file = open(self._tmp_path, 'wb')
+        else:
+            self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        self._start()
+
+    @staticmethod
+    def encode(record: Dict[str, Any]) -> str:
+        """One record as a single line of JSON (no newline)."""
+        raise NotImplementedError
+
+    def write(self, record: Dict[str, Any]):
+        """Serialize one record."""
+        self.write_encoded(self.encode(record))
+
+    def write_encoded(self, line: str):
+        """Write a record already serialized by encode()."""
+        raise NotImplementedError
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Write every record from an iterable; returns how many were written."""
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        """Finish the file and atomically move it into place (if it changed)."""
+        if not self._file.closed:
+            self._finish()
+            self._file.close()
+            if self.hashes:
+                self.hashes.commit(self._tmp_path, self.path, self._digest.hexdigest())
+            else:
+                os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard everything written; any previous file stays untouched."""
+        if not self._file.closed:
+            self._file.close()
+            self._tmp_path.unlink(missing_ok=True)
+
+    def _emit(self, text: str):
+        """Write text to the file and the content hash."""
+        self._file.write(text)
+        self._digest.update(text.encode('utf-8'))
+
+    def _start(self):
+        pass
+
+    def _finish(self):
+        pass
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class NDJSONWriter(RecordWriter):
+    """Newline-delimited JSON: one record per line."""
+
+    extension = ".ndjson"
+
+    @staticmethod
+    def encode(record: Dict[str, Any]) -> str:
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+    def write_encoded(self, line: str):
+        self._emit(line)
+        self._emit("\n")
+        self.count += 1
+
+
+class JSONArrayWriter(RecordWriter):
+    """A JSON array written element by element, one record per line."""
+
+    extension = ".json"
+
+    @staticmethod
+    def encode(record: Dict[str, Any]) -> str:
+        return json.dumps(record, ensure_ascii=False, sort_keys=True)
+
+    def write_encoded(self, line: str):
+        self._emit(",\n" if self.count else "\n")
+        self._emit(line)
+        self.count += 1
+
+    def _start(self):
+        self._emit("[")
+
+    def _finish(self):
+        self._emit("\n]\n")
+
+
+WRITERS = {
+    "json": JSONArrayWriter,
+    "ndjson": NDJSONWriter,
+}
+
+# Every export format, including those whose writers need optional packages
+FORMATS = ("json", "ndjson", "msgpack")
+# Export format by file extension
+EXTENSIONS = {".json": "json", ".ndjson": "ndjson", ".msgpack": "msgpack"}
+
+
+def writer_class(format: str) -> Type[RecordWriter]:
+    """Writer of an export format (msgpack is imported on first use)."""
+    if format == "msgpack":
+        from export_binary import MessagePackWriter
+        return MessagePackWriter
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format: {format}. Use {list(FORMATS)}")
+    return WRITERS[format]
+
+
+def open_writer(output_dir: Path, name: str, format: str = "json",
+                hashes: "ContentHashes" = None) -> RecordWriter:
+    """
+    Open a writer for `name` in `output_dir`, e.g. ("out", "playlists", "ndjson")
+    writes out/playlists.ndjson.
+    """
+    writer = writer_class(format)
+    return writer(Path(output_dir) / f"{name}{writer.extension}", hashes)
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records back from a file written by one of the writers above.
+
+    JSON and NDJSON hold one record per line and MessagePack files are
+    memory-mapped, so none is loaded whole.
+    """
+    path = Path(path)
+    if path.suffix == ".msgpack":
+        from export_binary import read_msgpack_records
+        yield from read_msgpack_records(path)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if path.suffix == JSONArrayWriter.extension:
+                line = line.rstrip(",")
+                if line in ("[", "]"):
+                    continue
+            if line:
+                yield json.loads(line)
+
+
+class ExportCheckpoint:
+    """
+    Progress of a long export, so an interrupted run can resume.
+
+    Tracks finished sections (e.g. one playlist's file) and, for streams
+    still being read, how many records and bytes of their part file are
+    committed. Saved atomically, at most every `interval` seconds unless
+    forced.
+    """
+
+    def __init__(self, path: str, resume: bool = False, interval: float = 2.0):
+        """
+        Args:
+            path: Checkpoint file
+            resume: Load an existing checkpoint (otherwise start afresh)
+            interval: Minimum seconds between unforced saves
+        """
+        self.path = Path(path)
+        self.interval = interval
+        self.data: Dict[str, Dict[str, Any]] = {"done": {}, "streams": {}}
+        if resume and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data.update(json.load(f))
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    def done(self, key: str) -> Optional[Dict[str, Any]]:
+        """Result recorded for a finished section, if any."""
+        return self.data["done"].get(key)
+
+    def mark_done(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self.data["done"][key] = result
+            self.data["streams"].pop(key, None)
+        self.save(force=False)
+
+    def stream(self, key: str) -> Optional[Dict[str, Any]]:
+        """Committed progress of an unfinished stream, if any."""
+        return self.data["streams"].get(key)
+
+    def update_stream(self, key: str, **progress):
+        with self._lock:
+            self.data["streams"][key] = progress
+        self.save(force=False)
+
+    def save(self, force: bool = True):
+        with self._lock:
+            if not force and time.monotonic() - self._saved_at < self.interval:
+                return
+            self._saved_at = time.monotonic()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        self.path.unlink(missing_ok=True)
+
+
+# Keys that change on every run without the data changing
+VOLATILE_FIELDS = frozenset({"exported_at", "seconds"})
+
+
+def canonical_hash(data: Any) -> str:
+    """SHA-256 of data as sorted-key JSON, ignoring VOLATILE_FIELDS at any depth."""
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+        if isinstance(value, list):
+            return [strip(v) for v in value]
+        return value
+    encoded = json.dumps(strip(data), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ContentHashes:
+    """
+    Content hashes of exported files, kept in a sidecar manifest.
+
+    A finished file only replaces its target when its hash differs from
+    the recorded one (or the target is missing or was edited); otherwise
+    the new copy is discarded. Counts bytes and files written vs skipped.
+    """
+
+    def __init__(self, root: str, manifest_name: str = ".export_hashes.json"):
+        """
+        Args:
+            root: Export directory (manifest keys are paths relative to it)
+            manifest_name: Sidecar manifest file inside root
+        """
+        self.root = Path(root)
+        self.path = self.root / manifest_name
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"files_written": 0, "bytes_written": 0,
+                      "files_skipped": 0, "bytes_skipped": 0}
+
+    def is_current(self, path: Path, digest: str) -> bool:
+        """Whether `path` already holds content with this hash."""
+        entry = self.entries.get(self._key(path))
+        return bool(entry and entry["sha256"] == digest and path.exists()
+                    and path.stat().st_size == entry["bytes"])
+
+    def skip(self, path: Path):
+        """Count an unchanged file that was not rewritten."""
+        with self._lock:
+            self.stats["files_skipped"] += 1
+            self.stats["bytes_skipped"] += path.stat().st_size
+
+    def commit(self, tmp_path: Path, path: Path, digest: str) -> bool:
+        """
+        Move a finished temporary file into place unless unchanged.
+
+        Returns:
+            True if the file was written, False if it was skipped
+        """
+        if self.is_current(path, digest):
+            tmp_path.unlink()
+            self.skip(path)
+            return False
+        size = tmp_path.stat().st_size
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.entries[self._key(path)] = {"sha256": digest, "bytes": size}
+            self.stats["files_written"] += 1
+            self.stats["bytes_written"] += size
+        return True
+
+    def forget(self, path: Path):
+        """Drop the entry of a deleted file."""
+        with self._lock:
+            self.entries.pop(self._key(path), None)
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, sort_keys=True, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+
+    def _key(self, path: Path) -> str:
+        return Path(path).resolve().relative_to(self.root.resolve()).as_posix()
@@ -0,0 +1,306 @@
+"""
+Spotify Library Genre Index
+
+Genres only exist on artist objects, so this keeps a local index of the
+user's saved tracks and their artists' genres:
+- Artists are fetched in batches of 50, concurrently, only when new or stale
+- Saved tracks refresh incrementally (newest first, stopping at known ones)
+- Stored compactly as genre -> artist-number posting lists
+- Boolean queries such as '(jazz OR soul) AND NOT smooth' run locally
+"""
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from spotify_client import SpotifyClient
+
+
+TOKEN_PATTERN = re.compile(r'\s*(\(|\)|"[^"]*"|[^\s()"]+)')
+OPERATORS = ("AND", "OR", "NOT")
+
+
+class GenreQueryError(ValueError):
+    """Raised for malformed genre query expressions."""
+    pass
+
+
+def parse_genre_query(query: str):
+    """
+    Parse a boolean genre query into a tree.
+
+    Operators are upper-case AND, OR, NOT with parentheses; adjacent words
+    form one genre phrase ("drum and bass" is a phrase, "jazz AND soul" is
+    not). A bare phrase matches every genre containing it as whole words
+    ("jazz" matches "smooth jazz"); a quoted phrase matches one genre exactly.
+
+    Returns:
+        Nested tuples: ("or", a, b), ("and", a, b), ("not", a),
+        ("word", phrase) or ("exact", genre)
+    """
+    tokens = TOKEN_PATTERN.findall(query or "")
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        node = parse_and()
+        while peek() == "OR":
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() is not None and peek() not in ("OR", ")"):
+            if peek() == "AND":
+                take()
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        return parse_primary()
+
+    def parse_primary():
+        token = peek()
+        if token is None:
+            raise GenreQueryError(f"Unexpected end of query: {query!r}")
+        if token == "(":
+            take()
+            node = parse_or()
+            if peek() != ")":
+                raise GenreQueryError(f"Missing ')' in query: {query!r}")
+            take()
+            return node
+        if token == ")" or token in OPERATORS:
+            raise GenreQueryError(f"Unexpected {token!r} in query: {query!r}")
+        if token.startswith('"'):
+            return ("exact", take().strip('"').strip().lower())
+
+        words = []
+        while peek() is not None and peek() not in OPERATORS + ("(", ")") \
+                and not peek().startswith('"'):
+            words.append(take().lower())
+        return ("word", " ".join(words))
+
+    tree = parse_or()
+    if peek() is not None:
+        raise GenreQueryError(f"Unexpected {peek()!r} in query: {query!r}")
+    return tree
+
+
+class GenreIndex:
+    """Genre posting lists over the artists of the user's saved tracks."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize index.
+
+        Args:
+            path: JSON file to load from and save to (in-memory only if None)
+        """
+        self.path = Path(path) if path else None
+        self.artist_ids: List[str] = []
+        self.artist_names: List[str] = []
+        self.fetched_at: List[float] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.tracks: List[Dict] = []
+        self._artist_number: Dict[str, int] = {}
+        self._artist_genres: Dict[int, List[str]] = {}
+        self._term_cache: Dict[Tuple[str, str], Set[int]] = {}
+        self._word_genres: Optional[Dict[str, Set[str]]] = None
+        if self.path and self.path.exists():
+            self._load()
+
+    # Building
+
+    def refresh(self, client: SpotifyClient, full: bool = False,
+                max_workers: int = 4, artist_ttl: float = 30 * 24 * 3600) -> Dict[str, int]:
+        """
+        Bring the index up to date.
+
+        Incremental refreshes only read saved tracks newer than the newest
+        indexed one; a full refresh re-reads the library (picks up removals).
+
+        Args:
+            client: Authenticated Spotify client
+            full: Re-read every saved track
+            max_workers: Concurrent artist batch requests
+            artist_ttl: Seconds before an artist's genres are refetched
+
+        Returns:
+            Counts of new tracks and fetched artists
+        """
+        newest = None if full or not self.tracks else self.tracks[0].get("added_at")
+        known = set() if full else {t["id"] for t in self.tracks}
+
+        new_tracks = []
+        for item in client.iter_saved_tracks():
+            track = item.get("track") or {}
+            added_at = item.get("added_at") or ""
+            if newest and (added_at < newest or (added_at == newest and track.get("id") in known)):
+                break
+            if not track.get("id") or track["id"] in known:
+                continue
+            known.add(track["id"])
+            new_tracks.append({
+                "id": track["id"],
+                "name": track.get("name"),
+                "artists": [a["id"] for a in track.get("artists", []) if a.get("id")],
+                "duration_ms": track.get("duration_ms"),
+                "popularity": track.get("popularity"),
+                "added_at": added_at
+            })
+            for artist in track.get("artists", []):
+                if artist.get("id") and artist["id"] not in self._artist_number:
+                    self._add_artist(artist["id"], artist.get("name", ""))
+
+        self.tracks = new_tracks + ([] if full else self.tracks)
+
+        now = time.time()
+        stale = sorted({
+            artist_id for track in self.tracks for artist_id in track["artists"]
+            if now - self.fetched_at[self._artist_number[artist_id]] >= artist_ttl
+        })
+        batches = [stale[i:i+50] for i in range(0, len(stale), 50)]
+        if batches:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+                for artists in pool.map(client.get_artists, batches):
+                    for artist in artists:
+                        if artist:
+                            self._set_genres(artist["id"], artist.get("genres", []), now)
+
+        self._term_cache.clear()
+        self._word_genres = None
+        self.save()
+        return {"new_tracks": len(new_tracks), "artists_fetched": len(stale),
+                "tracks": len(self.tracks), "artists": len(self.artist_ids)}
+
+    def _add_artist(self, artist_id: str, name: str) -> int:
+        number = len(self.artist_ids)
+        self.artist_ids.append(artist_id)
+        self.artist_names.append(name)
+        self.fetched_at.append(0.0)
+        self._artist_number[artist_id] = number
+        return number
+
+    def _set_genres(self, artist_id: str, genres: List[str], fetched_at: float):
+        """Replace one artist's genres in the posting lists."""
+        number = self._artist_number.get(artist_id)
+        if number is None:
+            return
+        for genre in self._artist_genres.pop(number, []):
+            posting = self.postings.get(genre, [])
+            if number in posting:
+                posting.remove(number)
+                if not posting:
+                    del self.postings[genre]
+        for genre in genres:
+            self.postings.setdefault(genre, []).append(number)
+        self._artist_genres[number] = list(genres)
+        self.fetched_at[number] = fetched_at
+
+    # Persistence
+
+    def save(self):
+        """Write the index to disk (atomically) if a path is set."""
+        if not self.path:
+            return
+        data = {
+            "artists": {"ids": self.artist_ids, "names": self.artist_names,
+                        "fetched_at": self.fetched_at},
+            "genres": {genre: sorted(posting) for genre, posting in self.postings.items()},
+            "tracks": self.tracks
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        artists = data.get("artists", {})
+        self.artist_ids = artists.get("ids", [])
+        self.artist_names = artists.get("names", [""] * len(self.artist_ids))
+        self.fetched_at = artists.get("fetched_at", [0.0] * len(self.artist_ids))
+        self._artist_number = {a: n for n, a in enumerate(self.artist_ids)}
+        self.postings = data.get("genres", {})
+        for genre, posting in self.postings.items():
+            for number in posting:
+                self._artist_genres.setdefault(number, []).append(genre)
+        self.tracks = data.get("tracks", [])
+
+    # Queries
+
+    def genres(self) -> Dict[str, int]:
+        """Artist count per genre, largest first."""
+        counts = {genre: len(posting) for genre, posting in self.postings.items()}
+        return dict(sorted(counts.items(), key=lambda g: g[1], reverse=True))
+
+    def query_artists(self, query: str) -> List[str]:
+        """Artist IDs matching a boolean genre query."""
+        return [self.artist_ids[n] for n in sorted(self._evaluate(parse_genre_query(query)))]
+
+    def query_tracks(self, query: str) -> List[Dict]:
+        """Saved tracks (newest first) with at least one matching artist."""
+        matched = {self.artist_ids[n] for n in self._evaluate(parse_genre_query(query))}
+        return [t for t in self.tracks if any(a in matched for a in t["artists"])]
+
+    def _evaluate(self, node) -> Set[int]:
+        kind = node[0]
+        if kind == "or":
+            return self._evaluate(node[1]) | self._evaluate(node[2])
+        if kind == "and":
+            # NOT on one side becomes a set difference, never a full complement
+            left, right = node[1], node[2]
+            if right[0] == "not" and left[0] != "not":
+                return self._evaluate(left) - self._evaluate(right[1])
+            if left[0] == "not" and right[0] != "not":
+                return self._evaluate(right) - self._evaluate(left[1])
+            return self._evaluate(left) & self._evaluate(right)
+        if kind == "not":
+            return set(range(len(self.artist_ids))) - self._evaluate(node[1])
+        return self._term(kind, node[1])
+
+    def _term(self, kind: str, phrase: str) -> Set[int]:
+        """Artists for one genre term (cached until the next refresh)."""
+        key = (kind, phrase)
+        if key not in self._term_cache:
+            if kind == "exact":
+                genres = [phrase] if phrase in self.postings else []
+            else:
+                genres = self._genres_with_phrase(phrase)
+            artists = set()
+            for genre in genres:
+                artists.update(self.postings[genre])
+            self._term_cache[key] = artists
+        return self._term_cache[key]
+
+    def _genres_with_phrase(self, phrase: str) -> List[str]:
+        """Genres containing a phrase as whole words."""
+        if self._word_genres is None:
+            self._word_genres = {}
+            for genre in self.postings:
+                for word in genre.split():
+                    self._word_genres.setdefault(word, set()).add(genre)
+        words = phrase.split()
+        if not words:
+            return []
+        candidates = set.intersection(*(self._word_genres.get(w, set()) for w in words))
+        padded = f" {phrase} "
+        return [g for g in candidates if padded in f" {g} "]
@@ -0,0 +1,259 @@
+"""
+Spotify Playlist Job Runner
+
+Runs many playlist builds from one manifest in a single process:
+- One authenticated client, HTTP session, response cache and rate limiter
+- Configurable number of concurrent jobs
+- Per-job timing, API call counts and failure isolation
+- Summary report with throughput (playlists/min, API calls per playlist)
+
+Manifest format (JSON):
+
+    {
+      "defaults": {"public": false},
+      "request_budget": 50,
+      "jobs": [
+        {"id": "jazz", "type": "theme",
+         "args": {"theme_keywords": ["jazz"], "playlist_name": "Jazz"}},
+        {"id": "daft", "method": "create_from_artist",
+         "args": {"artist_name": "Daft Punk"}}
+      ]
+    }
+"""
+
+import argparse
+import inspect
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from spotify_client import (
+    RateLimiter, ResponseCache, SpotifyClient, create_client_from_env,
+    validate_credentials, get_validation_errors
+)
+from playlist_creator import PlaylistCreator
+
+
+# PlaylistCreator methods a job may run
+JOB_METHODS = (
+    "create_from_artist", "create_from_theme", "create_from_lyrics",
+    "create_from_song_list", "create_from_song_file", "create_from_recommendations",
+    "create_from_artist_graph", "create_from_genres", "create_from_library",
+    "reorder_playlist", "sync_playlist",
+)
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Load job specs from a manifest file, applying its defaults.
+
+    The manifest is either a list of jobs or an object with "jobs" and
+    optional "defaults" (arguments applied to every job whose method
+    accepts them).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"jobs": manifest}
+
+    defaults = manifest.get("defaults", {})
+    jobs = []
+    for number, job in enumerate(manifest.get("jobs", [])):
+        method = job_method(job)
+        accepted = inspect.signature(getattr(PlaylistCreator, method)).parameters
+        args = {k: v for k, v in defaults.items() if k in accepted}
+        args.update(job.get("args", {}))
+        jobs.append({
+            "id": job.get("id") or f"job-{number + 1}",
+            "method": method,
+            "args": args,
+            "request_budget": job.get("request_budget", manifest.get("request_budget"))
+        })
+    return jobs
+
+
+def job_method(job: Dict[str, Any]) -> str:
+    """Resolve a job's "method" (or "type" shorthand like "theme") to a builder name."""
+    method = job.get("method") or f"create_from_{job.get('type', '')}"
+    if method not in JOB_METHODS:
+        raise ValueError(f"Unknown job method: {method}")
+    return method
+
+
+class JobRunner:
+    """Execute playlist jobs concurrently over a shared client."""
+
+    def __init__(self, client: SpotifyClient = None, max_workers: int = 4,
+                 requests_per_second: float = 10.0, cache_entries: int = 10000):
+        """
+        Initialize runner.
+
+        Args:
+            client: Authenticated Spotify client (created from env if None)
+            max_workers: Jobs running at the same time
+            requests_per_second: Shared API rate across all jobs
+            cache_entries: Catalog responses kept in the shared cache (0 disables)
+        """
+        if client is None:
+            client = create_client_from_env()
+            if client.refresh_token:
+                client.refresh_access_token()
+        if client.rate_limiter is None and requests_per_second:
+            client.rate_limiter = RateLimiter(requests_per_second)
+        if client.response_cache is None and cache_entries:
+            client.response_cache = ResponseCache(cache_entries)
+
+        self.client = client
+        self.max_workers = max(1, max_workers)
+
+    def run(self, jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run jobs and report on each.
+
+        A failing job is recorded and never stops the others.
+
+        Args:
+            jobs: Job specs as returned by load_manifest
+
+        Returns:
+            {"jobs": [per-job results], "summary": throughput figures}
+        """
+        started = time.time()
+        requests_before = self.client.request_count
+        cache = self.client.response_cache
+        hits_before = cache.hits if cache else 0
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+                results = list(pool.map(self.run_job, jobs))
+        else:
+            results = []
+
+        elapsed = time.time() - started
+        succeeded = [r for r in results if r["status"] == "ok"]
+        api_calls = self.client.request_count - requests_before
+        return {
+            "jobs": results,
+            "summary": {
+                "jobs": len(results),
+                "succeeded": len(succeeded),
+                "failed": len(results) - len(succeeded),
+                "elapsed_seconds": round(elapsed, 2),
+                "playlists_per_minute": round(len(succeeded) * 60 / elapsed, 2) if elapsed else 0.0,
+                "api_calls": api_calls,
+                "api_calls_per_playlist": round(api_calls / len(succeeded), 1) if succeeded else None,
+                "cache_hits": (cache.hits - hits_before) if cache else 0,
+            }
+        }
+
+    def estimate(self, jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Dry run: estimate every job's API calls, bytes and duration.
+
+        Only jobs on existing playlists without a "playlist_size" argument
+        cost a call (to read the playlist's size).
+        """
+        estimates = []
+        for job in jobs:
+            creator = PlaylistCreator(self.client, request_budget=job.get("request_budget"))
+            try:
+                estimate = creator.estimate(job_method(job), **job.get("args", {}))
+            except Exception as e:
+                estimate = {"error": f"{type(e).__name__}: {e}"}
+            estimates.append(dict(estimate, id=job.get("id")))
+
+        valid = [e for e in estimates if "error" not in e]
+        calls = sum(e["calls"] for e in valid)
+        return {
+            "jobs": estimates,
+            "summary": {
+                "jobs": len(estimates),
+                "calls": calls,
+                "max_calls": sum(e["max_calls"] for e in valid),
+                "bytes": sum(e["bytes"] for e in valid),
+                # Jobs overlap, but the shared rate limiter caps throughput
+                "seconds": round(max(
+                    sum(e["seconds"] for e in valid) / self.max_workers,
+                    calls / self.client.rate_limiter.rate if self.client.rate_limiter else 0
+                ), 1)
+            }
+        }
+
+    def run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one job on a scoped view of the shared client."""
+        client = self.client.scoped()
+        creator = PlaylistCreator(client, request_budget=job.get("request_budget"))
+        started = time.time()
+        result = {"id": job.get("id"), "method": job.get("method")}
+        try:
+            output = getattr(creator, job_method(job))(**job.get("args", {}))
+            playlist = output.get("playlist") or {}
+            result.update(
+                status="ok",
+                playlist_id=playlist.get("id") or output.get("playlist_id"),
+                tracks_added=output.get("tracks_added"),
+                budget_exhausted=output.get("budget_exhausted", False)
+            )
+        except Exception as e:
+            result.update(status="failed", error=f"{type(e).__name__}: {e}")
+        result.update(seconds=round(time.time() - started, 3), api_calls=client.request_count)
+        return result
+
+
+def main(argv: List[str] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Run playlist jobs from a manifest")
+    parser.add_argument("manifest", help="JSON manifest of playlist jobs")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent jobs")
+    parser.add_argument("--rate", type=float, default=10.0, help="API requests per second")
+    parser.add_argument("--report", help="Write the JSON report to this file")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only estimate API calls, bytes and duration")
+    args = parser.parse_args(argv)
+
+    validation = validate_credentials()
+    if not validation['all_valid']:
+        print("\n❌ Missing Spotify credentials!\n")
+        for error in get_validation_errors():
+            print(error)
+        return 1
+
+    jobs = load_manifest(args.manifest)
+    runner = JobRunner(max_workers=args.workers, requests_per_second=args.rate)
+
+    if args.dry_run:
+        plan = runner.estimate(jobs)
+        for job in plan["jobs"]:
+            if "error" in job:
+                print(f"✗ {job['id']}: {job['error']}")
+            else:
+                print(f"• {job['id']}: ~{job['calls']} calls (max {job['max_calls']}), "
+                      f"~{job['bytes'] // 1024} KB, ~{job['seconds']}s")
+        summary = plan["summary"]
+        print(f"\nTotal: ~{summary['calls']} calls (max {summary['max_calls']}), "
+              f"~{summary['bytes'] // 1024} KB, ~{summary['seconds']}s")
+        if args.report:
+            Path(args.report).write_text(json.dumps(plan, indent=2), encoding='utf-8')
+        return 0
+
+    report = runner.run(jobs)
+
+    for job in report["jobs"]:
+        mark = "✓" if job["status"] == "ok" else "✗"
+        print(f"{mark} {job['id']}: {job['seconds']}s, {job['api_calls']} calls"
+              + (f" - {job['error']}" if job.get("error") else ""))
+    summary = report["summary"]
+    print(f"\n{summary['succeeded']}/{summary['jobs']} jobs in {summary['elapsed_seconds']}s "
+          f"({summary['playlists_per_minute']} playlists/min, "
+          f"{summary['api_calls_per_playlist']} API calls per playlist)")
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2), encoding='utf-8')
+    return 0 if not summary["failed"] else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,433 @@
+"""
+Spotify Library Mirror
+
+Local SQLite copy of the user's library for offline querying:
+- Saved tracks, playlists and their items, artists (with genres) and albums
+- Incremental sync: saved tracks newest-first until a known one, playlists
+  only when their snapshot_id changed, artists only when new or stale
+- Indexed tables, so candidate selection runs locally with zero API calls
+"""
+
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from spotify_client import SpotifyClient
+
+
+# Projection used when reading playlist contents
+ITEM_FIELDS = ("items(added_at,track(id,name,uri,duration_ms,popularity,explicit,"
+               "album(id,name,release_date,album_type,total_tracks),artists(id,name))),total")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    uri TEXT,
+    album_id TEXT,
+    duration_ms INTEGER,
+    popularity INTEGER,
+    explicit INTEGER
+);
+CREATE TABLE IF NOT EXISTS albums (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    release_date TEXT,
+    album_type TEXT,
+    total_tracks INTEGER
+);
+CREATE TABLE IF NOT EXISTS artists (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    popularity INTEGER,
+    fetched_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS track_artists (
+    track_id TEXT NOT NULL,
+    artist_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (track_id, position)
+);
+CREATE TABLE IF NOT EXISTS artist_genres (
+    artist_id TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    PRIMARY KEY (artist_id, genre)
+);
+CREATE TABLE IF NOT EXISTS saved_tracks (
+    track_id TEXT PRIMARY KEY,
+    added_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS playlists (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    owner_id TEXT,
+    snapshot_id TEXT,
+    public INTEGER,
+    collaborative INTEGER,
+    items_total INTEGER,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS playlist_items (
+    playlist_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    track_id TEXT,
+    added_at TEXT,
+    PRIMARY KEY (playlist_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_saved_added_at ON saved_tracks (added_at);
+CREATE INDEX IF NOT EXISTS idx_track_artists_artist ON track_artists (artist_id);
+CREATE INDEX IF NOT EXISTS idx_artist_genres_genre ON artist_genres (genre);
+CREATE INDEX IF NOT EXISTS idx_playlist_items_track ON playlist_items (track_id);
+CREATE INDEX IF NOT EXISTS idx_tracks_album ON tracks (album_id);
+CREATE INDEX IF NOT EXISTS idx_artists_name ON artists (name COLLATE NOCASE);
+"""
+
+
+class LibraryMirror:
+    """SQLite mirror of the user's saved tracks, playlists, artists and albums."""
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Open (or create) a mirror.
+
+        Args:
+            path: SQLite database file (":memory:" for a throwaway mirror)
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "LibraryMirror":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Syncing
+
+    def sync(self, client: SpotifyClient, full: bool = False, playlists: bool = True,
+             max_workers: int = 4, artist_ttl: float = 30 * 24 * 3600) -> Dict[str, int]:
+        """
+        Bring the mirror up to date.
+
+        Each stage commits on its own, so an interrupted sync (e.g. a spent
+        request budget) keeps everything finished before it.
+
+        Args:
+            client: Authenticated Spotify client
+            full: Re-read every saved track (picks up removals)
+            playlists: Also sync the user's playlists
+            max_workers: Concurrent playlist and artist requests
+            artist_ttl: Seconds before an artist's genres are refetched
+
+        Returns:
+            Counts of new saved tracks, updated/removed playlists and fetched artists
+        """
+        stats = {"saved_tracks": self.sync_saved_tracks(client, full=full)}
+        if playlists:
+            stats.update(self.sync_playlists(client, max_workers=max_workers))
+        stats["artists_fetched"] = self.sync_artists(client, max_workers=max_workers,
+                                                     ttl=artist_ttl)
+        return stats
+
+    def sync_saved_tracks(self, client: SpotifyClient, full: bool = False) -> int:
+        """Read saved tracks newer than the newest mirrored one (all if full)."""
+        newest = None
+        known = set()
+        if not full:
+            row = self.conn.execute(
+                "SELECT track_id, added_at FROM saved_tracks "
+                "WHERE added_at = (SELECT MAX(added_at) FROM saved_tracks)"
+            ).fetchall()
+            newest = row[0]["added_at"] if row else None
+            known = {r["track_id"] for r in row}
+
+        items = []
+        for item in client.iter_saved_tracks():
+            track = item.get("track") or {}
+            added_at = item.get("added_at") or ""
+            if newest and (added_at < newest or (added_at == newest and track.get("id") in known)):
+                break
+            if track.get("id"):
+                items.append(item)
+
+        with self.conn:
+            if full:
+                self.conn.execute("DELETE FROM saved_tracks")
+            self._put_tracks(item["track"] for item in items)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO saved_tracks (track_id, added_at) VALUES (?, ?)",
+                [(item["track"]["id"], item.get("added_at") or "") for item in items]
+            )
+        return len(items)
+
+    def sync_playlists(self, client: SpotifyClient, playlist_ids: Iterable[str] = None,
+                       max_workers: int = 4) -> Dict[str, int]:
+        """
+        Re-read playlists whose snapshot_id changed.
+
+        Args:
+            client: Authenticated Spotify client
+            playlist_ids: Restrict to these playlists (default: all of the
+                          user's playlists; ones no longer listed are dropped)
+            max_workers: Maximum concurrent playlist reads
+
+        Returns:
+            Counts of updated, unchanged and removed playlists
+        """
+        if playlist_ids is None:
+            listed = {p["id"]: p for p in client.iter_user_playlists() if p and p.get("id")}
+            mirrored = [r["id"] for r in self.conn.execute("SELECT id FROM playlists")]
+            removed = [p for p in mirrored if p not in listed]
+        else:
+            listed = {playlist_id: client.get_playlist(
+                playlist_id, fields="id,name,owner(id),snapshot_id,public,collaborative,tracks(total)"
+            ) for playlist_id in playlist_ids}
+            removed = []
+
+        with self.conn:
+            for playlist_id in removed:
+                self._drop_playlist(playlist_id)
+
+        snapshots = {r["id"]: r["snapshot_id"]
+                     for r in self.conn.execute("SELECT id, snapshot_id FROM playlists")}
+        stale = [p for p in listed.values() if snapshots.get(p["id"]) != p.get("snapshot_id")]
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stale)))) as pool:
+                # Written one playlist at a time, in order, as reads finish
+                contents = pool.map(
+                    lambda p: list(client.iter_playlist_tracks(p["id"], fields=ITEM_FIELDS)),
+                    stale
+                )
+                for playlist, items in zip(stale, contents):
+                    self.update_playlist(playlist, items)
+
+        return {
+            "playlists_updated": len(stale),
+            "playlists_unchanged": len(listed) - len(stale),
+            "playlists_removed": len(removed)
+        }
+
+    def update_playlist(self, playlist: Dict, items: List[Dict]):
+        """Replace one playlist and its items from raw API objects."""
+        with self.conn:
+            self._drop_playlist(playlist["id"])
+            self._put_tracks(item.get("track") for item in items)
+            self.conn.execute(
+                "INSERT INTO playlists (id, name, owner_id, snapshot_id, public, collaborative,"
+                " items_total, synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (playlist["id"], playlist.get("name"), (playlist.get("owner") or {}).get("id"),
+                 playlist.get("snapshot_id"), playlist.get("public"),
+                 playlist.get("collaborative"), len(items), time.time())
+            )
+            self.conn.executemany(
+                "INSERT INTO playlist_items (playlist_id, position, track_id, added_at)"
+                " VALUES (?, ?, ?, ?)",
+                [(playlist["id"], position, (item.get("track") or {}).get("id"),
+                  item.get("added_at")) for position, item in enumerate(items)]
+            )
+
+    def sync_artists(self, client: SpotifyClient, max_workers: int = 4,
+                     ttl: float = 30 * 24 * 3600) -> int:
+        """Fetch genres for new or stale artists, 50 per call, concurrently."""
+        cutoff = time.time() - ttl
+        stale = [r["id"] for r in self.conn.execute(
+            "SELECT id FROM artists WHERE fetched_at < ? ORDER BY id", (cutoff,)
+        )]
+        batches = [stale[i:i+50] for i in range(0, len(stale), 50)]
+        if not batches:
+            return 0
+
+        now = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+            for artists in pool.map(client.get_artists, batches):
+                artists = [a for a in artists if a and a.get("id")]
+                with self.conn:
+                    self.conn.executemany(
+                        "UPDATE artists SET name = ?, popularity = ?, fetched_at = ? WHERE id = ?",
+                        [(a.get("name"), a.get("popularity"), now, a["id"]) for a in artists]
+                    )
+                    self.conn.executemany(
+                        "DELETE FROM artist_genres WHERE artist_id = ?",
+                        [(a["id"],) for a in artists]
+                    )
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO artist_genres (artist_id, genre) VALUES (?, ?)",
+                        [(a["id"], genre) for a in artists for genre in a.get("genres", [])]
+                    )
+        return len(stale)
+
+    def _put_tracks(self, tracks: Iterable[Optional[Dict]]):
+        """Upsert tracks with their albums and artists (caller holds the transaction)."""
+        track_rows, album_rows, credit_rows, artist_rows = [], {}, [], {}
+        for track in tracks:
+            if not track or not track.get("id"):
+                continue
+            album = track.get("album") or {}
+            track_rows.append((track["id"], track.get("name"), track.get("uri"), album.get("id"),
+                               track.get("duration_ms"), track.get("popularity"),
+                               track.get("explicit")))
+            if album.get("id"):
+                album_rows[album["id"]] = (album["id"], album.get("name"),
+                                           album.get("release_date"), album.get("album_type"),
+                                           album.get("total_tracks"))
+            for position, artist in enumerate(a for a in track.get("artists", []) if a.get("id")):
+                credit_rows.append((track["id"], artist["id"], position))
+                artist_rows[artist["id"]] = (artist["id"], artist.get("name"))
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO tracks (id, name, uri, album_id, duration_ms, popularity,"
+            " explicit) VALUES (?, ?, ?, ?, ?, ?, ?)", track_rows
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO albums (id, name, release_date, album_type, total_tracks)"
+            " VALUES (?, ?, ?, ?, ?)", album_rows.values()
+        )
+        self.conn.executemany(
+            "DELETE FROM track_artists WHERE track_id = ?", [(row[0],) for row in track_rows]
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO track_artists (track_id, artist_id, position) VALUES (?, ?, ?)",
+            credit_rows
+        )
+        # New artists start with fetched_at 0 so the next artist sync picks them up
+        self.conn.executemany(
+            "INSERT INTO artists (id, name) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET name = excluded.name", artist_rows.values()
+        )
+
+    def _drop_playlist(self, playlist_id: str):
+        self.conn.execute("DELETE FROM playlist_items WHERE playlist_id = ?", (playlist_id,))
+        self.conn.execute("DELETE FROM playlists WHERE id = ?", (playlist_id,))
+
+    # Queries
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """Run a read-only SQL query against the mirror and return rows as dicts."""
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def counts(self) -> Dict[str, int]:
+        """Row counts of the main tables."""
+        return {
+            table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("saved_tracks", "playlists", "playlist_items", "tracks",
+                          "artists", "albums")
+        }
+
+    def playlists(self) -> List[Dict[str, Any]]:
+        """Mirrored playlists, by name."""
+        return self.query("SELECT * FROM playlists ORDER BY name COLLATE NOCASE")
+
+    def genres(self) -> Dict[str, int]:
+        """Artist count per genre, largest first."""
+        rows = self.conn.execute(
+            "SELECT genre, COUNT(*) AS artists FROM artist_genres "
+            "GROUP BY genre ORDER BY artists DESC, genre"
+        )
+        return {row["genre"]: row["artists"] for row in rows}
+
+    def select_tracks(self, playlist_id: str = None, artist: str = None, genre: str = None,
+                      added_since: str = None, min_popularity: int = None,
+                      max_duration_ms: int = None, explicit: bool = None,
+                      limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Select candidate tracks locally.
+
+        Args:
+            playlist_id: Take tracks from this mirrored playlist (default:
+                         saved tracks)
+            artist: Artist name (case-insensitive) or ID
+            genre: Substring of one of the artist's genres (e.g. "jazz")
+            added_since: ISO timestamp; only tracks added at or after it
+            min_popularity: Minimum track popularity
+            max_duration_ms: Maximum track length
+            explicit: Only explicit (True) or clean (False) tracks
+            limit: Maximum tracks to return
+
+        Returns:
+            Track dicts shaped like API tracks (id, name, uri, duration_ms,
+            popularity, album, artists, added_at), newest added first
+        """
+        if playlist_id:
+            source = ("SELECT track_id, MAX(added_at) AS added_at FROM playlist_items "
+                      "WHERE playlist_id = ? AND track_id IS NOT NULL GROUP BY track_id")
+            params: List[Any] = [playlist_id]
+        else:
+            source = "SELECT track_id, added_at FROM saved_tracks"
+            params = []
+
+        where = []
+        if artist:
+            where.append("t.id IN (SELECT ta.track_id FROM track_artists ta "
+                         "JOIN artists a ON a.id = ta.artist_id "
+                         "WHERE a.id = ? OR a.name = ? COLLATE NOCASE)")
+            params += [artist, artist]
+        if genre:
+            where.append("t.id IN (SELECT ta.track_id FROM track_artists ta "
+                         "JOIN artist_genres g ON g.artist_id = ta.artist_id "
+                         "WHERE g.genre LIKE ?)")
+            params.append(f"%{genre.lower()}%")
+        if added_since:
+            where.append("s.added_at >= ?")
+            params.append(added_since)
+        if min_popularity is not None:
+            where.append("t.popularity >= ?")
+            params.append(min_popularity)
+        if max_duration_ms is not None:
+            where.append("t.duration_ms <= ?")
+            params.append(max_duration_ms)
+        if explicit is not None:
+            where.append("t.explicit = ?")
+            params.append(int(explicit))
+
+        sql = (f"SELECT t.*, s.added_at, al.name AS album_name, al.release_date "
+               f"FROM ({source}) s JOIN tracks t ON t.id = s.track_id "
+               f"LEFT JOIN albums al ON al.id = t.album_id"
+               + (" WHERE " + " AND ".join(where) if where else "")
+               + " ORDER BY s.added_at DESC, t.id")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self.conn.execute(sql, params).fetchall()
+        return self._shape_tracks(rows)
+
+    def _shape_tracks(self, rows: List[sqlite3.Row]) -> List[Dict[str, Any]]:
+        """Attach artists to track rows (one query for all rows)."""
+        artists: Dict[str, List[Dict[str, str]]] = {}
+        ids = [row["id"] for row in rows]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for credit in self.conn.execute(
+                "SELECT ta.track_id, a.id, a.name FROM track_artists ta "
+                "JOIN artists a ON a.id = ta.artist_id "
+                f"WHERE ta.track_id IN ({','.join('?' * len(chunk))}) "
+                "ORDER BY ta.track_id, ta.position", chunk
+            ):
+                artists.setdefault(credit["track_id"], []).append(
+                    {"id": credit["id"], "name": credit["name"]}
+                )
+
+        return [{
+            "id": row["id"],
+            "name": row["name"],
+            "uri": row["uri"],
+            "duration_ms": row["duration_ms"],
+            "popularity": row["popularity"],
+            "explicit": bool(row["explicit"]),
+            "album": {"id": row["album_id"], "name": row["album_name"],
+                      "release_date": row["release_date"]},
+            "artists": artists.get(row["id"], []),
+            "added_at": row["added_at"]
+        } for row in rows]
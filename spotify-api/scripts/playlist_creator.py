@@ -6,25 +6,89 @@ High-level utility for creating playlists from various sources:
 - Theme/mood keywords
 - Lyrics-based content search
 - Specific song lists
+- Related-artist graphs ("artist radio")
+- Genre queries over the user's library
+- Filters over a local SQLite mirror of the library
 """
 
-from typing import List, Dict, Optional, Any
-from spotify_client import SpotifyClient
+import functools
+import math
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Any, Union
+from spotify_client import SpotifyClient, RequestBudgetExceeded
+
+
+def _budgeted(method):
+    """Run a PlaylistCreator operation on a client scoped to its request budget."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.request_budget is None:
+            return method(self, *args, **kwargs)
+        
+        outer = self.client
+        self.client = outer.scoped(request_budget=self.request_budget)
+        self._budget_exhausted = False
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            scoped, self.client = self.client, outer
+        
+        if isinstance(result, dict):
+            result["requests_made"] = scoped.request_count
+            result["budget_exhausted"] = self._budget_exhausted
+        return result
+    return wrapper
 
 
 class PlaylistCreator:
     """Create playlists through various methods."""
     
-    def __init__(self, client: SpotifyClient):
-        """Initialize with Spotify client."""
+    def __init__(self, client: SpotifyClient, request_budget: int = None):
+        """
+        Initialize with Spotify client.
+        
+        Args:
+            client: Authenticated Spotify client
+            request_budget: Maximum API calls per operation; builders return
+                            fewer tracks rather than exceed it
+        """
         self.client = client
         self.max_tracks_per_playlist = 100
+        self.request_budget = request_budget
+        self._budget_exhausted = False
+    
+    def estimate(self, operation: str, **kwargs) -> Dict[str, Any]:
+        """
+        Estimate API calls, bytes and duration of an operation without running it.
+        
+        Args:
+            operation: Method name (e.g. "create_from_theme")
+            **kwargs: Arguments the operation would be called with. For
+                      reorder_playlist, sync_playlist and get_playlist_stats,
+                      pass playlist_size to avoid one lookup call.
+            
+        Returns:
+            Estimate with calls, max_calls, bytes, seconds and per-step detail
+        """
+        from request_planner import estimate_operation
+        
+        if "playlist_id" in kwargs and "playlist_size" not in kwargs:
+            playlist = self.client.get_playlist(kwargs["playlist_id"], fields="tracks(total)")
+            kwargs["playlist_size"] = playlist.get("tracks", {}).get("total", 0)
+        estimate = estimate_operation(operation, **kwargs)
+        if self.request_budget is not None:
+            estimate["within_budget"] = estimate["calls"] <= self.request_budget
+        return estimate
     
+    @_budgeted
     def create_from_artist(self, artist_name: str, playlist_name: str = None,
                           playlist_description: str = "", public: bool = True,
-                          limit: int = 50) -> Dict[str, Any]:
+                          limit: int = 50, sequence: Union[str, Any] = None,
+                          target_duration_ms: int = None,
+                          duration_tolerance_ms: int = 30000,
+                          full_discography: bool = False) -> Dict[str, Any]:
         """
-        Create playlist from artist's top tracks.
+        Create playlist from artist's top tracks (or full discography).
         
         Args:
             artist_name: Name of artist or band
@@ -32,6 +96,13 @@ class PlaylistCreator:
             playlist_description: Optional description
             public: Make playlist public
             limit: Number of tracks to add
+            sequence: Energy curve name or PlaylistSequencer to order tracks
+                      by audio features (keeps search order if None)
+            target_duration_ms: Total playlist length to aim for; picks the
+                                most popular tracks that fit (overrides limit)
+            duration_tolerance_ms: Allowed deviation from target_duration_ms
+            full_discography: Draw from every release (deduplicated, most
+                              popular first) instead of the 10 top tracks
             
         Returns:
             Playlist data with track count
@@ -45,12 +116,20 @@ class PlaylistCreator:
         artist_name_actual = artists[0]["name"]
         
         # Get artist's top tracks
-        tracks = self.client.get_artist_top_tracks(
-            artist_id=artist_id,
-            limit=min(limit, 50)
+        if full_discography:
+            from discography import DiscographyFetcher
+            tracks = []
+            with self._collecting(limit, sequence):
+                for track in DiscographyFetcher(self.client).iter_tracks(artist_id):
+                    tracks.append(track)
+            tracks.sort(key=lambda t: t.get("popularity") or 0, reverse=True)
+        else:
+            tracks = self.client.get_artist_top_tracks(artist_id=artist_id)
+        
+        tracks, duration_ms = self._select_tracks(
+            tracks, limit, target_duration_ms, duration_tolerance_ms, sequence
         )
-        
-        track_ids = [t["id"] for t in tracks]
+        track_ids = self._sequence_tracks([t["id"] for t in tracks], sequence)
         
         # Create playlist
         playlist_name = playlist_name or f"{artist_name_actual} Collection"
@@ -64,49 +143,67 @@ class PlaylistCreator:
         )
         
         # Add tracks
-        if track_ids:
-            self.client.add_tracks_to_playlist(playlist["id"], track_ids)
+        self._add_tracks(playlist["id"], track_ids)
         
         return {
             "playlist": playlist,
             "tracks_added": len(track_ids),
+            "duration_ms": duration_ms,
             "artist": artist_name_actual
         }
     
+    @_budgeted
     def create_from_theme(self, theme_keywords: List[str], playlist_name: str,
                          playlist_description: str = "", public: bool = True,
-                         limit: int = 100) -> Dict[str, Any]:
+                         limit: int = 100, sequence: Union[str, Any] = None,
+                         target_duration_ms: int = None,
+                         duration_tolerance_ms: int = 30000,
+                         ranking_weights: Dict[str, float] = None,
+                         oversample: float = 3.0) -> Dict[str, Any]:
         """
         Create playlist based on theme/mood keywords.
         
+        Keyword searches are oversampled concurrently and the pool is ranked
+        by popularity, release recency, keyword hits and search position.
+        
         Args:
             theme_keywords: List of theme keywords (e.g., ["chill", "indie", "2020s"])
             playlist_name: Playlist name
             playlist_description: Optional description
             public: Make playlist public
             limit: Maximum tracks to add
+            sequence: Energy curve name or PlaylistSequencer to order tracks
+                      by audio features (keeps search order if None)
+            target_duration_ms: Total playlist length to aim for; picks the
+                                best-ranked tracks that fit (overrides limit)
+            duration_tolerance_ms: Allowed deviation from target_duration_ms
+            ranking_weights: Overrides for theme_ranking.DEFAULT_WEIGHTS
+                             ("popularity", "recency", "keyword_hits", "relevance")
+            oversample: Candidates searched per playlist slot
             
         Returns:
             Playlist data with track count and keywords used
         """
+        from theme_ranking import ThemeRanker
+        
+        ranker = ThemeRanker(self.client, weights=ranking_weights)
         all_tracks = []
-        track_ids_set = set()
         
-        # Search for each keyword
-        for keyword in theme_keywords:
-            results = self.client.search_tracks(query=keyword, limit=30)
-            for track in results:
-                track_id = track["id"]
-                if track_id not in track_ids_set:
-                    all_tracks.append(track)
-                    track_ids_set.add(track_id)
-            
-            # Stop if we have enough
-            if len(all_tracks) >= limit:
-                break
+        # Duration targets rank the whole pool and let the knapsack choose
+        with self._collecting(limit, sequence):
+            if target_duration_ms:
+                slots = math.ceil(target_duration_ms / 180000)
+                all_tracks = ranker.rank(theme_keywords, slots, oversample, keep_pool=True)
+            else:
+                all_tracks = ranker.rank(theme_keywords, limit, oversample)
+        self._budget_exhausted |= ranker.budget_exhausted
         
         # Limit tracks
-        track_ids = [t["id"] for t in all_tracks[:limit]]
+        selected, duration_ms = self._select_tracks(
+            all_tracks, limit, target_duration_ms, duration_tolerance_ms, sequence,
+            duration_value="relevance"
+        )
+        track_ids = self._sequence_tracks([t["id"] for t in selected], sequence)
         
         if not track_ids:
             raise ValueError(f"No tracks found for theme keywords: {theme_keywords}")
@@ -118,20 +215,22 @@ class PlaylistCreator:
             public=public
         )
         
-        # Add tracks in batches (Spotify limit is 100 per request)
-        for i in range(0, len(track_ids), 100):
-            batch = track_ids[i:i+100]
-            self.client.add_tracks_to_playlist(playlist["id"], batch)
+        # Add tracks in batches
+        self._add_tracks(playlist["id"], track_ids)
         
         return {
             "playlist": playlist,
             "tracks_added": len(track_ids),
+            "duration_ms": duration_ms,
             "keywords": theme_keywords
         }
     
+    @_budgeted
     def create_from_lyrics(self, lyric_keywords: List[str], playlist_name: str,
                           playlist_description: str = "", public: bool = True,
-                          limit: int = 100) -> Dict[str, Any]:
+                          limit: int = 100, sequence: Union[str, Any] = None,
+                          target_duration_ms: int = None,
+                          duration_tolerance_ms: int = 30000) -> Dict[str, Any]:
         """
         Create playlist based on lyrical content.
         
@@ -141,6 +240,11 @@ class PlaylistCreator:
             playlist_description: Optional description
             public: Make playlist public
             limit: Maximum tracks to add
+            sequence: Energy curve name or PlaylistSequencer to order tracks
+                      by audio features (keeps search order if None)
+            target_duration_ms: Total playlist length to aim for; picks the
+                                most popular tracks that fit (overrides limit)
+            duration_tolerance_ms: Allowed deviation from target_duration_ms
             
         Returns:
             Playlist data with track count and keywords used
@@ -149,20 +253,25 @@ class PlaylistCreator:
         track_ids_set = set()
         
         # Search for each lyric keyword
-        for keyword in lyric_keywords:
-            results = self.client.search_tracks(query=keyword, limit=30)
-            for track in results:
-                track_id = track["id"]
-                if track_id not in track_ids_set:
-                    all_tracks.append(track)
-                    track_ids_set.add(track_id)
-            
-            # Stop if we have enough
-            if len(all_tracks) >= limit:
-                break
+        with self._collecting(limit, sequence):
+            for keyword in lyric_keywords:
+                results = self.client.search_tracks(query=keyword, limit=30)
+                for track in results:
+                    track_id = track["id"]
+                    if track_id not in track_ids_set:
+                        all_tracks.append(track)
+                        track_ids_set.add(track_id)
+                
+                # Stop if we have enough (duration targets use the whole pool)
+                if not target_duration_ms and len(all_tracks) >= limit:
+                    break
         
         # Limit and deduplicate
-        track_ids = list(dict.fromkeys([t["id"] for t in all_tracks[:limit]]))
+        selected, duration_ms = self._select_tracks(
+            all_tracks, limit, target_duration_ms, duration_tolerance_ms, sequence
+        )
+        track_ids = list(dict.fromkeys([t["id"] for t in selected]))
+        track_ids = self._sequence_tracks(track_ids, sequence)
         
         if not track_ids:
             raise ValueError(f"No tracks found for lyric keywords: {lyric_keywords}")
@@ -175,44 +284,62 @@ class PlaylistCreator:
         )
         
         # Add tracks in batches
-        for i in range(0, len(track_ids), 100):
-            batch = track_ids[i:i+100]
-            self.client.add_tracks_to_playlist(playlist["id"], batch)
+        self._add_tracks(playlist["id"], track_ids)
         
         return {
             "playlist": playlist,
             "tracks_added": len(track_ids),
+            "duration_ms": duration_ms,
             "lyric_keywords": lyric_keywords
         }
     
+    @_budgeted
     def create_from_song_list(self, song_list: List[str], playlist_name: str,
-                             playlist_description: str = "", public: bool = True) -> Dict[str, Any]:
+                             playlist_description: str = "", public: bool = True,
+                             sequence: Union[str, Any] = None,
+                             min_score: float = 0.55,
+                             max_workers: int = 4) -> Dict[str, Any]:
         """
         Create playlist from specific song list.
         
+        Each line ("Artist - Title", "Title by Artist", a Spotify URL or a
+        plain query) is resolved with fuzzy matching over a few search
+        candidates rather than taking the first result.
+        
         Args:
             song_list: List of song names or search queries
             playlist_name: Playlist name
             playlist_description: Optional description
             public: Make playlist public
+            sequence: Energy curve name or PlaylistSequencer to order tracks
+                      by audio features (keeps search order if None)
+            min_score: Minimum match score (0-1) to accept a candidate
+            max_workers: Maximum concurrent searches
             
         Returns:
             Playlist data with found tracks and missing songs
         """
+        from track_matcher import TrackMatcher
+        
+        matcher = TrackMatcher(self.client, min_score=min_score)
         track_ids = []
         not_found = []
         
-        # Search for each song
-        for song_query in song_list:
-            results = self.client.search_tracks(query=song_query, limit=1)
-            if results:
-                track_ids.append(results[0]["id"])
-            else:
-                not_found.append(song_query)
+        with self._collecting(len(song_list), sequence):
+            # Matches stream in, so those found before a budget runs out are kept
+            for song_query, match in zip(song_list, matcher.iter_matches(song_list, max_workers)):
+                if match:
+                    track_ids.append(match["track"]["id"])
+                else:
+                    not_found.append(song_query)
+        # Lines left unresolved when the budget ran out
+        not_found.extend(song_list[len(track_ids) + len(not_found):])
         
         if not track_ids:
             raise ValueError(f"No tracks found from song list")
         
+        track_ids = self._sequence_tracks(track_ids, sequence)
+        
         # Create playlist
         playlist = self.client.create_playlist(
             name=playlist_name,
@@ -221,9 +348,7 @@ class PlaylistCreator:
         )
         
         # Add tracks in batches
-        for i in range(0, len(track_ids), 100):
-            batch = track_ids[i:i+100]
-            self.client.add_tracks_to_playlist(playlist["id"], batch)
+        self._add_tracks(playlist["id"], track_ids)
         
         return {
             "playlist": playlist,
@@ -233,40 +358,107 @@ class PlaylistCreator:
             "not_found_songs": not_found if not_found else None
         }
     
+    @_budgeted
+    def create_from_song_file(self, path: str, playlist_name: str = None,
+                              playlist_description: str = "", public: bool = True,
+                              playlist_id: str = None, format: str = None,
+                              checkpoint_path: str = None, report_path: str = None,
+                              resume: bool = True, max_workers: int = 8) -> Dict[str, Any]:
+        """
+        Create (or append to) a playlist from a song file.
+        
+        The file is streamed, so imports of tens of thousands of lines use
+        constant memory; progress is checkpointed after every written batch
+        and unmatched lines go to a CSV report.
+        
+        Args:
+            path: CSV, M3U/M3U8, JSON lines or plain text song file
+            playlist_name: Playlist name (defaults to the file name)
+            playlist_description: Optional description
+            public: Make playlist public
+            playlist_id: Append to this playlist instead of creating one
+            format: File format (detected from the suffix if None)
+            checkpoint_path: Progress file (default: <path>.checkpoint.json)
+            report_path: Not-found report (default: <path>.not_found.csv)
+            resume: Continue an interrupted import of the same file
+            max_workers: Maximum concurrent searches
+            
+        Returns:
+            Import summary with playlist ID, counts and report path
+        """
+        from song_import import SongImporter
+        
+        importer = SongImporter(self.client, max_workers=max_workers)
+        return importer.run(
+            path,
+            playlist_id=playlist_id,
+            playlist_name=playlist_name,
+            playlist_description=playlist_description,
+            public=public,
+            format=format,
+            checkpoint_path=checkpoint_path,
+            report_path=report_path,
+            resume=resume
+        )
+    
+    @_budgeted
     def create_from_recommendations(self, playlist_name: str,
                                    seed_artists: List[str] = None,
                                    seed_tracks: List[str] = None,
                                    seed_genres: List[str] = None,
                                    playlist_description: str = "",
                                    public: bool = True,
-                                   limit: int = 100) -> Dict[str, Any]:
+                                   limit: int = 100,
+                                   sequence: Union[str, Any] = None,
+                                   target_duration_ms: int = None,
+                                   duration_tolerance_ms: int = 30000,
+                                   cache_path: str = None) -> Dict[str, Any]:
         """
         Create playlist from Spotify recommendations.
         
+        Any number of seeds is accepted: they are split into groups of 5
+        and requested concurrently, then merged by how often each track
+        was recommended.
+        
         Args:
             playlist_name: Playlist name
-            seed_artists: Artist IDs (max 5)
-            seed_tracks: Track IDs (max 5)
-            seed_genres: Genres (max 5)
+            seed_artists: Artist IDs
+            seed_tracks: Track IDs
+            seed_genres: Genres
             playlist_description: Optional description
             public: Make playlist public
-            limit: Number of recommendations (max 100)
+            limit: Number of recommendations
+            sequence: Energy curve name or PlaylistSequencer to order tracks
+                      by audio features (keeps search order if None)
+            target_duration_ms: Total playlist length to aim for; picks the
+                                most popular tracks that fit (overrides limit)
+            duration_tolerance_ms: Allowed deviation from target_duration_ms
+            cache_path: JSON file caching responses per seed group
             
         Returns:
             Playlist data with track count
         """
-        # Get recommendations
-        recommended_tracks = self.client.get_recommendations(
-            seed_artists=seed_artists,
-            seed_tracks=seed_tracks,
-            seed_genres=seed_genres,
-            limit=min(limit, 100)
-        )
+        from recommendations import RecommendationAggregator
+        
+        # Get recommendations (a larger pool gives duration targets room)
+        aggregator = RecommendationAggregator(self.client, cache_path=cache_path)
+        recommended_tracks = []
+        with self._collecting(limit, sequence):
+            recommended_tracks = aggregator.recommend(
+                seed_artists=seed_artists,
+                seed_tracks=seed_tracks,
+                seed_genres=seed_genres,
+                limit=max(limit, 200) if target_duration_ms else limit
+            )
+        self._budget_exhausted |= aggregator.budget_exhausted
         
         if not recommended_tracks:
             raise ValueError("No recommendations found for provided seeds")
         
-        track_ids = [t["id"] for t in recommended_tracks]
+        selected, duration_ms = self._select_tracks(
+            recommended_tracks, limit, target_duration_ms, duration_tolerance_ms, sequence
+        )
+        track_ids = self._sequence_tracks([t["id"] for t in selected], sequence)
         
         # Create playlist
         playlist = self.client.create_playlist(
@@ -276,11 +468,14 @@ class PlaylistCreator:
         )
         
         # Add tracks
-        self.client.add_tracks_to_playlist(playlist["id"], track_ids)
+        self._add_tracks(playlist["id"], track_ids)
         
         return {
             "playlist": playlist,
             "tracks_added": len(track_ids),
+            "duration_ms": duration_ms,
+            # Tracks the recommendations fell short of the requested pool
+            "shortfall": aggregator.shortfall,
             "recommendation_seeds": {
                 "artists": seed_artists or [],
                 "tracks": seed_tracks or [],
@@ -288,6 +483,448 @@ class PlaylistCreator:
             }
         }
     
+    @_budgeted
+    def create_from_genres(self, genre_query: str, playlist_name: str = None,
+                           playlist_description: str = "", public: bool = True,
+                           limit: int = 100, sequence: Union[str, Any] = None,
+                           target_duration_ms: int = None,
+                           duration_tolerance_ms: int = 30000,
+                           index_path: str = None, refresh: bool = True) -> Dict[str, Any]:
+        """
+        Create playlist from saved tracks whose artists match a genre query.
+        
+        Uses a local genre index of the library, refreshed incrementally,
+        so queries like '(jazz OR soul) AND NOT smooth' need no per-artist
+        lookups.
+        
+        Args:
+            genre_query: Boolean genre query (AND, OR, NOT, parentheses;
+                         bare words match within genres, quotes match exactly)
+            playlist_name: Playlist name (defaults to the query)
+            playlist_description: Optional description
+            public: Make playlist public
+            limit: Maximum tracks to add
+            sequence: Energy curve name or PlaylistSequencer to order tracks
+                      by audio features (keeps newest-saved first if None)
+            target_duration_ms: Total playlist length to aim for (overrides limit)
+            duration_tolerance_ms: Allowed deviation from target_duration_ms
+            index_path: JSON file for the genre index (rebuilt each call if None)
+            refresh: Pick up newly saved tracks before querying
+            
+        Returns:
+            Playlist data with track count and matched artists
+        """
+        from genre_index import GenreIndex
+        
+        index = GenreIndex(index_path)
+        if refresh or not index.tracks:
+            with self._collecting(limit, sequence):
+                index.refresh(self.client)
+        
+        candidates = index.query_tracks(genre_query)
+        selected, duration_ms = self._select_tracks(
+            candidates, limit, target_duration_ms, duration_tolerance_ms, sequence
+        )
+        track_ids = self._sequence_tracks([t["id"] for t in selected], sequence)
+        
+        if not track_ids:
+            raise ValueError(f"No saved tracks match genre query: {genre_query}")
+        
+        playlist = self.client.create_playlist(
+            name=playlist_name or genre_query,
+            description=playlist_description,
+            public=public
+        )
+        
+        self._add_tracks(playlist["id"], track_ids)
+        
+        return {
+            "playlist": playlist,
+            "tracks_added": len(track_ids),
+            "duration_ms": duration_ms,
+            "genre_query": genre_query,
+            "artists_matched": len(index.query_artists(genre_query))
+        }
+    
+    @_budgeted
+    def create_from_library(self, playlist_name: str, mirror_path: str,
+                            playlist_description: str = "", public: bool = True,
+                            source_playlist_id: str = None, artist: str = None,
+                            genre: str = None, added_since: str = None,
+                            min_popularity: int = None, limit: int = 100,
+                            sequence: Union[str, Any] = None,
+                            target_duration_ms: int = None,
+                            duration_tolerance_ms: int = 30000,
+                            sync: bool = True) -> Dict[str, Any]:
+        """
+        Create playlist from tracks selected in the local library mirror.
+        
+        Candidate selection is a SQLite query; the only API calls are the
+        incremental mirror sync (skip it with sync=False) and the writes.
+        
+        Args:
+            playlist_name: Name for new playlist
+            mirror_path: SQLite file of the library mirror
+            playlist_description: Optional description
+            public: Make playlist public
+            source_playlist_id: Select from this playlist instead of saved tracks
+            artist: Only tracks by this artist (name or ID)
+            genre: Only tracks whose artists have a genre containing this
+            added_since: Only tracks added at or after this ISO timestamp
+            min_popularity: Minimum track popularity
+            limit: Maximum tracks to add
+            sequence: Energy curve name or PlaylistSequencer to order tracks
+                      by audio features (keeps newest-added first if None)
+            target_duration_ms: Total playlist length to aim for (overrides limit)
+            duration_tolerance_ms: Allowed deviation from target_duration_ms
+            sync: Bring the mirror up to date first
+            
+        Returns:
+            Playlist data with track count and the mirror sync summary
+        """
+        from library_mirror import LibraryMirror
+        
+        with LibraryMirror(mirror_path) as mirror:
+            synced = {}
+            if sync:
+                with self._collecting(limit, sequence):
+                    synced = mirror.sync(self.client)
+            candidates = mirror.select_tracks(
+                playlist_id=source_playlist_id, artist=artist, genre=genre,
+                added_since=added_since, min_popularity=min_popularity
+            )
+        
+        selected, duration_ms = self._select_tracks(
+            candidates, limit, target_duration_ms, duration_tolerance_ms, sequence
+        )
+        track_ids = self._sequence_tracks([t["id"] for t in selected], sequence)
+        
+        if not track_ids:
+            raise ValueError("No mirrored tracks match the selection")
+        
+        playlist = self.client.create_playlist(
+            name=playlist_name,
+            description=playlist_description,
+            public=public
+        )
+        
+        self._add_tracks(playlist["id"], track_ids)
+        
+        return {
+            "playlist": playlist,
+            "tracks_added": len(track_ids),
+            "duration_ms": duration_ms,
+            "candidates": len(candidates),
+            "synced": synced
+        }
+    
+    @_budgeted
+    def create_from_artist_graph(self, artist_name: str, playlist_name: str = None,
+                                 playlist_description: str = "", public: bool = True,
+                                 depth: int = 2, max_artists: int = 50,
+                                 tracks_per_artist: int = 3, limit: int = 100,
+                                 request_budget: int = 200, max_workers: int = 8,
+                                 cache_path: str = None,
+                                 sequence: Union[str, Any] = None,
+                                 target_duration_ms: int = None,
+                                 duration_tolerance_ms: int = 30000) -> Dict[str, Any]:
+        """
+        Create an "artist radio" playlist from the related-artists graph.
+        
+        Crawls related artists breadth-first from the seed artist, then
+        samples each artist's top tracks, closest artists first.
+        
+        Args:
+            artist_name: Name of the seed artist
+            playlist_name: Playlist name (defaults to "<artist> Radio")
+            playlist_description: Optional description
+            public: Make playlist public
+            depth: Related-artist hops to expand
+            max_artists: Maximum artists in the graph
+            tracks_per_artist: Top tracks sampled per artist
+            limit: Maximum tracks to add
+            request_budget: Maximum API calls for crawling and track sampling
+            max_workers: Maximum concurrent API requests
+            cache_path: JSON file for the related-artists cache
+            sequence: Energy curve name or PlaylistSequencer to order tracks
+                      by audio features (keeps graph order if None)
+            target_duration_ms: Total playlist length to aim for (overrides limit)
+            duration_tolerance_ms: Allowed deviation from target_duration_ms
+            
+        Returns:
+            Playlist data with track count and graph size
+        """
+        from artist_graph import ArtistGraphCrawler, fetch_top_tracks
+        
+        artists = self.client.search_artists(query=artist_name, limit=1)
+        if not artists:
+            raise ValueError(f"Artist '{artist_name}' not found")
+        
+        seed = artists[0]
+        graph, sampled_artists, top_tracks = None, [], {}
+        with self._collecting(limit, sequence):
+            # Clamp to what is left once the calls for writing are held back
+            if self.client.remaining_requests is not None:
+                request_budget = min(request_budget, self.client.remaining_requests)
+            crawler = ArtistGraphCrawler(
+                self.client,
+                max_workers=max_workers,
+                request_budget=request_budget,
+                cache_path=cache_path
+            )
+            graph = crawler.crawl([seed["id"]], depth=depth, max_artists=max_artists,
+                                  seed_names={seed["id"]: seed.get("name", "")})
+            
+            # Spend the remaining budget on top tracks, nearest artists first
+            remaining = max(0, request_budget - crawler.requests_made)
+            sampled_artists = graph.artist_ids[:remaining]
+            top_tracks = fetch_top_tracks(self.client, sampled_artists, max_workers=max_workers)
+        
+        # Round-robin over artists so no single artist dominates the start
+        picks = [
+            sorted(top_tracks.get(a, []), key=lambda t: t.get("popularity", 0),
+                   reverse=True)[:tracks_per_artist]
+            for a in sampled_artists
+        ]
+        all_tracks = []
+        track_ids_set = set()
+        for rank in range(tracks_per_artist):
+            for tracks in picks:
+                if rank < len(tracks) and tracks[rank]["id"] not in track_ids_set:
+                    all_tracks.append(tracks[rank])
+                    track_ids_set.add(tracks[rank]["id"])
+        
+        selected, duration_ms = self._select_tracks(
+            all_tracks, limit, target_duration_ms, duration_tolerance_ms, sequence
+        )
+        track_ids = self._sequence_tracks([t["id"] for t in selected], sequence)
+        
+        if not track_ids:
+            raise ValueError(f"No tracks found around artist '{artist_name}'")
+        
+        playlist_name = playlist_name or f"{seed['name']} Radio"
+        if not playlist_description:
+            playlist_description = f"{seed['name']} and related artists"
+        
+        playlist = self.client.create_playlist(
+            name=playlist_name,
+            description=playlist_description,
+            public=public
+        )
+        
+        self._add_tracks(playlist["id"], track_ids)
+        
+        return {
+            "playlist": playlist,
+            "tracks_added": len(track_ids),
+            "duration_ms": duration_ms,
+            "artist": seed["name"],
+            "artists_in_graph": len(graph) if graph else 0,
+            "artists_sampled": len(sampled_artists)
+        }
+    
+    @_budgeted
+    def reorder_playlist(self, playlist_id: str, sequence: Union[str, Any] = "ramp_up",
+                         allow_replace: bool = True) -> Dict[str, Any]:
+        """
+        Reorder an existing playlist by audio features.
+        
+        Applies the new order with the fewest API calls: tracks already in a
+        longest in-order run stay put and the rest are moved, or the playlist
+        is rewritten in 100-track batches when that takes fewer calls.
+        
+        Args:
+            playlist_id: Spotify playlist ID
+            sequence: Energy curve name or PlaylistSequencer
+            allow_replace: Allow rewriting the playlist (resets added_at dates)
+            
+        Returns:
+            Reorder summary with method used and API calls made
+        """
+        from playlist_sync import UNAVAILABLE, plan_reorder
+        
+        snapshot_id = self.client.get_playlist(playlist_id, fields="snapshot_id").get("snapshot_id")
+        items = self.client.iter_playlist_tracks(playlist_id, fields="items(track(id,uri)),total")
+        current = [(item.get("track") or {}) for item in items]
+        # Unavailable (null) tracks keep a placeholder so every position
+        # matches the server's; they stay behind the sequenced tracks
+        uris = [track.get("uri") or f"{UNAVAILABLE}{i}" for i, track in enumerate(current)]
+        
+        # Sequence each track once; duplicates and tracks without
+        # features follow in their current order
+        track_ids = [track["id"] for track in current if track.get("id")]
+        ordered = self._sequence_tracks(list(dict.fromkeys(track_ids)), sequence)
+        position_by_id = {}
+        for position, track in enumerate(current):
+            position_by_id.setdefault(track.get("id"), position)
+        first = [position_by_id[t] for t in ordered]
+        chosen = set(first)
+        target = [uris[p] for p in first] + [
+            uri for p, uri in enumerate(uris) if p not in chosen
+        ]
+        
+        moves = plan_reorder(uris, target)
+        replace_calls = math.ceil(len(target) / 100)
+        can_replace = all(uri and uri.startswith("spotify:track:") for uri in uris)
+        use_replace = allow_replace and can_replace and replace_calls < len(moves)
+        
+        # Never start writing an order the budget cannot finish
+        needed = replace_calls if use_replace else len(moves)
+        remaining = self.client.remaining_requests
+        if remaining is not None and needed > remaining:
+            raise RequestBudgetExceeded(f"Reorder needs {needed} calls, {remaining} left")
+        
+        if use_replace:
+            new_ids = [uri.split(":")[-1] for uri in target]
+            result = self.client.replace_playlist_tracks(playlist_id, new_ids[:100])
+            self._add_tracks(playlist_id, new_ids[100:])
+            return {
+                "playlist_id": playlist_id,
+                "method": "replace",
+                "api_calls": replace_calls,
+                "tracks": len(target),
+                "snapshot_id": result.get("snapshot_id")
+            }
+        
+        for move in moves:
+            result = self.client.reorder_playlist_tracks(
+                playlist_id, snapshot_id=snapshot_id, **move
+            )
+            snapshot_id = result.get("snapshot_id", snapshot_id)
+        
+        return {
+            "playlist_id": playlist_id,
+            "method": "reorder",
+            "api_calls": len(moves),
+            "tracks": len(target),
+            "snapshot_id": snapshot_id
+        }
+    
+    @_budgeted
+    def sync_playlist(self, playlist_id: str, desired_track_ids: List[str],
+                      allow_replace: bool = False,
+                      previous: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Update an existing playlist to exactly the desired tracks.
+        
+        Only the differences are applied (batched removals, moves and
+        insertions), so rerunning a job does not duplicate anything.
+        
+        Args:
+            playlist_id: Spotify playlist ID
+            desired_track_ids: Track IDs in desired order
+            allow_replace: Allow a full rewrite when it takes fewer calls
+            previous: Result of the last sync (skips re-reading unchanged playlists)
+            
+        Returns:
+            Sync summary with counts and API calls made
+        """
+        from playlist_sync import sync_playlist
+        
+        if self.client.remaining_requests is not None:
+            # Plan first so a partial sync never happens; the plan is reused
+            plan = sync_playlist(self.client, playlist_id, desired_track_ids,
+                                 allow_replace=allow_replace, previous=previous,
+                                 dry_run=True)
+            needed = plan["api_calls"] + 1
+            remaining = self.client.remaining_requests
+            if needed > remaining:
+                raise RequestBudgetExceeded(f"Sync needs {needed} calls, {remaining} left")
+            previous = plan
+        
+        return sync_playlist(self.client, playlist_id, desired_track_ids,
+                             allow_replace=allow_replace, previous=previous)
+    
+    def _select_tracks(self, tracks: List[Dict], limit: int,
+                       target_duration_ms: int = None,
+                       duration_tolerance_ms: int = 30000,
+                       sequence: Union[str, Any] = None,
+                       duration_value: str = "popularity") -> tuple:
+        """
+        Pick tracks by count, or by total duration if a target is given.
+        
+        Under a request budget, the selection is cut to what the remaining
+        calls can still sequence and write.
+        
+        Args:
+            duration_value: What duration targets maximize: "popularity", or
+                            "relevance" when tracks are already ranked
+        
+        Returns:
+            (selected tracks, total duration in ms)
+        """
+        if not target_duration_ms:
+            selected = tracks[:limit]
+        else:
+            from duration_selector import select_by_duration
+            selected, _ = select_by_duration(tracks, target_duration_ms, duration_tolerance_ms,
+                                             value=duration_value)
+        
+        writable = self._writable_tracks(sequence)
+        if writable is not None and len(selected) > writable:
+            selected = selected[:writable]
+            self._budget_exhausted = True
+        return selected, sum(t.get("duration_ms") or 0 for t in selected)
+    
+    def _writable_tracks(self, sequence: Union[str, Any] = None) -> Optional[int]:
+        """Tracks the remaining budget can write (None if unlimited)."""
+        remaining = self.client.remaining_requests
+        if remaining is None:
+            return None
+        # Creating the playlist takes two calls (current user, create)
+        calls_per_batch = 2 if sequence else 1
+        return max(0, (remaining - 2) // calls_per_batch * 100)
+    
+    @contextmanager
+    def _collecting(self, tracks_to_write: int, sequence: Union[str, Any] = None):
+        """
+        Collect candidates while holding back the calls needed to write them.
+        
+        Under a request budget, running out of calls ends the with block
+        early and the builder continues with the candidates found so far.
+        """
+        budget = self.client.request_budget
+        if budget is None:
+            yield
+            return
+        
+        reserve = 0
+        if tracks_to_write:
+            # Enough to write everything, but never more than half the
+            # budget; _select_tracks trims to what is actually left
+            per_batch = 2 if sequence else 1
+            reserve = 2 + math.ceil(tracks_to_write / 100) * per_batch
+            reserve = min(reserve, max(2 + per_batch, budget // 2))
+        self.client.request_budget = max(self.client.request_count, budget - reserve)
+        try:
+            yield
+        except RequestBudgetExceeded:
+            self._budget_exhausted = True
+        finally:
+            self.client.request_budget = budget
+    
+    def _sequence_tracks(self, track_ids: List[str],
+                         sequence: Union[str, Any] = None) -> List[str]:
+        """Order track IDs by audio features if a sequence was requested."""
+        if not sequence or len(track_ids) < 3:
+            return track_ids
+        
+        from audio_features import AudioFeatureMatrix
+        from playlist_sequencer import PlaylistSequencer
+        
+        sequencer = sequence
+        if not isinstance(sequencer, PlaylistSequencer):
+            sequencer = PlaylistSequencer(curve=sequence)
+        
+        matrix = AudioFeatureMatrix.fetch(self.client, track_ids)
+        return sequencer.sequence(matrix, track_ids)
+    
+    def _add_tracks(self, playlist_id: str, track_ids: List[str]) -> None:
+        """Add tracks in batches (Spotify limit is 100 per request)."""
+        for i in range(0, len(track_ids), 100):
+            batch = track_ids[i:i+100]
+            self.client.add_tracks_to_playlist(playlist_id, batch)
+    
     def add_playlist_artwork(self, playlist_id: str, image_base64: str) -> None:
         """
         Add cover image to playlist (if supported by API).
@@ -298,27 +935,27 @@ class PlaylistCreator:
         # This would require additional implementation
         pass
     
+    @_budgeted
     def get_playlist_stats(self, playlist_id: str) -> Dict[str, Any]:
-        """Get statistics about a playlist."""
-        playlist = self.client.get_playlist(playlist_id)
-        tracks = self.client.get_playlist_tracks(playlist_id, limit=1)
-        total_tracks = playlist.get("tracks", {}).get("total", 0)
-        
-        # Get all tracks to calculate duration
-        all_tracks = []
-        offset = 0
-        while offset < total_tracks:
-            batch = self.client.get_playlist_tracks(
-                playlist_id,
-                limit=50,
-                offset=offset
-            )
-            all_tracks.extend(batch)
-            offset += 50
+        """
+        Get statistics about a playlist.
         
-        total_duration_ms = sum(
-            t.get("track", {}).get("duration_ms", 0) for t in all_tracks
+        Item pages only carry track durations (100 per call). Under a
+        request budget, the duration covers the tracks read so far.
+        """
+        playlist = self.client.get_playlist(
+            playlist_id,
+            fields="name,public,collaborative,owner(display_name),followers(total),tracks(total)"
         )
+        total_tracks = playlist.get("tracks", {}).get("total", 0)
+        
+        # Read all tracks to calculate duration
+        total_duration_ms = 0
+        with self._collecting(0):
+            for item in self.client.iter_playlist_tracks(
+                playlist_id, fields="items(track(duration_ms)),total"
+            ):
+                total_duration_ms += (item.get("track") or {}).get("duration_ms") or 0
         
         return {
             "name": playlist.get("name"),
@@ -0,0 +1,267 @@
+"""
+Spotify Playlist Overlap Index
+
+Local inverted index from track ID / ISRC to the playlists containing it:
+- Built incrementally: only playlists whose snapshot_id changed are re-read
+- Fast queries: duplicate positions, Jaccard overlap, "which playlists have X"
+- Bulk dedupe with batched positional removals
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from spotify_client import SpotifyClient
+from playlist_sync import remove_positions
+
+
+# Projection used when reading playlist contents
+ITEM_FIELDS = "items(track(id,uri,external_ids(isrc))),total"
+
+
+class PlaylistIndex:
+    """Inverted index of playlist contents, persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize index.
+
+        Args:
+            path: JSON file to load from and save to (in-memory only if None)
+        """
+        self.path = Path(path) if path else None
+        self.playlists: Dict[str, Dict] = {}
+        self._by_track: Dict[str, Dict[str, List[int]]] = {}
+        self._by_isrc: Dict[str, Dict[str, List[int]]] = {}
+        if self.path and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for playlist_id, entry in json.load(f).get("playlists", {}).items():
+                    self._put(playlist_id, entry)
+
+    # Building
+
+    def refresh(self, client: SpotifyClient, playlist_ids: Iterable[str] = None,
+                max_workers: int = 4) -> Dict[str, int]:
+        """
+        Bring the index up to date, re-reading only changed playlists.
+
+        Args:
+            client: Authenticated Spotify client
+            playlist_ids: Restrict to these playlists (default: all of the
+                          user's playlists; ones no longer listed are dropped)
+            max_workers: Maximum concurrent playlist reads
+
+        Returns:
+            Counts of updated, unchanged and removed playlists
+        """
+        if playlist_ids is None:
+            listed = {p["id"]: p for p in client.iter_user_playlists() if p and p.get("id")}
+            removed = [p for p in self.playlists if p not in listed]
+        else:
+            listed = {}
+            for playlist_id in playlist_ids:
+                listed[playlist_id] = client.get_playlist(playlist_id, fields="id,name,snapshot_id")
+            removed = []
+
+        for playlist_id in removed:
+            self._drop(playlist_id)
+
+        stale = [
+            p for p in listed.values()
+            if self.playlists.get(p["id"], {}).get("snapshot_id") != p.get("snapshot_id")
+        ]
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stale)))) as pool:
+                contents = list(pool.map(
+                    lambda p: list(client.iter_playlist_tracks(p["id"], fields=ITEM_FIELDS)),
+                    stale
+                ))
+            for playlist, items in zip(stale, contents):
+                self.update_playlist(playlist["id"], playlist.get("snapshot_id"),
+                                     items, name=playlist.get("name"))
+
+        self.save()
+        return {
+            "updated": len(stale),
+            "unchanged": len(listed) - len(stale),
+            "removed": len(removed)
+        }
+
+    def update_playlist(self, playlist_id: str, snapshot_id: str, items: List[Dict],
+                        name: str = None):
+        """Replace one playlist's entry from raw playlist items."""
+        tracks = []
+        uris = []
+        isrcs = []
+        for item in items:
+            track = item.get("track") or {}
+            tracks.append(track.get("id"))
+            uris.append(track.get("uri"))
+            isrcs.append((track.get("external_ids") or {}).get("isrc"))
+
+        self._drop(playlist_id)
+        self._put(playlist_id, {
+            "name": name,
+            "snapshot_id": snapshot_id,
+            "tracks": tracks,
+            "uris": uris,
+            "isrcs": isrcs
+        })
+
+    def save(self):
+        """Write the index to disk (atomically) if a path is set."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"playlists": self.playlists}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def _put(self, playlist_id: str, entry: Dict):
+        """Add a playlist entry and its postings."""
+        self.playlists[playlist_id] = entry
+        for postings, keys in ((self._by_track, entry["tracks"]),
+                               (self._by_isrc, entry["isrcs"])):
+            for position, key in enumerate(keys):
+                if key:
+                    postings.setdefault(key, {}).setdefault(playlist_id, []).append(position)
+
+    def _drop(self, playlist_id: str):
+        """Remove a playlist entry and its postings."""
+        entry = self.playlists.pop(playlist_id, None)
+        if not entry:
+            return
+        for postings, keys in ((self._by_track, entry["tracks"]),
+                               (self._by_isrc, entry["isrcs"])):
+            for key in set(keys):
+                if key and key in postings:
+                    postings[key].pop(playlist_id, None)
+                    if not postings[key]:
+                        del postings[key]
+
+    # Queries
+
+    def _postings(self, by: str) -> Dict[str, Dict[str, List[int]]]:
+        if by == "id":
+            return self._by_track
+        if by == "isrc":
+            return self._by_isrc
+        raise ValueError("by must be 'id' or 'isrc'")
+
+    def _keys(self, playlist_id: str, by: str) -> List[Optional[str]]:
+        entry = self.playlists[playlist_id]
+        return entry["tracks"] if by == "id" else entry["isrcs"]
+
+    def playlists_containing(self, track_id: str = None, isrc: str = None) -> Dict[str, List[int]]:
+        """Playlists containing a track (by ID or ISRC), with positions."""
+        if isrc:
+            return {p: list(pos) for p, pos in self._by_isrc.get(isrc, {}).items()}
+        return {p: list(pos) for p, pos in self._by_track.get(track_id, {}).items()}
+
+    def duplicates(self, playlist_id: str, by: str = "id") -> Dict[str, List[int]]:
+        """Keys appearing more than once in a playlist, with all their positions."""
+        postings = self._postings(by)
+        return {
+            key: postings[key][playlist_id]
+            for key in set(self._keys(playlist_id, by))
+            if key and len(postings[key][playlist_id]) > 1
+        }
+
+    def track_set(self, playlist_id: str, by: str = "id") -> Set[str]:
+        """Distinct keys in a playlist."""
+        return {k for k in self._keys(playlist_id, by) if k}
+
+    def jaccard(self, playlist_a: str, playlist_b: str, by: str = "id") -> float:
+        """Jaccard similarity of two playlists' distinct tracks."""
+        a = self.track_set(playlist_a, by)
+        b = self.track_set(playlist_b, by)
+        if not a and not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def overlaps(self, playlist_id: str, by: str = "id",
+                 min_jaccard: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Playlists sharing tracks with one playlist, most similar first.
+
+        Only playlists reachable through shared postings are scored, so this
+        is fast even with hundreds of playlists.
+        """
+        postings = self._postings(by)
+        mine = self.track_set(playlist_id, by)
+        shared: Dict[str, int] = {}
+        for key in mine:
+            for other in postings[key]:
+                if other != playlist_id:
+                    shared[other] = shared.get(other, 0) + 1
+
+        results = []
+        for other, common in shared.items():
+            union = len(mine) + len(self.track_set(other, by)) - common
+            score = common / union if union else 0.0
+            if score >= min_jaccard:
+                results.append((other, score))
+        return sorted(results, key=lambda r: r[1], reverse=True)
+
+    def cross_playlist_duplicates(self, by: str = "id", min_playlists: int = 2) -> Dict[str, List[str]]:
+        """Tracks that appear in at least `min_playlists` playlists."""
+        postings = self._postings(by)
+        return {key: sorted(lists) for key, lists in postings.items()
+                if len(lists) >= min_playlists}
+
+    # Bulk operations
+
+    def dedupe(self, client: SpotifyClient, playlist_id: str, by: str = "id",
+               keep: str = "first", dry_run: bool = False) -> Dict:
+        """
+        Remove duplicate occurrences from a playlist with batched removals.
+
+        Args:
+            client: Authenticated Spotify client
+            playlist_id: Spotify playlist ID (must be indexed and current)
+            by: Treat tracks as duplicates by "id" or by "isrc"
+            keep: Keep the "first" or "last" occurrence
+            dry_run: Report what would be removed without changing anything
+
+        Returns:
+            Summary with removed positions and the new snapshot_id
+        """
+        entry = self.playlists[playlist_id]
+        positions = []
+        for key_positions in self.duplicates(playlist_id, by).values():
+            ordered = sorted(key_positions)
+            positions.extend(ordered[1:] if keep == "first" else ordered[:-1])
+        positions.sort()
+
+        summary = {
+            "playlist_id": playlist_id,
+            "removed": len(positions),
+            "positions": positions,
+            "api_calls": (len(positions) + 99) // 100,
+            "snapshot_id": entry["snapshot_id"]
+        }
+        if dry_run or not positions:
+            if not positions:
+                summary["api_calls"] = 0
+            return summary
+
+        snapshot_id = remove_positions(client, playlist_id, entry["uris"], positions,
+                                       snapshot_id=entry["snapshot_id"])
+
+        # Update locally instead of re-reading the playlist
+        drop = set(positions)
+        keep_items = [i for i in range(len(entry["tracks"])) if i not in drop]
+        self._drop(playlist_id)
+        self._put(playlist_id, {
+            "name": entry.get("name"),
+            "snapshot_id": snapshot_id,
+            "tracks": [entry["tracks"][i] for i in keep_items],
+            "uris": [entry["uris"][i] for i in keep_items],
+            "isrcs": [entry["isrcs"][i] for i in keep_items]
+        })
+        self.save()
+        summary["snapshot_id"] = snapshot_id
+        return summary
@@ -0,0 +1,302 @@
+"""
+Spotify Playlist Sequencer
+
+Reorders a set of tracks so a playlist follows a target energy (or tempo)
+curve while keeping transitions smooth:
+- Harmonic mixing: neighbours are kept close on the Camelot wheel
+- Tempo matching: small BPM jumps (half/double time counts as a match)
+- Energy curves: ramp up, ramp down, peak, valley, wave or custom
+
+Ordering is solved approximately with a greedy construction followed by
+windowed 2-opt, which handles thousands of tracks in well under a second.
+"""
+
+import math
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+try:
+    import numpy as np
+except ImportError as e:
+    print("Missing required dependencies. Install with:")
+    print("pip install numpy")
+    raise e
+
+from audio_features import AudioFeatureMatrix
+
+
+# Target curves over playlist progress t in [0, 1], returning 0-1 levels
+ENERGY_CURVES: Dict[str, Callable[["np.ndarray"], "np.ndarray"]] = {
+    "flat": lambda t: np.full_like(t, 0.5),
+    "ramp_up": lambda t: t,
+    "ramp_down": lambda t: 1.0 - t,
+    "peak": lambda t: np.sin(np.pi * t),
+    "valley": lambda t: 1.0 - np.sin(np.pi * t),
+    "wave": lambda t: 0.5 - 0.5 * np.cos(4 * np.pi * t),
+    "warmup_cooldown": lambda t: np.clip(np.minimum(t / 0.25, (1.0 - t) / 0.2), 0.0, 1.0),
+}
+
+# A tempo change of this fraction costs 1.0 (before weighting)
+TEMPO_TOLERANCE = 0.08
+
+
+def camelot_position(key: int, mode: int) -> Tuple[int, int]:
+    """
+    Map a Spotify key/mode pair to its Camelot wheel position.
+
+    Args:
+        key: Pitch class 0-11 (C=0), -1 if unknown
+        mode: 1 for major, 0 for minor
+
+    Returns:
+        (number 1-12, letter 0 for A/minor or 1 for B/major), or (0, 0) if unknown
+    """
+    if key is None or key < 0:
+        return (0, 0)
+    if mode == 1:
+        number = (8 + 7 * key) % 12
+        letter = 1
+    else:
+        # Minor keys share a number with their relative major
+        number = (8 + 7 * (key + 3)) % 12
+        letter = 0
+    return (number or 12, letter)
+
+
+def _harmonic_table() -> "np.ndarray":
+    """
+    Harmonic distance between all 24 key/mode combinations plus "unknown".
+
+    Index is key * 2 + mode (0-23); index 24 is unknown. Same key costs 0,
+    relative major/minor or a neighbour on the wheel costs 1.
+    """
+    table = np.zeros((25, 25))
+    positions = [camelot_position(i // 2, i % 2) for i in range(24)]
+    for a, (num_a, let_a) in enumerate(positions):
+        for b, (num_b, let_b) in enumerate(positions):
+            step = abs(num_a - num_b) % 12
+            step = min(step, 12 - step)
+            table[a, b] = step + (let_a != let_b)
+    table[24, :] = 1.0
+    table[:, 24] = 1.0
+    return table
+
+
+HARMONIC_DISTANCE = _harmonic_table()
+
+
+def _resolve_curve(curve: Union[str, Sequence[float], Callable, None],
+                   n: int) -> Optional["np.ndarray"]:
+    """Evaluate a named, sampled or callable curve at n evenly spaced points."""
+    if curve is None or n == 0:
+        return None
+    t = np.linspace(0.0, 1.0, n)
+    if isinstance(curve, str):
+        if curve not in ENERGY_CURVES:
+            raise ValueError(
+                f"Unknown curve '{curve}'. Available: {', '.join(ENERGY_CURVES)}"
+            )
+        return np.asarray(ENERGY_CURVES[curve](t), dtype=np.float64)
+    if callable(curve):
+        return np.asarray(curve(t), dtype=np.float64)
+
+    points = np.asarray(curve, dtype=np.float64)
+    if len(points) == 1:
+        return np.full(n, points[0])
+    return np.interp(t, np.linspace(0.0, 1.0, len(points)), points)
+
+
+class PlaylistSequencer:
+    """Order tracks along a target curve with smooth key/tempo transitions."""
+
+    def __init__(self, curve: Union[str, Sequence[float], Callable, None] = "ramp_up",
+                 curve_feature: str = "energy", curve_weight: float = 2.0,
+                 tempo_weight: float = 0.5, key_weight: float = 0.5,
+                 energy_weight: float = 1.0, window: int = 40,
+                 time_limit: float = 0.8):
+        """
+        Initialize sequencer.
+
+        Args:
+            curve: Curve name from ENERGY_CURVES, sampled 0-1 levels, callable
+                   over progress t in [0, 1], or None to only smooth transitions
+            curve_feature: Audio feature the curve applies to ("energy", "tempo", ...)
+            curve_weight: Cost of deviating from the curve
+            tempo_weight: Cost of tempo jumps between neighbours
+            key_weight: Cost of harmonic (Camelot) jumps between neighbours
+            energy_weight: Cost of energy jumps between neighbours
+            window: Longest segment the 2-opt pass will reverse
+            time_limit: Seconds allowed for solving; 2-opt stops early when
+                        the greedy construction has used up the budget
+        """
+        self.curve = curve
+        self.curve_feature = curve_feature
+        self.curve_weight = curve_weight
+        self.tempo_weight = tempo_weight
+        self.key_weight = key_weight
+        self.energy_weight = energy_weight
+        self.window = max(2, window)
+        self.time_limit = time_limit
+
+    def sequence(self, matrix: AudioFeatureMatrix,
+                 track_ids: Sequence[str] = None) -> List[str]:
+        """
+        Compute an ordering for tracks.
+
+        Args:
+            matrix: Audio features for the candidate tracks
+            track_ids: Tracks to order (defaults to every track in matrix);
+                       tracks without audio features keep their relative
+                       order and are appended at the end
+
+        Returns:
+            Track IDs in playlist order
+        """
+        if track_ids is None:
+            track_ids = matrix.track_ids
+        track_ids = list(dict.fromkeys(track_ids))
+        known = [t for t in track_ids if t in matrix]
+        unknown = [t for t in track_ids if t not in matrix]
+
+        if len(known) < 3:
+            return known + unknown
+
+        sub = matrix.take(known)
+        order = self.order(sub)
+        return [sub.track_ids[i] for i in order] + unknown
+
+    def order(self, matrix: AudioFeatureMatrix) -> List[int]:
+        """Compute an ordering as row indices into matrix."""
+        n = len(matrix)
+        deadline = time.perf_counter() + self.time_limit
+        self._prepare(matrix)
+        order = self._greedy(n)
+        order = self._two_opt(order, deadline)
+        return order.tolist()
+
+    def cost(self, matrix: AudioFeatureMatrix, track_ids: Sequence[str]) -> float:
+        """Total cost of a given ordering (lower is smoother)."""
+        sub = matrix.take(track_ids)
+        if len(sub) < 2:
+            return 0.0
+        self._prepare(sub)
+        order = np.arange(len(sub))
+        transitions = self._transition(order[:-1], order[1:]).sum()
+        return float(transitions + self._position_cost(order, order).sum())
+
+    # Cost model
+
+    def _prepare(self, matrix: AudioFeatureMatrix):
+        """Cache per-track arrays used by the cost functions."""
+        n = len(matrix)
+        energy = np.nan_to_num(matrix.column("energy"), nan=0.5)
+        tempo = matrix.column("tempo")
+        tempo = np.where(np.isfinite(tempo) & (tempo > 0), tempo,
+                         np.nanmedian(tempo) if np.isfinite(tempo).any() else 120.0)
+        key = np.nan_to_num(matrix.column("key"), nan=-1).astype(int)
+        mode = np.nan_to_num(matrix.column("mode"), nan=1).astype(int)
+
+        self._energy = energy
+        self._log_tempo = np.log2(tempo)
+        self._key_index = np.where(key >= 0, key * 2 + (mode == 1), 24)
+
+        target = _resolve_curve(self.curve, n)
+        if target is not None and self.curve_weight:
+            # Scale the 0-1 curve onto the range this candidate set can reach
+            level = matrix.normalized([self.curve_feature])[:, 0]
+            self._level = np.nan_to_num(level, nan=0.5)
+            self._target = target
+        else:
+            self._level = None
+            self._target = None
+
+    def _transition(self, a, b) -> "np.ndarray":
+        """Transition cost from track(s) a to track(s) b (vectorized)."""
+        octave = np.abs(self._log_tempo[a] - self._log_tempo[b]) % 1.0
+        tempo = np.minimum(octave, 1.0 - octave) / math.log2(1 + TEMPO_TOLERANCE)
+        return (
+            self.tempo_weight * np.minimum(tempo, 4.0)
+            + self.key_weight * HARMONIC_DISTANCE[self._key_index[a], self._key_index[b]]
+            + self.energy_weight * 10.0 * np.abs(self._energy[a] - self._energy[b])
+        )
+
+    def _position_cost(self, tracks, positions) -> "np.ndarray":
+        """Curve deviation cost of placing track(s) at position(s)."""
+        if self._target is None:
+            return np.zeros(np.shape(tracks))
+        return self.curve_weight * 10.0 * np.abs(self._level[tracks] - self._target[positions])
+
+    # Solver
+
+    def _greedy(self, n: int) -> "np.ndarray":
+        """Nearest-neighbour construction that also tracks the curve."""
+        order = np.empty(n, dtype=np.int64)
+        remaining = np.arange(n)
+
+        if self._target is not None:
+            current = int(np.argmin(np.abs(self._level - self._target[0])))
+        else:
+            # Start from the calmest track so the set opens gently
+            current = int(np.argmin(self._energy))
+
+        for position in range(n):
+            order[position] = current
+            # Swap-remove the chosen track so each step scans only what is left
+            size = n - position
+            slot = int(np.flatnonzero(remaining[:size] == current)[0])
+            remaining[slot] = remaining[size - 1]
+            if size == 1:
+                break
+            candidates = remaining[:size - 1]
+            cost = self._transition(current, candidates)
+            if self._target is not None:
+                cost = cost + self._position_cost(candidates, position + 1)
+            current = int(candidates[np.argmin(cost)])
+        return order
+
+    def _two_opt(self, order: "np.ndarray", deadline: float) -> "np.ndarray":
+        """Improve an ordering by reversing segments up to `window` long."""
+        n = len(order)
+        improved = True
+
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for i in range(1, n - 1):
+                length = min(self.window, n - i)
+                if length < 2:
+                    continue
+                segment = order[i:i + length]
+                prev = order[i - 1]
+
+                # Reversing order[i..k] replaces edges (i-1, i) and (k, k+1)
+                ks = np.arange(1, length)
+                ends = segment[ks]
+                delta = (self._transition(prev, ends)
+                         - self._transition(prev, segment[0]))
+                after = i + ks + 1
+                has_next = after < n
+                nxt = order[np.minimum(after, n - 1)]
+                delta += np.where(
+                    has_next,
+                    self._transition(segment[0], nxt) - self._transition(ends, nxt),
+                    0.0
+                )
+
+                if self._target is not None:
+                    # Curve cost of the reversed segment via anti-diagonal sums
+                    grid = self._position_cost(segment[:, None],
+                                               (i + np.arange(length))[None, :])
+                    flat = np.add.outer(np.arange(length), np.arange(length)).ravel()
+                    reversed_cost = np.bincount(flat, weights=grid.ravel(),
+                                                minlength=2 * length - 1)[:length]
+                    original_cost = np.cumsum(np.diagonal(grid))
+                    delta += (reversed_cost - original_cost)[ks]
+
+                best = int(np.argmin(delta))
+                if delta[best] < -1e-9:
+                    k = i + ks[best]
+                    order[i:k + 1] = order[i:k + 1][::-1].copy()
+                    improved = True
+
+                if time.perf_counter() >= deadline:
+                    break
+        return order
@@ -0,0 +1,347 @@
+"""
+Spotify Playlist Sync
+
+Idempotent, diff-based playlist updates instead of blind re-creation:
+- Reads current contents with a minimal field projection
+- Computes an edit script of removals, moves and insertions (LCS via
+  longest increasing subsequence over matched positions)
+- Picks the plan with the fewest API calls and applies it in batches,
+  threading snapshot_id through every positional change
+
+Rerunning a sync with the same desired tracks makes no changes.
+"""
+
+import bisect
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from spotify_client import SpotifyClient
+
+
+# Key prefix of unavailable (null-track) items, which have no URI
+UNAVAILABLE = "null:"
+
+
+def _longest_increasing_subsequence(values: Sequence[int]) -> List[int]:
+    """Indices into values forming a longest strictly increasing subsequence."""
+    tails = []
+    tail_index = []
+    parent = [-1] * len(values)
+    for i, value in enumerate(values):
+        pos = bisect.bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[pos] = value
+            tail_index[pos] = i
+        parent[i] = tail_index[pos - 1] if pos > 0 else -1
+
+    result = []
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        result.append(i)
+        i = parent[i]
+    return result[::-1]
+
+
+def plan_reorder(current: Sequence[str], target: Sequence[str]) -> List[Dict[str, int]]:
+    """
+    Plan the fewest reorder calls that turn one playlist order into another.
+
+    Tracks on a longest increasing subsequence stay put; every other run of
+    tracks is moved once, and runs that are already adjacent move together
+    in a single call.
+
+    Args:
+        current: Track IDs in current playlist order
+        target: The same track IDs (same multiset) in the desired order
+
+    Returns:
+        List of {"range_start", "insert_before", "range_length"} moves to apply
+        in sequence, using the playlist's positions at the time of each move
+    """
+    if sorted(current) != sorted(target):
+        raise ValueError("Target order must contain exactly the current tracks")
+
+    # Map each target slot to an original position, duplicates in order
+    slots: Dict[str, List[int]] = {}
+    for position, track_id in enumerate(current):
+        slots.setdefault(track_id, []).append(position)
+    for positions in slots.values():
+        positions.reverse()
+    wanted = [slots[track_id].pop() for track_id in target]
+
+    keep = {wanted[i] for i in _longest_increasing_subsequence(wanted)}
+    simulated = list(range(len(current)))
+    moves = []
+    j = 0
+    while j < len(wanted):
+        item = wanted[j]
+        if item in keep:
+            j += 1
+            continue
+
+        start = simulated.index(item)
+        length = 1
+        while (j + length < len(wanted) and wanted[j + length] not in keep
+               and start + length < len(simulated)
+               and simulated[start + length] == wanted[j + length]):
+            length += 1
+
+        insert_before = simulated.index(wanted[j - 1]) + 1 if j > 0 else 0
+        if insert_before != start:
+            moves.append({
+                "range_start": start,
+                "insert_before": insert_before,
+                "range_length": length
+            })
+            block = simulated[start:start + length]
+            del simulated[start:start + length]
+            if insert_before > start:
+                insert_before -= length
+            simulated[insert_before:insert_before] = block
+        j += length
+
+    return moves
+
+
+def _occurrence_keys(uris: Sequence[str]) -> List[Tuple[str, int]]:
+    """Make repeated items distinct: (uri, n-th occurrence)."""
+    counts: Dict[str, int] = {}
+    keys = []
+    for uri in uris:
+        counts[uri] = counts.get(uri, 0) + 1
+        keys.append((uri, counts[uri]))
+    return keys
+
+
+def _insertion_runs(desired: Sequence[str], present: Sequence[bool]) -> List[Tuple[int, List[str]]]:
+    """Contiguous runs of desired items still missing, as (position, uris) of up to 100."""
+    runs = []
+    i = 0
+    while i < len(desired):
+        if present[i]:
+            i += 1
+            continue
+        start = i
+        while i < len(desired) and not present[i] and i - start < 100:
+            i += 1
+        runs.append((start, list(desired[start:i])))
+    return runs
+
+
+def compute_edit_script(current: Sequence[str], desired: Sequence[str]) -> Dict[str, Any]:
+    """
+    Compute the cheapest edit script turning one item list into another.
+
+    Two plans are compared and the one needing fewer API calls wins:
+    - "move": remove items no longer wanted, move out-of-order ones, insert new
+    - "lcs": keep the longest common subsequence, remove and re-insert the rest
+
+    Unavailable items (see read_playlist_items) cannot be removed or
+    re-inserted by URI: keep them in desired (sync_playlist puts them
+    last) and the "lcs" plan is never chosen if it would drop one.
+
+    Args:
+        current: Item URIs in current playlist order
+        desired: Item URIs in desired order
+
+    Returns:
+        Dict with "strategy", "removals" (positions in the current playlist),
+        "moves" (see plan_reorder), "insertions" ((position, uris) runs applied
+        in order) and "api_calls"
+    """
+    current_keys = _occurrence_keys(current)
+    desired_keys = _occurrence_keys(desired)
+    desired_index = {key: i for i, key in enumerate(desired_keys)}
+
+    common = [p for p, key in enumerate(current_keys) if key in desired_index]
+    matched = [desired_index[current_keys[p]] for p in common]
+    in_lcs = {common[i] for i in _longest_increasing_subsequence(matched)}
+
+    def removal_calls(positions: List[int]) -> int:
+        return math.ceil(len(positions) / 100)
+
+    # Plan "move": keep every wanted item and fix order with moves
+    move_removals = [p for p, key in enumerate(current_keys) if key not in desired_index]
+    kept_order = [current_keys[p] for p in common]
+    target_order = sorted(kept_order, key=desired_index.__getitem__)
+    moves = plan_reorder(kept_order, target_order)
+    kept = set(kept_order)
+    present = [key in kept for key in desired_keys]
+    move_inserts = _insertion_runs(desired, present)
+    move_plan = {
+        "strategy": "move",
+        "removals": move_removals,
+        "moves": moves,
+        "insertions": move_inserts,
+        "api_calls": removal_calls(move_removals) + len(moves) + len(move_inserts)
+    }
+
+    # Plan "lcs": keep only the in-order common subsequence
+    lcs_removals = [p for p in range(len(current_keys)) if p not in in_lcs]
+    lcs_keys = {current_keys[p] for p in in_lcs}
+    lcs_inserts = _insertion_runs(desired, [key in lcs_keys for key in desired_keys])
+    lcs_plan = {
+        "strategy": "lcs",
+        "removals": lcs_removals,
+        "moves": [],
+        "insertions": lcs_inserts,
+        "api_calls": removal_calls(lcs_removals) + len(lcs_inserts)
+    }
+    if any(current[p].startswith(UNAVAILABLE) for p in lcs_removals):
+        return move_plan
+
+    return min((move_plan, lcs_plan), key=lambda plan: plan["api_calls"])
+
+
+def plan_sync(current: Sequence[str], desired_track_ids: Sequence[str],
+              allow_replace: bool = False) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Edit script sync_playlist would apply, and the item URIs it results in.
+
+    Args:
+        current: Item URIs in current playlist order (see read_playlist_items)
+        desired_track_ids: Track IDs in desired order
+        allow_replace: Consider rewriting the whole playlist
+
+    Returns:
+        (script, resulting item URIs); see compute_edit_script for the script
+    """
+    tracks = [f"spotify:track:{track_id}" for track_id in desired_track_ids]
+    # Unavailable items can only be moved, so they follow the desired tracks
+    desired = tracks + [uri for uri in current if uri.startswith(UNAVAILABLE)]
+    script = compute_edit_script(current, desired)
+    replace_calls = max(1, math.ceil(len(tracks) / 100))
+    if allow_replace and replace_calls < script["api_calls"]:
+        script = {"strategy": "replace", "removals": [], "moves": [],
+                  "insertions": [], "api_calls": replace_calls}
+        desired = tracks
+    return script, desired
+
+
+def read_playlist_items(client: SpotifyClient, playlist_id: str) -> Tuple[str, List[str]]:
+    """
+    Read a playlist's snapshot_id and item URIs with a minimal projection.
+
+    Unavailable items (null tracks) are listed as "null:<position>", so
+    positions in the list match the server's.
+    """
+    snapshot_id = client.get_playlist(playlist_id, fields="snapshot_id").get("snapshot_id")
+    items = client.iter_playlist_tracks(playlist_id, fields="items(track(uri)),total")
+    return snapshot_id, [(item.get("track") or {}).get("uri") or f"{UNAVAILABLE}{i}"
+                         for i, item in enumerate(items)]
+
+
+def remove_positions(client: SpotifyClient, playlist_id: str, uris: Sequence[str],
+                     positions: Sequence[int], snapshot_id: str = None) -> str:
+    """
+    Remove items at specific positions in batches of 100.
+
+    Args:
+        client: Authenticated Spotify client
+        playlist_id: Spotify playlist ID
+        uris: Current item URIs (positions index into this list)
+        positions: Positions to remove
+        snapshot_id: Playlist version the positions refer to
+
+    Returns:
+        The final snapshot_id
+    """
+    # Remove from the end first so earlier positions stay valid
+    positions = sorted(set(positions), reverse=True)
+    for i in range(0, len(positions), 100):
+        grouped: Dict[str, List[int]] = {}
+        for position in positions[i:i+100]:
+            grouped.setdefault(uris[position], []).append(position)
+        result = client.remove_playlist_items(
+            playlist_id,
+            [{"uri": uri, "positions": p} for uri, p in grouped.items()],
+            snapshot_id=snapshot_id
+        )
+        snapshot_id = result.get("snapshot_id", snapshot_id)
+    return snapshot_id
+
+
+def sync_playlist(client: SpotifyClient, playlist_id: str,
+                  desired_track_ids: Sequence[str], allow_replace: bool = False,
+                  previous: Optional[Dict[str, Any]] = None,
+                  dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Make a playlist contain exactly the desired tracks, in order.
+
+    Unavailable items cannot be removed by URI; they stay, after the
+    desired tracks, unless the whole playlist is replaced.
+
+    Args:
+        client: Authenticated Spotify client
+        playlist_id: Spotify playlist ID
+        desired_track_ids: Track IDs in desired order (duplicates allowed)
+        allow_replace: Allow rewriting the whole playlist when that takes
+                       fewer calls (resets added_at dates)
+        previous: Result of the last sync; if the playlist's snapshot_id is
+                  unchanged its contents are not re-read
+        dry_run: Compute the edit script without applying it
+
+    Returns:
+        Summary with counts, strategy, api_calls, the new snapshot_id and
+        the resulting track_uris (pass back as `previous` next time)
+    """
+    snapshot_id = client.get_playlist(playlist_id, fields="snapshot_id").get("snapshot_id")
+    if previous and previous.get("snapshot_id") == snapshot_id and "track_uris" in previous:
+        current = list(previous["track_uris"])
+    else:
+        _, current = read_playlist_items(client, playlist_id)
+
+    script, desired = plan_sync(current, desired_track_ids, allow_replace)
+
+    summary = {
+        "playlist_id": playlist_id,
+        "strategy": script["strategy"],
+        "removed": len(script["removals"]),
+        "moved": sum(m["range_length"] for m in script["moves"]),
+        "inserted": sum(len(uris) for _, uris in script["insertions"]),
+        "api_calls": script["api_calls"],
+        "unchanged": current == desired,
+        "snapshot_id": snapshot_id,
+        "track_uris": desired
+    }
+    if script["strategy"] == "replace":
+        summary.update(removed=len(current), inserted=len(desired), moved=0)
+    if dry_run or summary["unchanged"]:
+        if summary["unchanged"]:
+            summary["api_calls"] = 0
+        if dry_run:
+            summary["track_uris"] = current
+        return summary
+
+    summary["snapshot_id"] = _apply(client, playlist_id, script, current, desired, snapshot_id)
+    return summary
+
+
+def _apply(client: SpotifyClient, playlist_id: str, script: Dict[str, Any],
+           current: List[str], desired: List[str], snapshot_id: str) -> str:
+    """Apply an edit script, returning the final snapshot_id."""
+    ids = lambda uris: [uri.split(":")[-1] for uri in uris]
+
+    if script["strategy"] == "replace":
+        result = client.replace_playlist_tracks(playlist_id, ids(desired[:100]))
+        snapshot_id = result.get("snapshot_id", snapshot_id)
+        for i in range(100, len(desired), 100):
+            result = client.add_tracks_to_playlist(playlist_id, ids(desired[i:i+100]))
+            snapshot_id = result.get("snapshot_id", snapshot_id)
+        return snapshot_id
+
+    snapshot_id = remove_positions(client, playlist_id, current,
+                                   script["removals"], snapshot_id)
+
+    for move in script["moves"]:
+        result = client.reorder_playlist_tracks(playlist_id, snapshot_id=snapshot_id, **move)
+        snapshot_id = result.get("snapshot_id", snapshot_id)
+
+    for position, uris in script["insertions"]:
+        result = client.add_tracks_to_playlist(playlist_id, ids(uris), position=position)
+        snapshot_id = result.get("snapshot_id", snapshot_id)
+
+    return snapshot_id
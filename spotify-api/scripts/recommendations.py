@@ -0,0 +1,227 @@
+"""
+Spotify Recommendation Aggregator
+
+Works around the recommendations endpoint limits (5 seeds, 100 tracks per
+call) by fanning out:
+- Partitions any number of seeds into groups of up to 5
+- Requests each group concurrently (100 tracks per call)
+- Adds re-grouped rounds until enough unique tracks are found, then seeds
+  further rounds from the best tracks found so far
+- Merges results ranked by how many groups recommended a track and where
+- Caches responses per seed group in memory and optionally on disk
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from spotify_client import RequestBudgetExceeded, SpotifyClient, is_lookup_miss
+
+
+# Seed kinds map to get_recommendations keyword arguments
+SEED_KINDS = ("artist", "track", "genre")
+# New tracks expected from one group seeded with earlier results (the rest
+# of its 100 overlap with what was already found)
+EXPANSION_YIELD = 50
+
+
+def default_rounds(limit: int) -> int:
+    """Fan-out rounds allowed for `limit` tracks: the seed rounds plus expansion."""
+    return 2 + math.ceil(max(1, limit) / 100)
+
+
+class RecommendationAggregator:
+    """Merge recommendations from many seed groups into one ranked list."""
+
+    def __init__(self, client: SpotifyClient, max_workers: int = 8,
+                 group_size: int = 5, cache_path: Optional[str] = None,
+                 cache_ttl: float = 24 * 3600):
+        """
+        Initialize aggregator.
+
+        Args:
+            client: Authenticated Spotify client
+            max_workers: Maximum concurrent API requests
+            group_size: Seeds per request (Spotify allows at most 5)
+            cache_path: JSON file for cached responses (memory only if None)
+            cache_ttl: Seconds before a cached seed group is refetched
+        """
+        if not 1 <= group_size <= 5:
+            raise ValueError("group_size must be between 1 and 5")
+
+        self.client = client
+        self.max_workers = max(1, max_workers)
+        self.group_size = group_size
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.cache_ttl = cache_ttl
+        self.requests_made = 0
+        self.budget_exhausted = False
+        self.shortfall = 0
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Dict] = self._load_cache()
+
+    def recommend(self, seed_artists: Sequence[str] = None,
+                  seed_tracks: Sequence[str] = None,
+                  seed_genres: Sequence[str] = None,
+                  limit: int = 100, max_rounds: int = None,
+                  **tunables) -> List[Dict]:
+        """
+        Get up to `limit` recommended tracks from any number of seeds.
+
+        Once the groupings of the given seeds are used up, further rounds
+        are seeded with the best-ranked tracks found so far. If `limit` is
+        still not met, self.shortfall says by how many tracks.
+
+        Args:
+            seed_artists: Artist IDs
+            seed_tracks: Track IDs (never returned as recommendations)
+            seed_genres: Genres
+            limit: Number of tracks wanted
+            max_rounds: Maximum fan-out rounds (default_rounds(limit) if None)
+            **tunables: Audio feature parameters (min_energy, target_tempo, ...)
+
+        Returns:
+            Tracks ranked by recommendation frequency, then position score
+        """
+        seeds = (
+            [("artist", s) for s in dict.fromkeys(seed_artists or [])]
+            + [("track", s) for s in dict.fromkeys(seed_tracks or [])]
+            + [("genre", s) for s in dict.fromkeys(seed_genres or [])]
+        )
+        if not seeds:
+            raise ValueError("At least one seed is required")
+
+        self.requests_made = 0
+        self.budget_exhausted = False
+        exclude = set(seed_tracks or [])
+        tracks: Dict[str, Dict] = {}
+        frequency: Dict[str, int] = {}
+        score: Dict[str, float] = {}
+        requested = set()
+        used_seeds = set(seeds)
+
+        def ranked() -> List[str]:
+            return sorted(tracks, key=lambda t: (-frequency[t], -score[t]))
+
+        for round_number in range(max_rounds or default_rounds(limit)):
+            groups = [g for g in self._seed_groups(seeds, round_number)
+                      if frozenset(g) not in requested]
+            if not groups:
+                groups = self._expansion_groups(ranked(), used_seeds, limit - len(tracks))
+            if not groups:
+                break
+            requested.update(frozenset(g) for g in groups)
+
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as pool:
+                responses = list(pool.map(lambda g: self._fetch(g, tunables), groups))
+
+            for response in responses:
+                for rank, track in enumerate(response):
+                    track_id = track.get("id")
+                    if not track_id or track_id in exclude:
+                        continue
+                    tracks.setdefault(track_id, track)
+                    frequency[track_id] = frequency.get(track_id, 0) + 1
+                    score[track_id] = score.get(track_id, 0.0) + 1.0 - rank / max(len(response), 1)
+
+            if len(tracks) >= limit or self.budget_exhausted:
+                break
+
+        self._save_cache()
+        result = [tracks[t] for t in ranked()[:limit]]
+        self.shortfall = max(0, limit - len(result))
+        return result
+
+    def _seed_groups(self, seeds: List[Tuple[str, str]],
+                     round_number: int) -> List[List[Tuple[str, str]]]:
+        """
+        Seed groups for one fan-out round.
+
+        Round 0 partitions the seeds; later rounds shift the partition (many
+        seeds) or drop seeds from the group (few seeds) to draw new tracks.
+        """
+        size = self.group_size
+        if len(seeds) > size:
+            shift = (round_number * ((size + 1) // 2)) % len(seeds)
+            rotated = seeds[shift:] + seeds[:shift]
+            return [rotated[i:i + size] for i in range(0, len(rotated), size)]
+
+        subset_size = len(seeds) - round_number
+        if subset_size < 1:
+            return []
+        return [list(group) for group in combinations(seeds, subset_size)]
+
+    def _expansion_groups(self, ranked_ids: List[str], used_seeds: set,
+                          missing: int) -> List[List[Tuple[str, str]]]:
+        """
+        Seed groups made of the best-ranked tracks not used as seeds yet,
+        enough (up to max_workers groups) for the `missing` tracks.
+        """
+        if missing <= 0:
+            return []
+        wanted = self.expansion_group_count(missing) * self.group_size
+        fresh = [("track", t) for t in ranked_ids if ("track", t) not in used_seeds][:wanted]
+        used_seeds.update(fresh)
+        return [fresh[i:i + self.group_size] for i in range(0, len(fresh), self.group_size)]
+
+    def expansion_group_count(self, missing: int) -> int:
+        """Groups an expansion round requests to find `missing` more tracks."""
+        return min(self.max_workers, math.ceil(missing / EXPANSION_YIELD))
+
+    def _fetch(self, group: List[Tuple[str, str]], tunables: Dict) -> List[Dict]:
+        """Fetch (or load from cache) recommendations for one seed group."""
+        key = json.dumps([sorted(group), sorted(tunables.items())])
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry and time.time() - entry["fetched_at"] < self.cache_ttl:
+            return entry["tracks"]
+
+        kwargs = {f"seed_{kind}s": [value for k, value in group if k == kind] or None
+                  for kind in SEED_KINDS}
+        try:
+            tracks = self.client.get_recommendations(limit=100, **kwargs, **tunables)
+        except RequestBudgetExceeded:
+            # Keep what earlier groups found and stop fanning out
+            self.budget_exhausted = True
+            return []
+        except Exception as e:
+            # An unknown seed only empties this group; auth, rate-limit
+            # and network errors are not worth absorbing
+            if not is_lookup_miss(e):
+                raise
+            return []
+
+        with self._lock:
+            self.requests_made += 1
+            self._cache[key] = {"tracks": tracks, "fetched_at": time.time()}
+        return tracks
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        """Load cached responses from disk."""
+        if not self.cache_path or not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        """Persist cached responses, dropping expired entries."""
+        if not self.cache_path:
+            return
+        now = time.time()
+        with self._lock:
+            fresh = {k: v for k, v in self._cache.items()
+                     if now - v["fetched_at"] < self.cache_ttl}
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(fresh, f, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,402 @@
+"""
+Spotify Request Planner
+
+Estimates what a PlaylistCreator operation will cost before running it:
+- API calls (expected and worst case) from known page and batch sizes
+- Response bytes from typical object sizes
+- Duration from average latency and the operation's concurrency
+
+Estimates make no API calls; they are meant for dry runs and for choosing
+request budgets.
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Sequence
+
+
+# Typical response figures used for estimates
+AVERAGE_LATENCY_SECONDS = 0.25
+RESPONSE_OVERHEAD_BYTES = 400
+AVERAGE_TRACK_MS = 210000
+OBJECT_BYTES = {
+    "track": 2500,
+    "simplified_track": 900,
+    "artist": 900,
+    "album": 25000,
+    "simplified_album": 1300,
+    "playlist": 1500,
+    "playlist_item": 3300,
+    "projected_item": 120,
+    "audio_features": 650,
+    "user": 600,
+    "snapshot": 80,
+}
+
+# Page and batch sizes of the endpoints the builders use
+SEARCH_PAGE = 30
+THEME_SEARCH_PAGE = 50
+MAX_SEARCH_OFFSET = 1000
+PLAYLIST_PAGE = 100
+ALBUM_PAGE = 50
+SAVED_PAGE = 50
+ALBUM_BATCH = 20
+TRACK_BATCH = 50
+FEATURE_BATCH = 100
+WRITE_BATCH = 100
+TOP_TRACKS = 10
+RELATED_ARTISTS = 20
+
+# Assumed catalog shape where the real figure is only known at run time
+DEFAULT_ALBUMS_PER_ARTIST = 40
+DEFAULT_TRACKS_PER_ALBUM = 12
+UNIQUE_FRACTION = 0.7
+
+
+def batches(count: int, size: int) -> int:
+    """Number of calls to cover `count` items `size` at a time."""
+    return math.ceil(max(0, count) / size)
+
+
+class RequestPlan:
+    """Accumulates the steps of one operation into an estimate."""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.steps: List[Dict[str, Any]] = []
+        self.tracks = 0
+
+    def add(self, step: str, calls: int, objects: int = 0, kind: str = None,
+            max_calls: int = None, concurrency: int = 1):
+        """
+        Record one step.
+
+        Args:
+            step: Step name
+            calls: Expected API calls
+            objects: Objects returned in total
+            kind: Object kind (key of OBJECT_BYTES)
+            max_calls: Worst-case calls (defaults to calls)
+            concurrency: Requests in flight at once for this step
+        """
+        calls = max(0, int(calls))
+        self.steps.append({
+            "step": step,
+            "calls": calls,
+            "max_calls": max(calls, int(max_calls if max_calls is not None else calls)),
+            "bytes": calls * RESPONSE_OVERHEAD_BYTES + objects * OBJECT_BYTES.get(kind, 0),
+            "seconds": math.ceil(calls / max(1, concurrency)) * AVERAGE_LATENCY_SECONDS,
+        })
+
+    def add_writes(self, tracks: int, sequence: Any = None):
+        """Steps shared by every builder: optional sequencing, then create and fill."""
+        self.tracks = tracks
+        if sequence and tracks >= 3:
+            self.add("audio_features", batches(tracks, FEATURE_BATCH), tracks, "audio_features")
+        self.add("create_playlist", 2, 1, "playlist")
+        self.add("add_tracks", batches(tracks, WRITE_BATCH), batches(tracks, WRITE_BATCH), "snapshot")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "calls": sum(s["calls"] for s in self.steps),
+            "max_calls": sum(s["max_calls"] for s in self.steps),
+            "bytes": sum(s["bytes"] for s in self.steps),
+            "seconds": round(sum(s["seconds"] for s in self.steps), 2),
+            "tracks": self.tracks,
+            "steps": self.steps,
+        }
+
+
+def _target_tracks(limit: int, target_duration_ms: int = None) -> int:
+    """Tracks an operation will write (duration targets override limit)."""
+    if target_duration_ms:
+        return math.ceil(target_duration_ms / AVERAGE_TRACK_MS)
+    return limit
+
+
+def plan_create_from_artist(limit: int = 50, sequence: Any = None,
+                            target_duration_ms: int = None,
+                            full_discography: bool = False,
+                            albums: int = DEFAULT_ALBUMS_PER_ARTIST,
+                            max_workers: int = 8, **_) -> Dict[str, Any]:
+    """Estimate create_from_artist (albums: expected releases for full_discography)."""
+    plan = RequestPlan("create_from_artist")
+    plan.add("search_artist", 1, 1, "artist")
+    if full_discography:
+        tracks = albums * DEFAULT_TRACKS_PER_ALBUM
+        plan.add("artist_albums", batches(albums, ALBUM_PAGE), albums, "simplified_album")
+        plan.add("albums", batches(albums, ALBUM_BATCH), albums, "album", concurrency=max_workers)
+        plan.add("track_details", batches(tracks, TRACK_BATCH), tracks, "track",
+                 concurrency=max_workers)
+    else:
+        tracks = TOP_TRACKS
+        plan.add("top_tracks", 1, TOP_TRACKS, "track")
+    plan.add_writes(min(tracks, _target_tracks(limit, target_duration_ms)), sequence)
+    return plan.to_dict()
+
+
+def _plan_keyword_search(operation: str, keywords: Sequence[str], limit: int,
+                         sequence: Any, target_duration_ms: int) -> Dict[str, Any]:
+    plan = RequestPlan(operation)
+    wanted = _target_tracks(limit, target_duration_ms)
+    if target_duration_ms:
+        searches = len(keywords)
+    else:
+        searches = min(len(keywords), batches(wanted, int(SEARCH_PAGE * UNIQUE_FRACTION)))
+    plan.add("search_tracks", searches, searches * SEARCH_PAGE, "track",
+             max_calls=len(keywords))
+    found = int(searches * SEARCH_PAGE * UNIQUE_FRACTION)
+    plan.add_writes(min(wanted, found), sequence)
+    return plan.to_dict()
+
+
+def plan_create_from_theme(theme_keywords: Sequence[str] = (), limit: int = 100,
+                           sequence: Any = None, target_duration_ms: int = None,
+                           oversample: float = 3.0, **_) -> Dict[str, Any]:
+    """Estimate create_from_theme (paged searches for an oversampled pool per keyword)."""
+    plan = RequestPlan("create_from_theme")
+    keywords = list(dict.fromkeys(k for k in theme_keywords if k))
+    wanted = _target_tracks(limit, target_duration_ms)
+    if target_duration_ms:
+        wanted = math.ceil(target_duration_ms / 180000)
+    if keywords:
+        per_keyword = math.ceil(max(int(wanted * max(1.0, oversample)), 1) / len(keywords))
+        searches = len(keywords) * batches(min(per_keyword, MAX_SEARCH_OFFSET), THEME_SEARCH_PAGE)
+        plan.add("search_tracks", searches, searches * THEME_SEARCH_PAGE, "track",
+                 concurrency=8)
+        found = int(searches * THEME_SEARCH_PAGE * UNIQUE_FRACTION)
+        plan.add_writes(min(_target_tracks(limit, target_duration_ms), found), sequence)
+    return plan.to_dict()
+
+
+def plan_create_from_lyrics(lyric_keywords: Sequence[str] = (), limit: int = 100,
+                            sequence: Any = None, target_duration_ms: int = None,
+                            **_) -> Dict[str, Any]:
+    """Estimate create_from_lyrics (same search pattern as themes)."""
+    return _plan_keyword_search("create_from_lyrics", list(lyric_keywords), limit,
+                                sequence, target_duration_ms)
+
+
+def plan_create_from_song_list(song_list: Sequence[str] = (), sequence: Any = None,
+                               max_workers: int = 4, lines: int = None,
+                               operation: str = "create_from_song_list",
+                               **_) -> Dict[str, Any]:
+    """Estimate create_from_song_list (a structured search per line, plain fallback)."""
+    count = len(song_list) if lines is None else lines
+    plan = RequestPlan(operation)
+    plan.add("search_tracks", count, count * 10, "track", max_calls=2 * count,
+             concurrency=max_workers)
+    plan.add_writes(count, sequence)
+    return plan.to_dict()
+
+
+def plan_create_from_song_file(path: str = None, max_workers: int = 8,
+                               format: str = None, **kwargs) -> Dict[str, Any]:
+    """Estimate create_from_song_file by counting entries locally."""
+    from song_import import iter_song_lines
+    lines = sum(1 for line in iter_song_lines(path, format) if line) if path else 0
+    return plan_create_from_song_list(lines=lines, max_workers=max_workers,
+                                      operation="create_from_song_file", **kwargs)
+
+
+def plan_create_from_recommendations(seed_artists: Sequence[str] = None,
+                                     seed_tracks: Sequence[str] = None,
+                                     seed_genres: Sequence[str] = None,
+                                     limit: int = 100, sequence: Any = None,
+                                     target_duration_ms: int = None,
+                                     max_rounds: int = None, **_) -> Dict[str, Any]:
+    """
+    Estimate create_from_recommendations (fan-out over seed groups of 5,
+    then rounds seeded from earlier results).
+    """
+    from recommendations import EXPANSION_YIELD, RecommendationAggregator, default_rounds
+
+    seeds = ([("artist", s) for s in seed_artists or []]
+             + [("track", s) for s in seed_tracks or []]
+             + [("genre", s) for s in seed_genres or []])
+    plan = RequestPlan("create_from_recommendations")
+    wanted = max(limit, 200) if target_duration_ms else limit
+    aggregator = RecommendationAggregator(None)
+
+    calls = max_calls = 0
+    found = 0
+    requested = set()
+    for round_number in range(max_rounds or default_rounds(wanted)):
+        seed_groups = [frozenset(g) for g in aggregator._seed_groups(seeds, round_number)]
+        groups = len(set(seed_groups) - requested) if seeds else 0
+        requested.update(seed_groups)
+        if groups:
+            max_calls += groups
+            if found < wanted:
+                calls += groups
+                found += int(groups * 100 * UNIQUE_FRACTION)
+        elif seeds:
+            max_calls += aggregator.expansion_group_count(wanted)
+            if found < wanted:
+                groups = aggregator.expansion_group_count(wanted - found)
+                calls += groups
+                found += groups * EXPANSION_YIELD
+    plan.add("recommendations", calls, calls * 100, "track", max_calls=max_calls,
+             concurrency=8)
+    plan.add_writes(min(found, _target_tracks(limit, target_duration_ms)), sequence)
+    return plan.to_dict()
+
+
+def plan_create_from_artist_graph(depth: int = 2, max_artists: int = 50,
+                                  tracks_per_artist: int = 3, limit: int = 100,
+                                  request_budget: int = 200, max_workers: int = 8,
+                                  sequence: Any = None, target_duration_ms: int = None,
+                                  **_) -> Dict[str, Any]:
+    """Estimate create_from_artist_graph with an empty related-artists cache."""
+    plan = RequestPlan("create_from_artist_graph")
+    plan.add("search_artist", 1, 1, "artist")
+
+    # BFS level sizes; every level but the last is expanded
+    levels = [1]
+    for _level in range(depth):
+        levels.append(min(levels[-1] * RELATED_ARTISTS, max(0, max_artists - sum(levels))))
+    expanded = sum(levels[:depth])
+    discovered = sum(levels)
+    crawl = min(request_budget, expanded)
+    sampled = min(max(0, request_budget - crawl), min(max_artists, discovered))
+    plan.add("related_artists", crawl, crawl * RELATED_ARTISTS, "artist", concurrency=max_workers)
+    plan.add("top_tracks", sampled, sampled * TOP_TRACKS, "track", concurrency=max_workers)
+    plan.add_writes(min(sampled * tracks_per_artist, _target_tracks(limit, target_duration_ms)),
+                    sequence)
+    return plan.to_dict()
+
+
+def plan_create_from_genres(limit: int = 100, sequence: Any = None,
+                            target_duration_ms: int = None, new_tracks: int = 50,
+                            library_size: int = None, **_) -> Dict[str, Any]:
+    """
+    Estimate create_from_genres.
+
+    An incremental refresh reads `new_tracks` saved tracks; pass
+    library_size to estimate a first (full) build instead.
+    """
+    plan = RequestPlan("create_from_genres")
+    read = library_size if library_size is not None else new_tracks
+    artists = int(read * UNIQUE_FRACTION)
+    plan.add("saved_tracks", max(1, batches(read, SAVED_PAGE)), read, "playlist_item")
+    plan.add("artists", batches(artists, TRACK_BATCH), artists, "artist", concurrency=4)
+    plan.add_writes(_target_tracks(limit, target_duration_ms), sequence)
+    return plan.to_dict()
+
+
+def plan_create_from_library(limit: int = 100, sequence: Any = None,
+                             target_duration_ms: int = None, sync: bool = True,
+                             new_tracks: int = 50, playlists: int = 20,
+                             changed_playlists: int = 0, playlist_size: int = 100,
+                             max_workers: int = 4, **_) -> Dict[str, Any]:
+    """
+    Estimate create_from_library.
+
+    A sync reads `new_tracks` saved tracks, lists `playlists` playlists
+    and re-reads the `changed_playlists` whose snapshot_id moved.
+    """
+    plan = RequestPlan("create_from_library")
+    if sync:
+        plan.add("saved_tracks", max(1, batches(new_tracks, SAVED_PAGE)), new_tracks,
+                 "playlist_item")
+        plan.add("playlists", max(1, batches(playlists, ALBUM_PAGE)), playlists, "playlist")
+        items = changed_playlists * playlist_size
+        plan.add("playlist_items", changed_playlists * max(1, batches(playlist_size, PLAYLIST_PAGE)),
+                 items, "playlist_item", concurrency=max_workers)
+        artists = int((new_tracks + items) * UNIQUE_FRACTION)
+        plan.add("artists", batches(artists, TRACK_BATCH), artists, "artist",
+                 concurrency=max_workers)
+    plan.add_writes(_target_tracks(limit, target_duration_ms), sequence)
+    return plan.to_dict()
+
+
+def plan_reorder_playlist(playlist_size: int = 0, allow_replace: bool = True,
+                          **_) -> Dict[str, Any]:
+    """Estimate reorder_playlist for a playlist of `playlist_size` items."""
+    plan = RequestPlan("reorder_playlist")
+    plan.add("snapshot", 1, 1, "snapshot")
+    plan.add("read_items", max(1, batches(playlist_size, PLAYLIST_PAGE)), playlist_size,
+             "projected_item")
+    plan.add("audio_features", batches(playlist_size, FEATURE_BATCH), playlist_size,
+             "audio_features")
+    rewrite = batches(playlist_size, WRITE_BATCH)
+    plan.add("write_order", rewrite if allow_replace else max(0, playlist_size - 1),
+             max_calls=max(rewrite, playlist_size - 1))
+    plan.tracks = playlist_size
+    return plan.to_dict()
+
+
+def plan_sync_playlist(playlist_size: int = 0, desired_track_ids: Sequence[str] = (),
+                       allow_replace: bool = False, previous: Dict[str, Any] = None,
+                       **_) -> Dict[str, Any]:
+    """
+    Estimate sync_playlist.
+
+    With `previous` (the last sync's result) the edits are planned from its
+    track_uris exactly as the sync would plan them, assuming the playlist
+    has not changed since. Without it only the size change is known, so the
+    expected edits are a lower bound: reordered or replaced tracks cost more.
+    """
+    desired = len(desired_track_ids)
+    current = (previous or {}).get("track_uris")
+    size = len(current) if current is not None else playlist_size
+    reads = max(1, batches(size, PLAYLIST_PAGE))
+    worst_edits = batches(size, WRITE_BATCH) + desired
+
+    plan = RequestPlan("sync_playlist")
+    plan.add("snapshot", 1, 1, "snapshot")
+    if current is None:
+        plan.add("read_items", reads, size, "projected_item")
+        plan.add("apply_edits", batches(abs(desired - size), WRITE_BATCH),
+                 max_calls=worst_edits)
+    else:
+        from playlist_sync import plan_sync
+
+        # Unchanged playlists are not re-read
+        plan.add("read_items", 0, max_calls=reads)
+        script, _ = plan_sync(current, desired_track_ids, allow_replace)
+        plan.add("apply_edits", script["api_calls"], max_calls=worst_edits)
+    plan.tracks = desired
+    return plan.to_dict()
+
+
+def plan_get_playlist_stats(playlist_size: int = 0, **_) -> Dict[str, Any]:
+    """Estimate get_playlist_stats (details plus projected item pages)."""
+    plan = RequestPlan("get_playlist_stats")
+    plan.add("playlist", 1, 1, "playlist")
+    plan.add("read_items", max(1, batches(playlist_size, PLAYLIST_PAGE)), playlist_size,
+             "projected_item")
+    return plan.to_dict()
+
+
+PLANNERS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "create_from_artist": plan_create_from_artist,
+    "create_from_theme": plan_create_from_theme,
+    "create_from_lyrics": plan_create_from_lyrics,
+    "create_from_song_list": plan_create_from_song_list,
+    "create_from_song_file": plan_create_from_song_file,
+    "create_from_recommendations": plan_create_from_recommendations,
+    "create_from_artist_graph": plan_create_from_artist_graph,
+    "create_from_genres": plan_create_from_genres,
+    "create_from_library": plan_create_from_library,
+    "reorder_playlist": plan_reorder_playlist,
+    "sync_playlist": plan_sync_playlist,
+    "get_playlist_stats": plan_get_playlist_stats,
+}
+
+
+def estimate_operation(operation: str, **kwargs) -> Dict[str, Any]:
+    """
+    Estimate the cost of a PlaylistCreator operation.
+
+    Args:
+        operation: Method name (e.g. "create_from_theme")
+        **kwargs: The arguments the operation would be called with;
+                  reorder/sync/stats also need playlist_size
+
+    Returns:
+        {"operation", "calls", "max_calls", "bytes", "seconds", "tracks", "steps"}
+    """
+    if operation not in PLANNERS:
+        raise ValueError(f"No estimate available for {operation}")
+    return PLANNERS[operation](**kwargs)
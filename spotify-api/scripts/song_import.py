@@ -0,0 +1,379 @@
+"""
+Spotify Song File Importer
+
+Imports large song lists from files into a playlist without holding them
+in memory:
+- Reads CSV, M3U/M3U8, JSON lines or plain text lazily
+- Resolves lines concurrently with a bounded number in flight (backpressure)
+- Adds tracks in 100-track batches on a writer thread while resolving continues
+- Checkpoints after every written batch so interrupted imports resume
+- Streams unmatched lines to a CSV report file
+"""
+
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from spotify_client import SpotifyClient, is_lookup_miss
+from track_matcher import TrackMatcher
+
+
+FORMATS = {
+    ".csv": "csv", ".tsv": "csv",
+    ".m3u": "m3u", ".m3u8": "m3u",
+    ".json": "json", ".jsonl": "json", ".ndjson": "json",
+}
+TITLE_COLUMNS = ("title", "track", "name", "song", "track name")
+ARTIST_COLUMNS = ("artist", "artists", "artist name")
+URI_COLUMNS = ("uri", "spotify_uri", "url", "track uri")
+DURATION_COLUMNS = ("duration_ms", "duration (ms)")
+
+
+def format_query(title: str = None, artist: str = None,
+                 duration_ms: int = None, uri: str = None) -> Optional[str]:
+    """Build a song line understood by TrackMatcher from structured fields."""
+    if uri:
+        return uri.strip()
+    if not title:
+        return None
+    query = f"{artist.strip()} - {title.strip()}" if artist else title.strip()
+    if duration_ms:
+        seconds = int(duration_ms) // 1000
+        query += f" ({seconds // 60}:{seconds % 60:02d})"
+    return query
+
+
+def _pick(row: Dict[str, str], columns: Tuple[str, ...]) -> Optional[str]:
+    for column in columns:
+        if row.get(column):
+            return row[column]
+    return None
+
+
+def _iter_csv(f) -> Iterator[Optional[str]]:
+    sample = f.read(4096)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(f, dialect)
+    header = [h.strip().lower() for h in next(reader, [])]
+    if not any(h in TITLE_COLUMNS + URI_COLUMNS for h in header):
+        # No recognizable header: the first column is the query
+        if header:
+            yield header[0] if header[0] else None
+        for row in reader:
+            yield row[0].strip() if row and row[0].strip() else None
+        return
+
+    for values in reader:
+        row = dict(zip(header, values))
+        duration = _pick(row, DURATION_COLUMNS)
+        yield format_query(
+            title=_pick(row, TITLE_COLUMNS),
+            artist=_pick(row, ARTIST_COLUMNS),
+            duration_ms=int(duration) if duration and duration.isdigit() else None,
+            uri=_pick(row, URI_COLUMNS)
+        )
+
+
+def _iter_m3u(f) -> Iterator[Optional[str]]:
+    pending = None
+    for raw in f:
+        line = raw.strip()
+        if line.upper().startswith("#EXTINF:"):
+            duration, _, label = line[8:].partition(",")
+            seconds = int(duration) if duration.strip().lstrip("-").isdigit() else -1
+            pending = format_query(title=label, duration_ms=seconds * 1000 if seconds > 0 else None)
+        elif not line or line.startswith("#"):
+            continue
+        elif pending:
+            # The path line belongs to the preceding #EXTINF entry
+            yield pending
+            pending = None
+        elif line.startswith("spotify:") or "open.spotify.com" in line:
+            yield line
+        else:
+            yield Path(line).stem.replace("_", " ") or None
+    if pending:
+        yield pending
+
+
+def _iter_json(f) -> Iterator[Optional[str]]:
+    head = f.read(1)
+    while head and head.isspace():
+        head = f.read(1)
+    f.seek(0)
+    if head == "[":
+        # A single JSON array cannot be streamed with the stdlib parser
+        entries = iter(json.load(f))
+    else:
+        entries = (json.loads(line) for line in f if line.strip())
+
+    for entry in entries:
+        if isinstance(entry, str):
+            yield entry.strip() or None
+        elif isinstance(entry, dict):
+            row = {k.lower(): v for k, v in entry.items()}
+            artist = _pick(row, ARTIST_COLUMNS)
+            if isinstance(artist, list):
+                artist = ", ".join(a.get("name", "") if isinstance(a, dict) else str(a)
+                                   for a in artist)
+            yield format_query(
+                title=_pick(row, TITLE_COLUMNS),
+                artist=artist,
+                duration_ms=_pick(row, DURATION_COLUMNS),
+                uri=_pick(row, URI_COLUMNS)
+            )
+        else:
+            yield None
+
+
+def iter_song_lines(path: str, format: str = None) -> Iterator[Optional[str]]:
+    """
+    Lazily read song lines from a file.
+
+    Args:
+        path: Song file
+        format: "csv", "m3u", "json" or "text" (detected from the suffix if None)
+
+    Yields:
+        One query per entry (None for entries that cannot be turned into one,
+        so positions stay stable across runs)
+    """
+    format = format or FORMATS.get(Path(path).suffix.lower(), "text")
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if format == "csv":
+            yield from _iter_csv(f)
+        elif format == "m3u":
+            yield from _iter_m3u(f)
+        elif format == "json":
+            yield from _iter_json(f)
+        elif format == "text":
+            for line in f:
+                yield line.strip() or None
+        else:
+            raise ValueError(f"Unknown song file format: {format}")
+
+
+class SongImporter:
+    """Stream a song file into a playlist with checkpointing."""
+
+    def __init__(self, client: SpotifyClient, matcher: TrackMatcher = None,
+                 max_workers: int = 8, max_in_flight: int = None,
+                 batch_size: int = 100):
+        """
+        Initialize importer.
+
+        Args:
+            client: Authenticated Spotify client
+            matcher: TrackMatcher to resolve lines (default settings if None)
+            max_workers: Concurrent resolution requests
+            max_in_flight: Lines resolving or waiting to be consumed before
+                           reading pauses (default 4 x max_workers)
+            batch_size: Tracks per playlist write (Spotify allows at most 100)
+        """
+        if not 1 <= batch_size <= 100:
+            raise ValueError("batch_size must be between 1 and 100")
+        self.client = client
+        self.matcher = matcher or TrackMatcher(client)
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = max_in_flight or 4 * self.max_workers
+        self.batch_size = batch_size
+
+    def run(self, path: str, playlist_id: str = None, playlist_name: str = None,
+            playlist_description: str = "", public: bool = True,
+            format: str = None, checkpoint_path: str = None,
+            report_path: str = None, resume: bool = True) -> Dict:
+        """
+        Import a song file.
+
+        Args:
+            path: Song file (CSV, M3U, JSON lines or text)
+            playlist_id: Existing playlist to append to
+            playlist_name: Name for a new playlist (defaults to the file name)
+            playlist_description: Description for a new playlist
+            public: Make a new playlist public
+            format: File format (detected from the suffix if None)
+            checkpoint_path: Progress file (default: <path>.checkpoint.json)
+            report_path: Not-found CSV report (default: <path>.not_found.csv)
+            resume: Continue from the checkpoint if one exists
+
+        Returns:
+            Summary with playlist ID, counts, report path and throughput
+        """
+        started = time.time()
+        checkpoint_path = Path(checkpoint_path or f"{path}.checkpoint.json")
+        report_path = Path(report_path or f"{path}.not_found.csv")
+
+        state = self._load_checkpoint(checkpoint_path, path) if resume else None
+        if state and state.get("complete"):
+            return dict(self._summary(state, report_path, started), resumed_from=state["position"])
+        if not state:
+            if not playlist_id:
+                playlist = self.client.create_playlist(
+                    name=playlist_name or Path(path).stem,
+                    description=playlist_description,
+                    public=public
+                )
+                playlist_id = playlist["id"]
+            state = {"source": str(Path(path).resolve()), "playlist_id": playlist_id,
+                     "position": 0, "tracks_added": 0, "not_found": 0, "complete": False}
+            self._save_checkpoint(checkpoint_path, state)
+        resumed_from = state["position"]
+
+        report_file, report = self._open_report(report_path, resumed_from or None)
+        counts = {"not_found": state["not_found"]}
+        batch = []
+        in_flight = deque()
+        writes = deque()
+        failed = []
+
+        def write(track_ids, position, not_found):
+            # Batches queued behind a failed one must not move the
+            # checkpoint past it, or a resumed run would skip its tracks
+            if failed:
+                return
+            try:
+                self.client.add_tracks_to_playlist(state["playlist_id"], track_ids)
+            except BaseException:
+                failed.append(position)
+                raise
+            state.update(position=position, not_found=not_found,
+                         tracks_added=state["tracks_added"] + len(track_ids))
+            self._save_checkpoint(checkpoint_path, state)
+
+        def consume():
+            position, query, future = in_flight.popleft()
+            match, reason = future.result()
+            if match:
+                batch.append(match["track"]["id"])
+            elif query is not None:
+                counts["not_found"] += 1
+                report.writerow([position, query, reason])
+            if len(batch) >= self.batch_size:
+                flush(position + 1)
+
+        def flush(position):
+            # Report rows before `position` must be on disk before the
+            # checkpoint that counts them as done
+            report_file.flush()
+            # One writer thread keeps batches in file order; at most two
+            # batches wait so a slow write throttles resolution too
+            writes.append(writer.submit(write, list(batch), position, counts["not_found"]))
+            batch.clear()
+            # Finished writes raise their error here, so a failure stops
+            # submitting further batches
+            while len(writes) > 2 or (writes and writes[0].done()):
+                writes.popleft().result()
+
+        with report_file, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as pool, \
+                ThreadPoolExecutor(max_workers=1) as writer:
+            position = -1
+            for position, query in enumerate(iter_song_lines(path, format)):
+                if position < resumed_from:
+                    continue
+                future = pool.submit(self._resolve, query)
+                in_flight.append((position, query, future))
+                if len(in_flight) >= self.max_in_flight:
+                    consume()
+            while in_flight:
+                consume()
+
+            end = max(position + 1, resumed_from)
+            if batch:
+                flush(end)
+            while writes:
+                writes.popleft().result()
+
+        state.update(position=end, not_found=counts["not_found"], complete=True)
+        self._save_checkpoint(checkpoint_path, state)
+        return dict(self._summary(state, report_path, started), resumed_from=resumed_from)
+
+    def _resolve(self, query: Optional[str]) -> Tuple[Optional[Dict], str]:
+        """
+        Resolve one line; lookup misses are reported rather than raised.
+
+        Network, auth, rate-limit and budget errors propagate and stop the
+        import, leaving the checkpoint at the last written batch so a
+        resumed run retries the affected lines.
+        """
+        if query is None:
+            return None, "unreadable"
+        try:
+            match = self.matcher.match(query)
+        except Exception as e:
+            if not is_lookup_miss(e):
+                raise
+            return None, f"error: {e}"
+        return match, "" if match else "not_found"
+
+    @staticmethod
+    def _summary(state: Dict, report_path: Path, started: float) -> Dict:
+        elapsed = time.time() - started
+        return {
+            "playlist_id": state["playlist_id"],
+            "lines_processed": state["position"],
+            "tracks_added": state["tracks_added"],
+            "tracks_not_found": state["not_found"],
+            "report_path": str(report_path),
+            "elapsed_seconds": round(elapsed, 2),
+        }
+
+    # Checkpoint and report files
+
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: Path, source: str) -> Optional[Dict]:
+        """Load a checkpoint for the same source file, if any."""
+        if not checkpoint_path.exists():
+            return None
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("source") != str(Path(source).resolve()):
+            return None
+        return state
+
+    @staticmethod
+    def _save_checkpoint(checkpoint_path: Path, state: Dict):
+        """Write the checkpoint atomically."""
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = checkpoint_path.with_suffix(checkpoint_path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    @staticmethod
+    def _open_report(report_path: Path, keep_before: Optional[int]):
+        """
+        Open the not-found report for appending.
+
+        On resume, rows past the checkpoint are dropped first because those
+        lines will be resolved again.
+        """
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        if keep_before is not None and report_path.exists():
+            tmp_path = report_path.with_suffix(report_path.suffix + ".tmp")
+            with open(report_path, 'r', encoding='utf-8', newline='') as src, \
+                    open(tmp_path, 'w', encoding='utf-8', newline='') as dst:
+                out = csv.writer(dst)
+                for row in csv.reader(src):
+                    if row and (not row[0].isdigit() or int(row[0]) < keep_before):
+                        out.writerow(row)
+            os.replace(tmp_path, report_path)
+            f = open(report_path, 'a', encoding='utf-8', newline='')
+            return f, csv.writer(f)
+
+        f = open(report_path, 'w', encoding='utf-8', newline='')
+        writer = csv.writer(f)
+        writer.writerow(["position", "query", "reason"])
+        return f, writer
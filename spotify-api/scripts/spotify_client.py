@@ -6,10 +6,13 @@ search, playback control, and user data retrieval.
 """
 
 import os
+import copy
 import json
 import time
 import base64
+import threading
 import requests
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 from urllib.parse import urlencode
 from pathlib import Path
@@ -56,6 +59,112 @@ def check_network_access():
         ) from e
 
 
+class RequestBudgetExceeded(Exception):
+    """Raised when a client's request budget is used up."""
+    pass
+
+
+def is_lookup_miss(error: Exception) -> bool:
+    """
+    Whether an error only means one item was not found (404, or 400 for a
+    malformed ID). Network, auth (401/403), rate-limit (429) and budget
+    errors are not misses: retrying later may succeed, so callers should
+    let them propagate.
+    """
+    response = getattr(error, "response", None)
+    return (isinstance(error, requests.HTTPError) and response is not None
+            and response.status_code in (400, 404))
+
+
+class RateLimiter:
+    """
+    Thread-safe token-bucket rate limiter shared by every request of a client.
+    
+    Also honours 429 Retry-After responses by pausing all callers.
+    """
+    
+    def __init__(self, requests_per_second: float = 10.0, burst: int = None):
+        """
+        Initialize rate limiter.
+        
+        Args:
+            requests_per_second: Sustained request rate
+            burst: Requests allowed back-to-back (defaults to one second's worth)
+        """
+        self.rate = requests_per_second
+        self.capacity = burst or max(1, int(requests_per_second))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity,
+                                       self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+    
+    def pause(self, seconds: float):
+        """Stop all requests for `seconds` (e.g. from a Retry-After header)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class ResponseCache:
+    """
+    Thread-safe in-memory LRU cache of GET responses for catalog endpoints.
+    
+    Share one instance between clients (or jobs) to avoid repeating
+    searches and artist/album/track lookups. Bodies are stored as text, so
+    every hit returns fresh objects that callers may modify.
+    """
+    
+    # User-specific or mutable resources are never cached
+    CACHEABLE_PREFIXES = ("search", "artists", "albums", "tracks", "audio-features",
+                          "recommendations")
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def key(cls, endpoint: str, params: Dict = None) -> Optional[str]:
+        """Cache key for a GET request, or None if it must not be cached."""
+        if not endpoint.startswith(cls.CACHEABLE_PREFIXES):
+            return None
+        return endpoint + "?" + urlencode(sorted((params or {}).items()))
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(body)
+    
+    def put(self, key: str, body: str):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
 class SpotifyClient:
     """Authenticated Spotify Web API client."""
     
@@ -78,9 +187,93 @@ class SpotifyClient:
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
-        self.access_token = access_token
-        self.refresh_token = refresh_token
-        self.token_expires_at = None
+        # Token state lives in one dict so scoped() views share refreshes
+        self._auth = {"access_token": access_token, "refresh_token": refresh_token,
+                      "expires_at": None, "lock": threading.Lock()}
+        self.session = requests.Session()
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.response_cache: Optional[ResponseCache] = None
+        self.max_retries = 3
+        self.request_count = 0
+        self.request_budget: Optional[int] = None
+        self._parent: Optional["SpotifyClient"] = None
+        self._count_lock = threading.Lock()
+    
+    @property
+    def access_token(self) -> Optional[str]:
+        return self._auth["access_token"]
+    
+    @access_token.setter
+    def access_token(self, value: Optional[str]):
+        self._auth["access_token"] = value
+    
+    @property
+    def refresh_token(self) -> Optional[str]:
+        return self._auth["refresh_token"]
+    
+    @refresh_token.setter
+    def refresh_token(self, value: Optional[str]):
+        self._auth["refresh_token"] = value
+    
+    @property
+    def token_expires_at(self) -> Optional[float]:
+        return self._auth["expires_at"]
+    
+    @token_expires_at.setter
+    def token_expires_at(self, value: Optional[float]):
+        self._auth["expires_at"] = value
+    
+    def scoped(self, request_budget: int = None) -> "SpotifyClient":
+        """
+        Lightweight view of this client for one job or operation.
+        
+        The view shares tokens, the HTTP session and the rate limiter, but
+        keeps its own request_count (requests still count towards this
+        client as well).
+        
+        Args:
+            request_budget: Maximum requests through the view; further
+                            requests raise RequestBudgetExceeded
+        """
+        view = copy.copy(self)
+        view._parent = self
+        view.request_count = 0
+        view.request_budget = request_budget
+        view._count_lock = threading.Lock()
+        return view
+    
+    @property
+    def remaining_requests(self) -> Optional[int]:
+        """Requests left in this client's budget (None if unlimited)."""
+        if self.request_budget is None:
+            return None
+        return max(0, self.request_budget - self.request_count)
+    
+    def _count_request(self):
+        """
+        Count one request on this client and every client it was scoped from.
+        
+        Raises:
+            RequestBudgetExceeded: If any of them has no budget left
+        """
+        chain = []
+        client = self
+        while client is not None:
+            chain.append(client)
+            client = client._parent
+        for client in chain:
+            client._count_lock.acquire()
+        try:
+            for client in chain:
+                if client.request_budget is not None and client.request_count >= client.request_budget:
+                    raise RequestBudgetExceeded(
+                        f"Request budget of {client.request_budget} calls used up"
+                    )
+            for client in chain:
+                client.request_count += 1
+        finally:
+            for client in chain:
+                client._count_lock.release()
         
     def get_authorization_url(self, scope: List[str] = None) -> str:
         """
@@ -191,7 +384,10 @@ class SpotifyClient:
     def _check_token_expiry(self):
         """Refresh token if expired."""
         if self.token_expires_at and time.time() >= self.token_expires_at - 60:
-            self.refresh_access_token()
+            with self._auth["lock"]:
+                # Another thread may have refreshed while we waited
+                if time.time() >= self.token_expires_at - 60:
+                    self.refresh_access_token()
     
     def _get_headers(self) -> Dict[str, str]:
         """Get authorization headers."""
@@ -216,29 +412,77 @@ class SpotifyClient:
             Response JSON
         """
         url = f"{self.BASE_URL}/{endpoint}"
-        headers = self._get_headers()
+        cache_key = None
+        if self.response_cache is not None and method == "GET":
+            cache_key = ResponseCache.key(endpoint, params)
+            cached = self.response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return cached
         
-        try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=data,
-                params=params,
-                **kwargs
-            )
-        except requests.exceptions.ConnectionError as e:
-            # Check if it's a network access issue
-            check_network_access()
-            # If check passes, it's some other connection error
-            raise
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            self._count_request()
+            try:
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    headers=self._get_headers(),
+                    json=data,
+                    params=params,
+                    **kwargs
+                )
+            except requests.exceptions.ConnectionError as e:
+                # Check if it's a network access issue
+                check_network_access()
+                # If check passes, it's some other connection error
+                raise
+            
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            # Rate limited: wait as instructed, pausing other threads too
+            retry_after = float(response.headers.get("Retry-After", 2 ** attempt))
+            if self.rate_limiter:
+                self.rate_limiter.pause(retry_after)
+            else:
+                time.sleep(retry_after)
         
         if response.status_code == 204:
             return {}
         
         response.raise_for_status()
+        if cache_key:
+            self.response_cache.put(cache_key, response.text)
         return response.json()
     
+    def _paginate(self, endpoint: str, params: Dict = None, page_size: int = 50,
+                  offset: int = 0):
+        """
+        Iterate over every item of a paginated endpoint.
+        
+        Follows ``offset`` paging until a short page or the reported total
+        is reached, yielding items one at a time so callers never have to
+        hold the full collection.
+        
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Extra query parameters
+            page_size: Items requested per page
+            offset: Index of the first item (to resume an interrupted read)
+            
+        Yields:
+            Individual items from each page
+        """
+        params = dict(params or {})
+        while True:
+            params.update({"limit": page_size, "offset": offset})
+            data = self._make_request("GET", endpoint, params=params)
+            items = data.get("items", [])
+            yield from items
+            offset += len(items)
+            if len(items) < page_size or offset >= data.get("total", 0):
+                break
+    
     # Playlist Operations
     
     def get_user_playlists(self, limit: int = 50, offset: int = 0) -> List[Dict]:
@@ -249,6 +493,10 @@ class SpotifyClient:
         )
         return data.get("items", [])
     
+    def iter_user_playlists(self, offset: int = 0):
+        """Iterate over all of the user's playlists, paging automatically."""
+        return self._paginate("me/playlists", offset=offset)
+    
     def create_playlist(self, name: str, description: str = "", 
                        public: bool = True) -> Dict[str, Any]:
         """Create new playlist for current user."""
@@ -264,9 +512,10 @@ class SpotifyClient:
             }
         )
     
-    def get_playlist(self, playlist_id: str) -> Dict[str, Any]:
-        """Get playlist details."""
-        return self._make_request("GET", f"playlists/{playlist_id}")
+    def get_playlist(self, playlist_id: str, fields: str = None) -> Dict[str, Any]:
+        """Get playlist details (optionally projected to `fields`)."""
+        params = {"fields": fields} if fields else None
+        return self._make_request("GET", f"playlists/{playlist_id}", params=params)
     
     def update_playlist(self, playlist_id: str, name: str = None, 
                        description: str = None, public: bool = None) -> Dict:
@@ -294,6 +543,19 @@ class SpotifyClient:
         )
         return data.get("items", [])
     
+    def iter_playlist_tracks(self, playlist_id: str, fields: str = None, offset: int = 0):
+        """
+        Iterate over all items in a playlist, paging automatically.
+        
+        Args:
+            playlist_id: Spotify playlist ID
+            fields: Optional field projection (e.g. "items(track(id)),total")
+            offset: Index of the first item to read
+        """
+        params = {"fields": fields} if fields else None
+        return self._paginate(f"playlists/{playlist_id}/tracks", params=params,
+                              page_size=100, offset=offset)
+    
     def add_tracks_to_playlist(self, playlist_id: str, track_ids: List[str], 
                               position: int = None) -> Dict[str, Any]:
         """Add tracks to playlist."""
@@ -312,6 +574,48 @@ class SpotifyClient:
             data=data
         )
     
+    def reorder_playlist_tracks(self, playlist_id: str, range_start: int,
+                                insert_before: int, range_length: int = 1,
+                                snapshot_id: str = None) -> Dict[str, Any]:
+        """
+        Move a run of items to a new position in a playlist.
+        
+        Args:
+            playlist_id: Spotify playlist ID
+            range_start: Position of the first item to move
+            insert_before: Position (before the move) to insert the items at
+            range_length: Number of consecutive items to move
+            snapshot_id: Playlist version to apply the change against
+            
+        Returns:
+            Response with the new snapshot_id
+        """
+        data = {
+            "range_start": range_start,
+            "insert_before": insert_before,
+            "range_length": range_length
+        }
+        if snapshot_id:
+            data["snapshot_id"] = snapshot_id
+        
+        return self._make_request(
+            "PUT", f"playlists/{playlist_id}/tracks",
+            data=data
+        )
+    
+    def replace_playlist_tracks(self, playlist_id: str,
+                                track_ids: List[str]) -> Dict[str, Any]:
+        """Replace all items in a playlist (max 100 tracks per request)."""
+        if len(track_ids) > 100:
+            raise ValueError("Maximum 100 tracks per request")
+        
+        uris = [f"spotify:track:{track_id}" for track_id in track_ids]
+        
+        return self._make_request(
+            "PUT", f"playlists/{playlist_id}/tracks",
+            data={"uris": uris}
+        )
+    
     def remove_tracks_from_playlist(self, playlist_id: str, 
                                    track_ids: List[str]) -> Dict[str, Any]:
         """Remove tracks from playlist."""
@@ -322,14 +626,39 @@ class SpotifyClient:
             data={"uris": uris}
         )
     
+    def remove_playlist_items(self, playlist_id: str, items: List[Dict[str, Any]],
+                              snapshot_id: str = None) -> Dict[str, Any]:
+        """
+        Remove specific occurrences of items from a playlist.
+        
+        Args:
+            playlist_id: Spotify playlist ID
+            items: Up to 100 {"uri": ..., "positions": [...]} entries
+            snapshot_id: Playlist version the positions refer to
+            
+        Returns:
+            Response with the new snapshot_id
+        """
+        if len(items) > 100:
+            raise ValueError("Maximum 100 items per request")
+        
+        data = {"tracks": items}
+        if snapshot_id:
+            data["snapshot_id"] = snapshot_id
+        
+        return self._make_request(
+            "DELETE", f"playlists/{playlist_id}/tracks",
+            data=data
+        )
+    
     # Search Operations
     
-    def search_tracks(self, query: str, limit: int = 20) -> List[Dict]:
+    def search_tracks(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
         """Search for tracks."""
-        data = self._make_request(
-            "GET", "search",
-            params={"q": query, "type": "track", "limit": limit}
-        )
+        params = {"q": query, "type": "track", "limit": limit}
+        if offset:
+            params["offset"] = offset
+        data = self._make_request("GET", "search", params=params)
         return data.get("tracks", {}).get("items", [])
     
     def search_artists(self, query: str, limit: int = 20) -> List[Dict]:
@@ -373,6 +702,17 @@ class SpotifyClient:
         """Get artist details."""
         return self._make_request("GET", f"artists/{artist_id}")
     
+    def get_artists(self, artist_ids: List[str]) -> List[Dict]:
+        """Get multiple artists, including genres (max 50)."""
+        if len(artist_ids) > 50:
+            raise ValueError("Maximum 50 artists per request")
+        
+        data = self._make_request(
+            "GET", "artists",
+            params={"ids": ",".join(artist_ids)}
+        )
+        return data.get("artists", [])
+    
     def get_artist_top_tracks(self, artist_id: str, market: str = "US") -> List[Dict]:
         """
         Get artist's top tracks (returns up to 10 tracks).
@@ -394,14 +734,30 @@ class SpotifyClient:
         return data.get("artists", [])[:limit]
     
     def get_artist_albums(self, artist_id: str, limit: int = 50, 
-                         offset: int = 0) -> List[Dict]:
-        """Get artist's albums."""
+                         offset: int = 0, include_groups: str = None) -> List[Dict]:
+        """
+        Get artist's albums.
+        
+        Args:
+            artist_id: Spotify artist ID
+            limit: Number of albums (max 50)
+            offset: Pagination offset
+            include_groups: Comma-separated filter, e.g. "album,single,compilation"
+        """
+        params = {"limit": limit, "offset": offset}
+        if include_groups:
+            params["include_groups"] = include_groups
         data = self._make_request(
             "GET", f"artists/{artist_id}/albums",
-            params={"limit": limit, "offset": offset}
+            params=params
         )
         return data.get("items", [])
     
+    def iter_artist_albums(self, artist_id: str, include_groups: str = None):
+        """Iterate over all of an artist's albums, paging automatically."""
+        params = {"include_groups": include_groups} if include_groups else None
+        return self._paginate(f"artists/{artist_id}/albums", params=params)
+    
     # User Operations
     
     def get_current_user(self) -> Dict[str, Any]:
@@ -435,11 +791,18 @@ class SpotifyClient:
     
     def get_saved_tracks(self, limit: int = 50, offset: int = 0) -> List[Dict]:
         """Get user's saved tracks."""
-        data = self._make_request(
+        return self.get_saved_tracks_page(limit=limit, offset=offset).get("items", [])
+    
+    def get_saved_tracks_page(self, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """Get one page of saved tracks with its paging fields ("items", "total", ...)."""
+        return self._make_request(
             "GET", "me/tracks",
             params={"limit": limit, "offset": offset}
         )
-        return data.get("items", [])
+    
+    def iter_saved_tracks(self, offset: int = 0):
+        """Iterate over the user's saved tracks (newest first), paging automatically."""
+        return self._paginate("me/tracks", offset=offset)
     
     def save_tracks(self, track_ids: List[str]) -> None:
         """Save tracks to library."""
@@ -605,12 +968,38 @@ class SpotifyClient:
         """Get audio features for a track."""
         return self._make_request("GET", f"audio-features/{track_id}")
     
+    def get_audio_features(self, track_ids: List[str]) -> List[Optional[Dict]]:
+        """
+        Get audio features for multiple tracks (max 100).
+        
+        Entries are None for tracks Spotify has no analysis for.
+        """
+        if len(track_ids) > 100:
+            raise ValueError("Maximum 100 tracks per request")
+        
+        data = self._make_request(
+            "GET", "audio-features",
+            params={"ids": ",".join(track_ids)}
+        )
+        return data.get("audio_features", [])
+    
     # Album Operations
     
     def get_album(self, album_id: str) -> Dict[str, Any]:
         """Get album details."""
         return self._make_request("GET", f"albums/{album_id}")
     
+    def get_albums(self, album_ids: List[str]) -> List[Dict]:
+        """Get multiple albums, including their first 50 tracks (max 20)."""
+        if len(album_ids) > 20:
+            raise ValueError("Maximum 20 albums per request")
+        
+        data = self._make_request(
+            "GET", "albums",
+            params={"ids": ",".join(album_ids)}
+        )
+        return data.get("albums", [])
+    
     def get_album_tracks(self, album_id: str, limit: int = 50,
                         offset: int = 0) -> List[Dict]:
         """Get tracks from album."""
@@ -0,0 +1,182 @@
+"""
+Spotify Theme Candidate Ranking
+
+Builds better theme playlists than "first N search results":
+- Oversamples candidates with concurrent, paged keyword searches
+- Scores every candidate at once (NumPy) from popularity, release
+  recency, keyword hits and search position
+- Picks the top k with a heap instead of sorting the whole pool
+- Weights are configurable per call
+"""
+
+import heapq
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+try:
+    import numpy as np
+except ImportError as e:
+    print("Missing required dependencies. Install with:")
+    print("pip install numpy")
+    raise e
+
+from spotify_client import SpotifyClient, RequestBudgetExceeded
+
+
+# Score components and their default weights
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "popularity": 0.4,
+    "recency": 0.2,
+    "keyword_hits": 0.3,
+    "relevance": 0.1,
+}
+
+SEARCH_PAGE_SIZE = 50
+# Spotify does not page search results beyond this offset
+MAX_SEARCH_OFFSET = 1000
+
+
+class ThemeRanker:
+    """Oversample theme search results and rank them with a weighted score."""
+
+    def __init__(self, client: SpotifyClient, weights: Dict[str, float] = None,
+                 max_workers: int = 8, recency_half_life_years: float = 5.0):
+        """
+        Initialize ranker.
+
+        Args:
+            client: Authenticated Spotify client
+            weights: Overrides for DEFAULT_WEIGHTS (set one to 0 to ignore it)
+            max_workers: Maximum concurrent search requests
+            recency_half_life_years: Age at which the recency score halves
+        """
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown ranking weights: {sorted(unknown)}. "
+                             f"Use {sorted(DEFAULT_WEIGHTS)}")
+        self.client = client
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.max_workers = max(1, max_workers)
+        self.recency_half_life_years = recency_half_life_years
+        self.budget_exhausted = False
+
+    def rank(self, keywords: Sequence[str], limit: int, oversample: float = 3.0,
+             keep_pool: bool = False) -> List[Dict]:
+        """
+        Collect about `limit * oversample` candidates and return the best.
+
+        Args:
+            keywords: Theme keywords, each searched separately
+            limit: Tracks to return
+            oversample: Candidate pool size as a multiple of limit
+            keep_pool: Return the whole pool, ranked, instead of the top `limit`
+
+        Returns:
+            Tracks, best first
+        """
+        keywords = list(dict.fromkeys(k for k in keywords if k))
+        pool_size = max(int(limit * max(1.0, oversample)), 1)
+        tracks, search_hits, relevance = self.collect(keywords, pool_size)
+        if not tracks:
+            return []
+
+        scores = self.score(tracks, keywords, search_hits, relevance)
+        k = len(tracks) if keep_pool else min(limit, len(tracks))
+        best = heapq.nlargest(k, range(len(tracks)), key=scores.__getitem__)
+        return [tracks[i] for i in best]
+
+    def collect(self, keywords: List[str],
+                pool_size: int) -> Tuple[List[Dict], "np.ndarray", "np.ndarray"]:
+        """
+        Search all keywords concurrently, a few pages each.
+
+        Returns:
+            (unique tracks, keywords returning each track, best relative
+            search position per track in 0-1, higher is earlier)
+        """
+        if not keywords:
+            return [], np.zeros(0), np.zeros(0)
+        per_keyword = math.ceil(pool_size / len(keywords))
+        pages = range(0, min(per_keyword, MAX_SEARCH_OFFSET), SEARCH_PAGE_SIZE)
+        tasks = [(keyword, offset) for keyword in keywords for offset in pages]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as pool:
+            pages_found = list(pool.map(lambda task: self._search(*task), tasks))
+
+        tracks: List[Dict] = []
+        index: Dict[str, int] = {}
+        hits: List[set] = []
+        relevance: List[float] = []
+        for (keyword, offset), results in zip(tasks, pages_found):
+            for position, track in enumerate(results, start=offset):
+                if not track or not track.get("id"):
+                    continue
+                i = index.get(track["id"])
+                if i is None:
+                    i = index[track["id"]] = len(tracks)
+                    tracks.append(track)
+                    hits.append(set())
+                    relevance.append(0.0)
+                hits[i].add(keyword)
+                relevance[i] = max(relevance[i], 1.0 - position / per_keyword)
+        return (tracks, np.array([len(h) for h in hits], dtype=np.float64),
+                np.array(relevance, dtype=np.float64))
+
+    def _search(self, keyword: str, offset: int) -> List[Dict]:
+        """One search page; a spent request budget yields no results."""
+        try:
+            return self.client.search_tracks(query=keyword, limit=SEARCH_PAGE_SIZE,
+                                             offset=offset)
+        except RequestBudgetExceeded:
+            self.budget_exhausted = True
+            return []
+
+    def score(self, tracks: Sequence[Dict], keywords: Sequence[str],
+              search_hits: "np.ndarray", relevance: "np.ndarray") -> "np.ndarray":
+        """
+        Weighted score per track; every component is scaled to 0-1.
+
+        keyword_hits counts keywords whose search returned the track plus
+        keywords appearing in its title, album or artist names.
+        """
+        n = len(tracks)
+        popularity = np.fromiter((t.get("popularity") or 0 for t in tracks),
+                                 dtype=np.float64, count=n) / 100.0
+
+        # Release year as a float; unknown dates get no recency credit
+        years = np.fromiter(
+            (_release_year(t.get("album", {}).get("release_date")) for t in tracks),
+            dtype=np.float64, count=n
+        )
+        now = time.gmtime()
+        age = np.clip(now.tm_year + now.tm_yday / 366.0 - years, 0.0, None)
+        recency = np.where(np.isnan(years), 0.0,
+                           np.power(0.5, age / self.recency_half_life_years))
+
+        lowered = [k.lower() for k in keywords]
+        text_hits = np.fromiter(
+            (sum(k in _track_text(t) for k in lowered) for t in tracks),
+            dtype=np.float64, count=n
+        )
+        keyword_hits = (search_hits + text_hits) / max(2 * len(keywords), 1)
+
+        w = self.weights
+        return (w["popularity"] * popularity + w["recency"] * recency
+                + w["keyword_hits"] * keyword_hits + w["relevance"] * relevance)
+
+
+def _release_year(release_date: Optional[str]) -> float:
+    """Fractional year from "YYYY", "YYYY-MM" or "YYYY-MM-DD" (NaN if unknown)."""
+    if not release_date or not release_date[:4].isdigit():
+        return float("nan")
+    year = float(release_date[:4])
+    month = release_date[5:7]
+    return year + (int(month) - 1) / 12.0 if month.isdigit() else year + 0.5
+
+
+def _track_text(track: Dict) -> str:
+    """Lower-cased title, album and artist names for keyword matching."""
+    parts = [track.get("name") or "", (track.get("album") or {}).get("name") or ""]
+    parts.extend(a.get("name") or "" for a in track.get("artists", []))
+    return " ".join(parts).lower()
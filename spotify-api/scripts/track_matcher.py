@@ -0,0 +1,253 @@
+"""
+Spotify Fuzzy Track Matcher
+
+Resolves free-text song lines ("Artist - Title", "Title - Artist",
+"Title by Artist", Spotify URLs) to the right track instead of blindly
+taking the first search result:
+- Structured search with track:/artist: filters, plain search as fallback
+- Token-set similarity on title and artist, plus duration when known
+- Penalizes live/karaoke/cover/remix versions unless the line asks for them
+- Normalization is cached, so scoring thousands of lines per second is cheap
+"""
+
+import re
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional
+
+from spotify_client import SpotifyClient
+
+
+# Words marking an alternate version of a recording
+VERSION_MARKERS = frozenset({
+    "live", "karaoke", "instrumental", "acoustic", "remix", "cover", "tribute",
+    "demo", "originally", "lullaby", "slowed", "sped", "reverb", "nightcore",
+    "rehearsal", "unplugged", "orchestral",
+})
+VERSION_PENALTY = 0.25
+
+# Noise words ignored when comparing titles
+STOP_WORDS = frozenset({"the", "a", "an", "and", "feat", "ft", "featuring", "with"})
+
+TRACK_ID_PATTERN = re.compile(r"(?:spotify:track:|open\.spotify\.com/track/)([A-Za-z0-9]{22})")
+DURATION_PATTERN = re.compile(r"\s*[\[(]?(\d{1,2}):([0-5]\d)[\])]?\s*$")
+FEATURING_PATTERN = re.compile(r"[\(\[]?\b(feat\.?|ft\.?|featuring)\s[^\)\]]*[\)\]]?", re.IGNORECASE)
+SEPARATORS = (" - ", " – ", " — ", " | ", "\t")
+
+
+@lru_cache(maxsize=131072)
+def normalize(text: str) -> str:
+    """Lowercase, strip accents, featuring credits and punctuation."""
+    text = FEATURING_PATTERN.sub(" ", text or "")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = text.replace("&", " and ")
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+@lru_cache(maxsize=131072)
+def tokens(text: str) -> FrozenSet[str]:
+    """Normalized token set without stop words."""
+    words = normalize(text).split()
+    return frozenset(w for w in words if w not in STOP_WORDS) or frozenset(words)
+
+
+def token_set_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """
+    Similarity of two token sets in [0, 1].
+
+    The best of Dice overlap and containment of the shorter set, so
+    "Hey Jude" matches "Hey Jude - Remastered 2015" strongly.
+    """
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    dice = 2.0 * common / (len(a) + len(b))
+    containment = common / min(len(a), len(b))
+    return max(dice, 0.9 * containment)
+
+
+def parse_song_line(line: str) -> Dict[str, Optional[str]]:
+    """
+    Split a song line into its parts.
+
+    Understands "Artist - Title", "Title by Artist", a trailing "(3:45)"
+    duration and Spotify track URIs/URLs.
+
+    Returns:
+        Dict with "title", "artist", "duration_ms", "track_id" and "query"
+        (the line without its duration, for plain searches); any may be None
+    """
+    line = (line or "").strip()
+    parsed = {"title": line, "artist": None, "duration_ms": None, "track_id": None,
+              "query": line}
+
+    match = TRACK_ID_PATTERN.search(line)
+    if match:
+        parsed.update(title=None, track_id=match.group(1), query=None)
+        return parsed
+
+    match = DURATION_PATTERN.search(line)
+    if match:
+        parsed["duration_ms"] = (int(match.group(1)) * 60 + int(match.group(2))) * 1000
+        line = line[:match.start()].strip()
+        parsed.update(title=line, query=line)
+
+    for separator in SEPARATORS:
+        if separator in line:
+            artist, title = line.split(separator, 1)
+            parsed.update(artist=artist.strip(), title=title.strip())
+            return parsed
+
+    match = re.match(r"^(.+?)\s+by\s+(.+)$", line, re.IGNORECASE)
+    if match:
+        parsed.update(title=match.group(1).strip(), artist=match.group(2).strip())
+    return parsed
+
+
+def song_line_readings(parsed: Dict[str, Optional[str]]) -> List[Dict[str, Optional[str]]]:
+    """
+    Ways to read a parsed line whose separator leaves the order ambiguous.
+
+    "A - B" may be "Artist - Title" or "Title - Artist" (the user guide's
+    own song lists use the latter), and "Stand by Me" is a title rather than
+    "Stand" by "Me", so both orientations are scored, plus the whole line as
+    written.
+    """
+    if not parsed.get("artist") or not parsed.get("title"):
+        return [parsed]
+    swapped = dict(parsed, title=parsed["artist"], artist=parsed["title"])
+    plain = dict(parsed, title=parsed.get("query") or f'{parsed["artist"]} {parsed["title"]}',
+                 artist=None)
+    return [parsed, swapped, plain]
+
+
+class TrackMatcher:
+    """Resolve song lines to Spotify tracks with fuzzy scoring."""
+
+    def __init__(self, client: SpotifyClient, search_limit: int = 10,
+                 min_score: float = 0.55):
+        """
+        Initialize matcher.
+
+        Args:
+            client: Authenticated Spotify client
+            search_limit: Candidates fetched per search
+            min_score: Best candidates scoring below this count as not found
+        """
+        self.client = client
+        self.search_limit = search_limit
+        self.min_score = min_score
+
+    def score(self, parsed: Dict[str, Optional[str]], track: Dict) -> float:
+        """
+        Score how well a track matches a parsed song line.
+
+        Returns:
+            Score, roughly 0-1 (higher is better)
+        """
+        title_tokens = tokens(parsed.get("title") or "")
+        track_title = tokens(track.get("name", ""))
+        track_artists = tokens(" ".join(a.get("name", "") for a in track.get("artists", [])))
+
+        if parsed.get("artist"):
+            title_sim = token_set_similarity(title_tokens, track_title)
+            artist_sim = token_set_similarity(tokens(parsed["artist"]), track_artists)
+            score = 0.65 * title_sim + 0.35 * artist_sim
+        else:
+            # No artist given: the line may still mention one
+            combined = track_title | track_artists
+            score = max(token_set_similarity(title_tokens, track_title),
+                        token_set_similarity(title_tokens, combined))
+
+        # Prefer originals unless the line asks for an alternate version
+        requested = title_tokens | tokens(parsed.get("artist") or "")
+        markers = (track_title | tokens(track.get("album", {}).get("name", ""))) & VERSION_MARKERS
+        if markers - requested:
+            score -= VERSION_PENALTY
+
+        if parsed.get("duration_ms") and track.get("duration_ms"):
+            gap = abs(parsed["duration_ms"] - track["duration_ms"])
+            score += 0.05 if gap <= 3000 else (-0.15 if gap > 30000 else 0.0)
+
+        if track.get("album", {}).get("album_type") == "compilation":
+            score -= 0.03
+        # Popularity only breaks near-ties
+        return score + (track.get("popularity") or 0) / 10000.0
+
+    def best_match(self, line: str, candidates: Iterable[Dict]) -> Optional[Dict]:
+        """
+        Pick the best candidate for a line without any API calls.
+
+        Returns:
+            {"query", "track", "score"} or None if nothing clears min_score
+        """
+        readings = song_line_readings(parse_song_line(line))
+        best = None
+        best_score = float("-inf")
+        for track in candidates:
+            if not track or not track.get("id"):
+                continue
+            score = max(self.score(reading, track) for reading in readings)
+            if score > best_score:
+                best, best_score = track, score
+        if best is None or best_score < self.min_score:
+            return None
+        return {"query": line, "track": best, "score": round(best_score, 4)}
+
+    def match(self, line: str) -> Optional[Dict]:
+        """
+        Resolve one song line.
+
+        Returns:
+            {"query", "track", "score"} or None if not found
+        """
+        parsed = parse_song_line(line)
+        if parsed["track_id"]:
+            track = self.client.get_track(parsed["track_id"])
+            return {"query": line, "track": track, "score": 1.0} if track else None
+        if not parsed["title"]:
+            return None
+
+        if parsed["artist"]:
+            # Quotes inside a field would end the quoted filter early
+            title, artist = (" ".join(parsed[k].replace('"', " ").split())
+                             for k in ("title", "artist"))
+            query = f'track:"{title}" artist:"{artist}"'
+            candidates = self.client.search_tracks(query=query, limit=self.search_limit)
+            result = self.best_match(line, candidates) if candidates else None
+            if result:
+                return result
+        # Plain search of the line as written finds the track whichever way
+        # round title and artist are, or if the line was split wrongly
+        query = parsed["query"]
+        candidates = self.client.search_tracks(query=query, limit=self.search_limit)
+        return self.best_match(line, candidates)
+
+    def match_many(self, lines: Iterable[str], max_workers: int = 4) -> List[Optional[Dict]]:
+        """Resolve many lines concurrently, preserving input order."""
+        return list(self.iter_matches(lines, max_workers))
+
+    def iter_matches(self, lines: Iterable[str], max_workers: int = 4) -> Iterator[Optional[Dict]]:
+        """
+        Resolve lines concurrently, yielding results in input order as they
+        complete.
+
+        An error (e.g. a spent request budget) is raised after every earlier
+        result has been yielded; lines not started yet are cancelled.
+        """
+        workers = max(1, max_workers)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                for line in lines:
+                    pending.append(pool.submit(self.match, line))
+                    if len(pending) >= 2 * workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
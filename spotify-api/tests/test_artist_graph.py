@@ -0,0 +1,59 @@
+"""Offline tests for the related-artists crawler."""
+
+import pytest
+import requests
+
+from artist_graph import ArtistGraphCrawler, fetch_top_tracks
+from spotify_client import RequestBudgetExceeded
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class FakeClient:
+    """Artist aN is related to aN+1 and aN+2; chosen artists raise an error."""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+
+    def get_related_artists(self, artist_id):
+        if artist_id in self.errors:
+            raise self.errors[artist_id]
+        n = int(artist_id[1:])
+        return [{"id": f"a{n + k}", "name": f"Artist {n + k}"} for k in (1, 2)]
+
+    def get_artist_top_tracks(self, artist_id, market="US"):
+        if artist_id in self.errors:
+            raise self.errors[artist_id]
+        return [{"id": f"t-{artist_id}"}]
+
+
+def test_unknown_artist_stays_a_leaf():
+    crawler = ArtistGraphCrawler(FakeClient({"a1": http_error(404)}), max_workers=2)
+    graph = crawler.crawl(["a0"], depth=2)
+    assert graph.neighbors("a1") == []
+    assert graph.neighbors("a2") == ["a3", "a4"]
+
+
+@pytest.mark.parametrize("error", [RequestBudgetExceeded("budget"), http_error(401),
+                                   http_error(429), requests.ConnectionError("down")])
+def test_other_errors_propagate(error):
+    crawler = ArtistGraphCrawler(FakeClient({"a1": error}), max_workers=2)
+    with pytest.raises(type(error)):
+        crawler.crawl(["a0"], depth=2)
+    with pytest.raises(type(error)):
+        fetch_top_tracks(FakeClient({"a1": error}), ["a0", "a1"])
+
+
+def test_top_tracks_of_unknown_artist_are_empty():
+    tracks = fetch_top_tracks(FakeClient({"a1": http_error(404)}), ["a0", "a1"])
+    assert tracks == {"a0": [{"id": "t-a0"}], "a1": []}
+
+
+def test_seed_names_fill_seed_nodes():
+    graph = ArtistGraphCrawler(FakeClient()).crawl(["a0"], depth=1,
+                                                   seed_names={"a0": "Seed"})
+    assert graph.names == ["Seed", "Artist 1", "Artist 2"]
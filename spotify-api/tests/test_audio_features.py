@@ -0,0 +1,22 @@
+"""Tests for AudioFeatureMatrix row selection."""
+
+import numpy as np
+
+from audio_features import AudioFeatureMatrix
+
+
+def matrix():
+    return AudioFeatureMatrix(["a", "b", "c"], np.arange(3 * 2).reshape(3, 2), ("energy", "tempo"))
+
+
+def test_take_unknown_ids_gives_empty_matrix():
+    empty = matrix().take(["unknown-id"])
+    assert empty.track_ids == []
+    assert empty.values.shape == (0, 2)
+
+
+def test_subset_by_indices_and_mask():
+    m = matrix()
+    assert m.subset([2, 0]).track_ids == ["c", "a"]
+    assert m.subset(np.array([True, False, True])).track_ids == ["a", "c"]
+    assert m.subset([]).values.shape == (0, 2)
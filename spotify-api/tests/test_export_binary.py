@@ -0,0 +1,59 @@
+"""Round-trip tests for the MessagePack export format."""
+
+from export_binary import MessagePackReader, MessagePackWriter
+from export_writers import read_records
+
+
+def track(i):
+    artist = {"id": f"a{i % 2}", "name": f"Artist {i % 2}"}
+    album = {"id": f"al{i % 4}", "name": f"Album {i % 4}", "artists": [artist],
+             "images": [{"url": f"https://i.scdn.co/image/{i % 4}", "width": 300, "height": 300}]}
+    return {"id": f"t{i}", "name": f"Song {i}", "artists": [artist], "album": album,
+            "duration_ms": 200000 + i}
+
+
+def write(path, records):
+    with MessagePackWriter(path) as writer:
+        writer.write_all(records)
+    return path
+
+
+def test_records_round_trip_with_shared_albums_and_artists(tmp_path):
+    records = [track(i) for i in range(20)]
+    path = write(tmp_path / "tracks.msgpack", records)
+
+    assert list(read_records(path)) == records
+    with MessagePackReader(path) as reader:
+        assert len(reader) == 20
+        assert reader.fields == list(records[0])
+        # Each of the 4 albums and 2 artists is stored once
+        assert len(reader._shared) == 6
+
+
+def test_records_with_other_keys_than_the_header_round_trip(tmp_path):
+    records = [
+        {"id": "t1", "name": "Song", "album": {"id": "al1"}},
+        {"id": "t2", "album": {"id": "al1"}},
+        {"id": "t3", "name": "Extra", "album": {"id": "al2"}, "added_at": "2024-01-01T00:00:00Z"},
+        {"name": "No id", "id": "t4", "album": None},
+        {},
+    ]
+    path = write(tmp_path / "mixed.msgpack", records)
+
+    assert list(read_records(path)) == records
+
+
+def test_many_shared_objects_use_wider_references(tmp_path):
+    records = [{"id": f"t{i}", "album": {"id": f"al{i}"}} for i in range(70000)]
+    path = write(tmp_path / "wide.msgpack", records)
+
+    assert list(read_records(path)) == records
+
+
+def test_empty_file_round_trips(tmp_path):
+    path = write(tmp_path / "empty.msgpack", [])
+
+    assert list(read_records(path)) == []
+    with MessagePackReader(path) as reader:
+        assert len(reader) == 0
+        assert reader.fields == []
@@ -0,0 +1,42 @@
+"""Tests for sharded web bundles."""
+
+import json
+
+from export_bundle import WebBundleWriter
+
+
+def records(n):
+    return [{"id": f"t{i}", "name": f"Track {i}"} for i in range(n)]
+
+
+def test_keep_reuses_chunks_written_with_same_settings(tmp_path):
+    with WebBundleWriter(tmp_path, chunk_size=100) as bundle:
+        bundle.add_collection("playlist_tracks/p1", records(250))
+
+    bundle = WebBundleWriter(tmp_path, chunk_size=100)
+    assert bundle.keep("playlist_tracks/p1")
+    index = bundle.close()
+    assert index["collections"]["playlist_tracks/p1"] == {"count": 250, "chunks": 3}
+    assert (tmp_path / "playlist_tracks" / "p1" / "2.json").exists()
+
+
+def test_keep_refuses_chunks_of_another_chunk_size(tmp_path):
+    with WebBundleWriter(tmp_path, chunk_size=100) as bundle:
+        bundle.add_collection("playlist_tracks/p1", records(250))
+
+    bundle = WebBundleWriter(tmp_path, chunk_size=50)
+    assert not bundle.keep("playlist_tracks/p1")
+    bundle.add_collection("playlist_tracks/p2", records(60))
+    index = bundle.close()
+
+    assert index["chunk_size"] == 50
+    assert "playlist_tracks/p1" not in index["collections"]
+    assert not (tmp_path / "playlist_tracks" / "p1").exists()
+    with open(tmp_path / "playlist_tracks" / "p2" / "0.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 50
+
+
+def test_keep_refuses_chunks_with_other_compression(tmp_path):
+    with WebBundleWriter(tmp_path, compression=()) as bundle:
+        bundle.add_collection("saved_tracks", records(10))
+    assert not WebBundleWriter(tmp_path, compression=("gzip",)).keep("saved_tracks")
@@ -0,0 +1,33 @@
+"""Tests for the Parquet library export."""
+
+import pyarrow.parquet as pq
+import pytest
+
+from export_columnar import SCHEMAS, ColumnarLibraryWriter
+
+
+def items(n):
+    return [{"added_at": "2024-01-01T00:00:00Z",
+             "track": {"id": f"t{i}", "name": f"Track {i}", "artists": [{"id": "a1"}]}}
+            for i in range(n)]
+
+
+def test_tables_replace_previous_export_on_success(tmp_path):
+    with ColumnarLibraryWriter(tmp_path) as writer:
+        writer.add_saved_tracks(items(3))
+    assert pq.read_table(tmp_path / "saved_tracks.parquet").num_rows == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"{t}.parquet" for t in SCHEMAS)
+
+
+def test_failed_export_keeps_previous_tables(tmp_path):
+    with ColumnarLibraryWriter(tmp_path) as writer:
+        writer.add_saved_tracks(items(5))
+
+    with pytest.raises(RuntimeError):
+        with ColumnarLibraryWriter(tmp_path, row_group_size=1) as writer:
+            writer.add_saved_tracks(items(2))
+            raise RuntimeError("saved tracks read failed")
+
+    assert pq.read_table(tmp_path / "saved_tracks.parquet").num_rows == 5
+    assert pq.read_table(tmp_path / "tracks.parquet").num_rows == 5
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,273 @@
+"""Offline tests for resumable library exports."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from export_assets import AssetDownloader
+from export_data import SpotifyDataExporter
+from export_writers import read_records
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FakeClient:
+    """A library whose playlist and saved tracks include unavailable (null) items."""
+
+    session = requests.Session()
+
+    def __init__(self, size=350, nulls=(5, 120, 121), fail_at=None):
+        self.size = size
+        self.nulls = set(nulls)
+        self.fail_at = dict(fail_at or {})
+        self.offsets = []
+
+    def _items(self, key, offset, prefix):
+        self.offsets.append((key, offset))
+        for i in range(offset, self.size):
+            if self.fail_at.get(key) == i:
+                raise Interrupted(f"{key} failed at item {i}")
+            track = None if i in self.nulls else {"id": f"{prefix}{i}", "name": f"Song {i}"}
+            yield {"added_at": f"2024-01-01T00:00:{i:05d}Z", "track": track}
+
+    def iter_user_playlists(self, offset=0):
+        return iter([{"id": "p1", "name": "Mix", "snapshot_id": "s1"}])
+
+    def iter_playlist_tracks(self, playlist_id, fields=None, offset=0):
+        return self._items(playlist_id, offset, "t")
+
+    def iter_saved_tracks(self, offset=0):
+        return self._items("saved", offset, "s")
+
+
+@pytest.mark.parametrize("format", ["json", "ndjson"])
+def test_resume_with_null_items_neither_duplicates_nor_skips(tmp_path, format):
+    client = FakeClient(fail_at={"p1": 230, "saved": 230})
+    exporter = SpotifyDataExporter(tmp_path, client=client, format=format)
+    with pytest.raises(Interrupted):
+        exporter.export_library()
+
+    client.fail_at.clear()
+    client.offsets.clear()
+    manifest = exporter.export_library(resume=True)
+
+    # Both reads continue from the last committed raw API page
+    assert ("p1", 200) in client.offsets
+    assert ("saved", 200) in client.offsets
+    expected = [i for i in range(350) if i not in client.nulls]
+    extension = ".json" if format == "json" else ".ndjson"
+    playlist = list(read_records(tmp_path / "library" / "playlists" / f"p1{extension}"))
+    assert [r["id"] for r in playlist] == [f"t{i}" for i in expected]
+    saved = list(read_records(tmp_path / "library" / f"saved_tracks{extension}"))
+    assert [r["id"] for r in saved] == [f"s{i}" for i in expected]
+    assert manifest["tracks_total"] == 2 * len(expected)
+    assert not (tmp_path / "library" / ".checkpoint.json").exists()
+
+
+def test_full_export_skips_null_items(tmp_path):
+    exporter = SpotifyDataExporter(tmp_path, client=FakeClient(), format="ndjson")
+    manifest = exporter.export_library()
+    assert manifest["playlists"]["items"][0]["count"] == 347
+    assert manifest["saved_tracks"]["count"] == 347
+
+
+class TopItemsClient(FakeClient):
+    def iter_user_playlists(self, offset=0):
+        return iter([{"id": f"p{i}", "name": f"Mix {i}"} for i in range(80)])
+
+    def get_top_items(self, kind, limit=20, time_range="medium_term"):
+        return [{"id": f"{kind}{i}", "name": f"Name {i}"} for i in range(limit)]
+
+
+def test_export_methods_return_records_and_stream_methods_counts(tmp_path):
+    exporter = SpotifyDataExporter(tmp_path, client=TopItemsClient())
+
+    playlists = exporter.export_playlists()
+    assert len(playlists) == 50 and playlists[0]["id"] == "p0"
+    assert exporter.stream_playlists() == 80
+    assert len(list(read_records(tmp_path / "playlists.json"))) == 80
+
+    artists = exporter.export_top_artists(limit=5)
+    assert [a["id"] for a in artists] == [f"artists{i}" for i in range(5)]
+    assert exporter.stream_top_tracks(limit=5) == 5
+
+    tracks = exporter.export_playlist_tracks("p1", "Mix")
+    assert len(tracks) == 347
+    assert list(read_records(tmp_path / "playlist_Mix.json")) == tracks
+    assert exporter.stream_playlist_tracks("p1", "Mix") == 347
+
+
+class LibraryClient(FakeClient):
+    """Saved tracks the test can save and un-save; no playlists."""
+
+    def __init__(self, count):
+        super().__init__()
+        self.clock = 0
+        self.saved = []
+        for i in range(count):
+            self.save(f"t{i}")
+
+    def save(self, track_id):
+        self.clock += 1
+        self.saved.insert(0, {"added_at": f"2024-01-01T{self.clock:08d}Z",
+                              "track": {"id": track_id, "name": track_id}})
+
+    def unsave(self, track_id):
+        self.saved = [item for item in self.saved if item["track"]["id"] != track_id]
+
+    def iter_user_playlists(self, offset=0):
+        return iter([])
+
+    def iter_saved_tracks(self, offset=0):
+        return iter(list(self.saved[offset:]))
+
+    def get_saved_tracks_page(self, limit=50, offset=0):
+        return {"items": self.saved[offset:offset + limit], "total": len(self.saved)}
+
+
+def saved_ids(tmp_path):
+    return [r["id"] for r in read_records(tmp_path / "library" / "saved_tracks.json")]
+
+
+def test_incremental_export_adds_new_saved_tracks(tmp_path):
+    client = LibraryClient(120)
+    exporter = SpotifyDataExporter(tmp_path, client=client)
+    exporter.export_library()
+
+    client.save("n1")
+    client.save("n2")
+    manifest = exporter.export_library(incremental=True)
+    assert manifest["changes"]["new_saved_tracks"] == 2
+    assert manifest["changes"]["removed_saved_tracks"] == []
+    assert saved_ids(tmp_path) == [item["track"]["id"] for item in client.saved]
+
+
+def test_incremental_export_follows_unsaved_and_resaved_tracks(tmp_path):
+    client = LibraryClient(120)
+    exporter = SpotifyDataExporter(tmp_path, client=client)
+    exporter.export_library()
+
+    client.unsave("t5")
+    client.unsave("t105")
+    client.save("t105")
+    manifest = exporter.export_library(incremental=True)
+
+    assert saved_ids(tmp_path) == [item["track"]["id"] for item in client.saved]
+    assert manifest["saved_tracks"]["count"] == 119
+    assert manifest["changes"]["removed_saved_tracks"] == ["t5"]
+    assert manifest["changes"]["new_saved_tracks"] == 0
+
+    # The next run is incremental again and sees nothing new
+    client.save("n1")
+    manifest = exporter.export_library(incremental=True)
+    assert manifest["changes"]["new_saved_tracks"] == 1
+    assert saved_ids(tmp_path) == [item["track"]["id"] for item in client.saved]
+
+
+class PlaylistsClient(LibraryClient):
+    """A single playlist the test can change or remove."""
+
+    def __init__(self):
+        super().__init__(5)
+        self.size = 30
+        self.nulls = set()
+        self.playlists = [{"id": "p1", "name": "Mix", "snapshot_id": "s1"}]
+
+    def iter_user_playlists(self, offset=0):
+        return iter(list(self.playlists))
+
+
+def test_removed_playlist_file_is_deleted_after_a_failed_read(tmp_path):
+    client = PlaylistsClient()
+    exporter = SpotifyDataExporter(tmp_path, client=client)
+    exporter.export_library()
+    playlist_file = tmp_path / "library" / "playlists" / "p1.json"
+    assert playlist_file.exists()
+
+    client.playlists[0]["snapshot_id"] = "s2"
+    client.fail_at = {"p1": 10}
+    manifest = exporter.export_library(incremental=True)
+    [entry] = manifest["playlists"]["items"]
+    assert "error" in entry
+    assert entry["file"] == "playlists/p1.json"
+    assert len(list(read_records(playlist_file))) == 30
+
+    client.playlists = []
+    client.fail_at = {}
+    manifest = exporter.export_library(incremental=True)
+    assert manifest["changes"]["removed"] == ["p1"]
+    assert not playlist_file.exists()
+
+
+# Two URLs serve the same bytes; anything else is a 404
+IMAGES = {"/a.jpg": b"cover-a", "/b.jpg": b"cover-b", "/a-copy.jpg": b"cover-a"}
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = IMAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_asset_downloader_against_local_image_server(tmp_path, image_server):
+    server, base = image_server
+    records = [
+        {"id": "t1", "album": {"images": [{"url": f"{base}/a.jpg", "width": 300, "height": 300},
+                                          {"url": f"{base}/a-large.jpg", "width": 640, "height": 640}]}},
+        {"id": "t2", "album": {"images": [{"url": f"{base}/a-copy.jpg", "width": 300, "height": 300}]}},
+        {"id": "t3", "album": {"images": [{"url": f"{base}/b.jpg", "width": 300, "height": 300}]}},
+        {"id": "t4", "album": {"images": [{"url": f"{base}/a.jpg", "width": 300, "height": 300}]}},
+        {"id": "t5", "album": {"images": [{"url": f"{base}/missing.jpg", "width": 300, "height": 300}]}},
+    ]
+    downloader = AssetDownloader(tmp_path / "assets", size=300, max_workers=4)
+    stats = downloader.download(url for record in records for url in downloader.image_urls(record))
+
+    assert sorted(server.requests) == ["/a-copy.jpg", "/a.jpg", "/b.jpg", "/missing.jpg"]
+    assert stats["downloaded"] == 2
+    assert stats["duplicates"] == 1
+    assert stats["failed"] == 1
+    assert list(downloader.failed) == [f"{base}/missing.jpg"]
+    assert len(list((tmp_path / "assets").glob("*.jpg"))) == 2
+
+    localized = [downloader.localize(record) for record in records]
+    [a1], [a2], [b], [a4] = (record["album"]["images"] for record in localized[:4])
+    assert a1["url"] == a2["url"] == a4["url"] != b["url"]
+    assert a1["url"].startswith("assets/")
+    assert (tmp_path / a1["url"]).read_bytes() == b"cover-a"
+    assert a1["remote_url"] == f"{base}/a.jpg"
+    assert a2["remote_url"] == f"{base}/a-copy.jpg"
+    assert localized[4] == records[4]
+
+    server.requests.clear()
+    again = AssetDownloader(tmp_path / "assets", size=300)
+    stats = again.download(url for record in records for url in again.image_urls(record))
+    # Only the failed URL is tried again
+    assert server.requests == ["/missing.jpg"]
+    assert stats["downloaded"] == 0
+    assert stats["cached"] == 3
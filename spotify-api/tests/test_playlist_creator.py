@@ -0,0 +1,87 @@
+"""Offline tests for PlaylistCreator builders and playlist reordering."""
+
+import re
+
+from playlist_creator import PlaylistCreator
+from spotify_client import SpotifyClient
+
+
+class FakeClient:
+    """A playlist held in memory; reorders are applied like the Web API does."""
+
+    remaining_requests = None
+
+    def __init__(self, tracks):
+        self.items = [{"track": track} for track in tracks]
+        self.calls = 0
+
+    def get_playlist(self, playlist_id, fields=None):
+        return {"snapshot_id": "s0"}
+
+    def iter_playlist_tracks(self, playlist_id, fields=None):
+        return iter(list(self.items))
+
+    def reorder_playlist_tracks(self, playlist_id, range_start, insert_before,
+                                range_length=1, snapshot_id=None):
+        self.calls += 1
+        block = self.items[range_start:range_start + range_length]
+        del self.items[range_start:range_start + range_length]
+        if insert_before > range_start:
+            insert_before -= range_length
+        self.items[insert_before:insert_before] = block
+        return {"snapshot_id": f"s{self.calls}"}
+
+
+def track(n):
+    return {"id": f"t{n}", "uri": f"spotify:track:t{n}"}
+
+
+def test_reorder_keeps_unavailable_tracks_in_place_of_positions(monkeypatch):
+    client = FakeClient([track(0), None, track(1), track(2), None, track(3)])
+    creator = PlaylistCreator(client)
+    monkeypatch.setattr(creator, "_sequence_tracks",
+                        lambda track_ids, sequence=None: track_ids[::-1])
+
+    result = creator.reorder_playlist("p1")
+
+    assert result["method"] == "reorder"
+    assert result["tracks"] == 6
+    order = [(item["track"] or {}).get("id") for item in client.items]
+    assert order == ["t3", "t2", "t1", "t0", None, None]
+
+
+class BudgetedClient(SpotifyClient):
+    """Counts requests like the real client; search finds "Song N" as tN."""
+
+    def __init__(self):
+        super().__init__("id", "secret", access_token="token")
+        self.added = []
+
+    def _make_request(self, method, endpoint, data=None, params=None, **kwargs):
+        self._count_request()
+        if endpoint == "search":
+            number = re.search(r"Song (\d+)", params["q"]).group(1)
+            return {"tracks": {"items": [{"id": f"t{number}", "name": f"Song {number}",
+                                          "artists": [{"name": "Band"}], "album": {}}]}}
+        if endpoint == "me":
+            return {"id": "user"}
+        if endpoint.endswith("/playlists"):
+            return {"id": "p1", "name": data["name"]}
+        if endpoint.endswith("/tracks"):
+            self.added.extend(uri.split(":")[-1] for uri in data["uris"])
+            return {"snapshot_id": "s1"}
+        raise AssertionError(f"unexpected request {method} {endpoint}")
+
+
+def test_tight_budget_gives_shorter_song_list_playlist():
+    client = BudgetedClient()
+    creator = PlaylistCreator(client, request_budget=20)
+    songs = [f"Band - Song {i}" for i in range(40)]
+
+    result = creator.create_from_song_list(songs, "Songs", max_workers=1)
+
+    assert result["budget_exhausted"]
+    assert 0 < result["tracks_added"] < 40
+    assert client.added == [f"t{i}" for i in range(result["tracks_added"])]
+    assert result["tracks_not_found"] == 40 - result["tracks_added"]
+    assert result["requests_made"] <= 20
@@ -0,0 +1,86 @@
+"""Offline tests for playlist diffing."""
+
+from playlist_sync import compute_edit_script, plan_reorder, read_playlist_items, sync_playlist
+
+
+def apply_moves(items, moves):
+    items = list(items)
+    for move in moves:
+        start, length = move["range_start"], move["range_length"]
+        block = items[start:start + length]
+        del items[start:start + length]
+        insert_before = move["insert_before"]
+        if insert_before > start:
+            insert_before -= length
+        items[insert_before:insert_before] = block
+    return items
+
+
+def test_plan_reorder_with_null_placeholders():
+    current = ["a", "null:1", "b", "c", "null:4", "d"]
+    target = ["d", "c", "b", "a", "null:1", "null:4"]
+    moves = plan_reorder(current, target)
+    assert apply_moves(current, moves) == target
+    assert len(moves) == 3
+
+
+class FakeClient:
+    """An in-memory playlist; None items stand for unavailable tracks."""
+
+    def __init__(self, uris):
+        self.items = list(uris)
+
+    def get_playlist(self, playlist_id, fields=None):
+        return {"snapshot_id": f"s{len(self.items)}"}
+
+    def iter_playlist_tracks(self, playlist_id, fields=None):
+        return iter([{"track": {"uri": uri} if uri else None} for uri in self.items])
+
+    def remove_playlist_items(self, playlist_id, items, snapshot_id=None):
+        positions = set()
+        for item in items:
+            assert item["uri"].startswith("spotify:track:")
+            for position in item["positions"]:
+                assert self.items[position] == item["uri"]
+                positions.add(position)
+        self.items = [uri for p, uri in enumerate(self.items) if p not in positions]
+        return {}
+
+    def reorder_playlist_tracks(self, playlist_id, range_start, insert_before,
+                                range_length=1, snapshot_id=None):
+        self.items = apply_moves(self.items, [{"range_start": range_start,
+                                               "insert_before": insert_before,
+                                               "range_length": range_length}])
+        return {}
+
+    def add_tracks_to_playlist(self, playlist_id, track_ids, position=None):
+        uris = [f"spotify:track:{track_id}" for track_id in track_ids]
+        position = len(self.items) if position is None else position
+        self.items[position:position] = uris
+        return {}
+
+
+def uri(track_id):
+    return f"spotify:track:{track_id}"
+
+
+def test_read_playlist_items_keeps_positions_of_unavailable_items():
+    client = FakeClient([uri("a"), None, uri("b")])
+    _, uris = read_playlist_items(client, "p1")
+    assert uris == [uri("a"), "null:1", uri("b")]
+
+
+def test_edit_script_never_removes_unavailable_items():
+    current = [uri("a"), "null:1", uri("x"), uri("b"), "null:4"]
+    desired = [uri("b"), uri("a"), uri("c"), "null:1", "null:4"]
+    script = compute_edit_script(current, desired)
+    assert all(not current[p].startswith("null:") for p in script["removals"])
+
+
+def test_sync_with_unavailable_items_lands_on_desired_order():
+    client = FakeClient([uri("a"), None, uri("x"), uri("b"), None, uri("c")])
+    sync_playlist(client, "p1", ["c", "b", "d", "a"])
+    assert client.items == [uri("c"), uri("b"), uri("d"), uri("a"), None, None]
+
+    again = sync_playlist(client, "p1", ["c", "b", "d", "a"])
+    assert again["unchanged"] and again["api_calls"] == 0
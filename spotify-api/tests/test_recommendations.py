@@ -0,0 +1,82 @@
+"""Offline tests for the recommendation fan-out."""
+
+import pytest
+import requests
+
+from recommendations import RecommendationAggregator
+from spotify_client import RequestBudgetExceeded
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class FakeClient:
+    """Each artist seed yields its own tracks; a chosen seed raises an error."""
+
+    def __init__(self, errors=None, budget=None):
+        self.errors = errors or {}
+        self.budget = budget
+        self.calls = 0
+
+    def get_recommendations(self, limit=100, seed_artists=None, **kwargs):
+        self.calls += 1
+        if self.budget is not None and self.calls > self.budget:
+            raise RequestBudgetExceeded("budget")
+        for seed in seed_artists or []:
+            if seed in self.errors:
+                raise self.errors[seed]
+        return [{"id": f"{seed}-{i}"} for seed in seed_artists or [] for i in range(3)]
+
+
+def test_unknown_seed_only_empties_its_group():
+    client = FakeClient({"bad": http_error(404)})
+    tracks = RecommendationAggregator(client, group_size=1).recommend(
+        seed_artists=["a", "bad"], limit=10, max_rounds=1)
+    assert [t["id"] for t in tracks] == ["a-0", "a-1", "a-2"]
+
+
+@pytest.mark.parametrize("error", [http_error(401), http_error(429),
+                                   requests.ConnectionError("down")])
+def test_other_errors_propagate(error):
+    aggregator = RecommendationAggregator(FakeClient({"bad": error}), group_size=1)
+    with pytest.raises(type(error)):
+        aggregator.recommend(seed_artists=["a", "bad"], limit=10)
+
+
+def test_spent_budget_keeps_earlier_results():
+    aggregator = RecommendationAggregator(FakeClient(budget=1), max_workers=1, group_size=1)
+    tracks = aggregator.recommend(seed_artists=["a", "b"], limit=10)
+    assert aggregator.budget_exhausted
+    assert [t["id"] for t in tracks] == ["a-0", "a-1", "a-2"]
+
+
+class ExpandingClient:
+    """Every seed yields 100 tracks of its own, so new seeds find new tracks."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_recommendations(self, limit=100, seed_artists=None, seed_tracks=None, **kwargs):
+        self.calls += 1
+        seeds = (seed_artists or []) + (seed_tracks or [])
+        return [{"id": f"{seeds[i % len(seeds)]}.{i}"} for i in range(limit)]
+
+
+def test_single_seed_fills_a_large_playlist():
+    aggregator = RecommendationAggregator(ExpandingClient())
+    tracks = aggregator.recommend(seed_artists=["a"], limit=500)
+    assert len(tracks) == 500
+    assert len({t["id"] for t in tracks}) == 500
+    assert aggregator.shortfall == 0
+
+
+def test_shortfall_reported_when_limit_cannot_be_met():
+    client = FakeClient()
+    aggregator = RecommendationAggregator(client, group_size=1)
+    tracks = aggregator.recommend(seed_artists=["a"], limit=500)
+    # FakeClient only knows artist seeds, so expansion rounds find nothing new
+    assert len(tracks) == 3
+    assert aggregator.shortfall == 497
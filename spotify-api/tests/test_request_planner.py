@@ -0,0 +1,40 @@
+"""Tests for API call estimates."""
+
+from playlist_sync import compute_edit_script
+from request_planner import estimate_operation
+
+
+def calls(estimate, step):
+    return next(s["calls"] for s in estimate["steps"] if s["step"] == step)
+
+
+def test_stats_of_empty_playlist_still_reads_one_page():
+    assert estimate_operation("get_playlist_stats", playlist_size=0)["calls"] == 2
+    assert estimate_operation("get_playlist_stats", playlist_size=12000)["calls"] == 121
+
+
+def test_sync_estimate_without_previous_is_a_lower_bound():
+    # Same size, reversed order: the size change says nothing needs writing
+    ids = [f"t{i}" for i in range(10)]
+    estimate = estimate_operation("sync_playlist", playlist_size=10,
+                                  desired_track_ids=ids[::-1])
+    current = [f"spotify:track:{t}" for t in ids]
+    desired = current[::-1]
+    assert calls(estimate, "apply_edits") <= compute_edit_script(current, desired)["api_calls"]
+
+
+def test_sync_estimate_from_previous_matches_edit_script():
+    ids = [f"t{i}" for i in range(10)]
+    previous = {"track_uris": [f"spotify:track:{t}" for t in ids] + ["null:10"]}
+    desired_ids = ids[::-1] + ["new"]
+    estimate = estimate_operation("sync_playlist", desired_track_ids=desired_ids,
+                                  previous=previous)
+    desired = [f"spotify:track:{t}" for t in desired_ids] + ["null:10"]
+    expected = compute_edit_script(previous["track_uris"], desired)["api_calls"]
+    assert expected > 0
+    assert calls(estimate, "apply_edits") == expected
+    assert calls(estimate, "read_items") == 0
+
+    unchanged = estimate_operation("sync_playlist", desired_track_ids=ids, previous={
+        "track_uris": [f"spotify:track:{t}" for t in ids]})
+    assert calls(unchanged, "apply_edits") == 0
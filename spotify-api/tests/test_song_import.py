@@ -0,0 +1,116 @@
+"""Offline tests for the checkpointed song-file import."""
+
+import csv
+import json
+import re
+
+import pytest
+import requests
+
+from song_import import SongImporter
+from spotify_client import RequestBudgetExceeded
+from track_matcher import TrackMatcher
+
+MISSING_ID = "z" * 22
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class FakeClient:
+    """Every "Artist N - Song N" line resolves to track tN; a chosen line fails."""
+
+    def __init__(self, fail_on=None, error=None, fail_write=None):
+        self.fail_on = fail_on
+        self.error = error
+        self.fail_write = fail_write
+        self.writes = 0
+        self.added = []
+
+    def create_playlist(self, name, description="", public=True):
+        return {"id": "playlist"}
+
+    def add_tracks_to_playlist(self, playlist_id, track_ids):
+        self.writes += 1
+        if self.writes == self.fail_write:
+            raise http_error(500)
+        self.added.extend(track_ids)
+
+    def search_tracks(self, query, limit=10):
+        number = re.search(r"Song (\d+)", query).group(1)
+        if number == self.fail_on:
+            raise self.error
+        return [{"id": f"t{number}", "name": f"Song {number}",
+                 "artists": [{"name": f"Artist {number}"}], "album": {}}]
+
+    def get_track(self, track_id):
+        raise http_error(404)
+
+
+@pytest.fixture
+def song_file(tmp_path):
+    path = tmp_path / "songs.txt"
+    lines = [f"Artist {i} - Song {i}" for i in range(250)]
+    lines[7] = f"spotify:track:{MISSING_ID}"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def run(client, song_file):
+    importer = SongImporter(client, TrackMatcher(client), max_workers=4, batch_size=50)
+    return importer.run(str(song_file))
+
+
+def report_rows(song_file):
+    with open(f"{song_file}.not_found.csv", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))[1:]
+
+
+@pytest.mark.parametrize("error", [RequestBudgetExceeded("spent"), http_error(429),
+                                   http_error(401), requests.ConnectionError("down")])
+def test_transient_errors_stop_the_import_and_resume_retries(song_file, error):
+    client = FakeClient(fail_on="180", error=error)
+    with pytest.raises(type(error)):
+        run(client, song_file)
+
+    with open(f"{song_file}.checkpoint.json", encoding="utf-8") as f:
+        state = json.load(f)
+    assert not state["complete"]
+    assert state["position"] <= 180
+    assert len(client.added) == state["tracks_added"]
+
+    client.fail_on = None
+    summary = run(client, song_file)
+    expected = [f"t{i}" for i in range(250) if i != 7]
+    assert client.added == expected
+    assert summary["tracks_added"] == 249
+    assert summary["tracks_not_found"] == 1
+    assert [row[0] for row in report_rows(song_file)] == ["7"]
+
+
+def test_lookup_misses_are_reported_not_raised(song_file):
+    client = FakeClient()
+    summary = run(client, song_file)
+    assert summary["tracks_added"] == 249
+    (row,) = report_rows(song_file)
+    assert row[0] == "7" and row[2].startswith("error: 404")
+
+
+def test_failed_batch_write_keeps_checkpoint_before_it(song_file):
+    # The second batch fails while later batches are already queued
+    client = FakeClient(fail_write=2)
+    with pytest.raises(requests.HTTPError):
+        run(client, song_file)
+
+    with open(f"{song_file}.checkpoint.json", encoding="utf-8") as f:
+        state = json.load(f)
+    assert not state["complete"]
+    assert state["tracks_added"] == len(client.added) == 50
+
+    client.fail_write = None
+    summary = run(client, song_file)
+    assert client.added == [f"t{i}" for i in range(250) if i != 7]
+    assert summary["tracks_added"] == 249
@@ -0,0 +1,78 @@
+"""Offline tests for song-line parsing and fuzzy matching."""
+
+from track_matcher import TrackMatcher, parse_song_line
+
+
+def track(track_id, name, artist, **extra):
+    return dict({"id": track_id, "name": name, "artists": [{"name": artist}],
+                 "album": {"name": name, "album_type": "album"}}, **extra)
+
+
+class FakeClient:
+    """Search returns fixed candidates; structured queries return nothing."""
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.queries = []
+
+    def search_tracks(self, query, limit=10):
+        self.queries.append(query)
+        return [] if "track:" in query else self.candidates
+
+
+SHAPE_OF_YOU = track("a" * 22, "Shape of You", "Ed Sheeran", popularity=90)
+DECOY = track("b" * 22, "Shape of You - Acoustic Cover", "Karaoke Stars", popularity=20)
+
+
+def test_parse_artist_title_line():
+    assert parse_song_line("Ed Sheeran - Shape of You (3:53)") == {
+        "title": "Shape of You", "artist": "Ed Sheeran", "duration_ms": 233000,
+        "track_id": None, "query": "Ed Sheeran - Shape of You",
+    }
+
+
+def test_parse_title_by_artist_and_track_url():
+    assert parse_song_line("Hey Jude by The Beatles")["artist"] == "The Beatles"
+    url = "https://open.spotify.com/track/" + "c" * 22 + "?si=x"
+    assert parse_song_line(url)["track_id"] == "c" * 22
+
+
+def test_best_match_title_artist_line_from_user_guide():
+    # USER_GUIDE.md writes song lists as "Title - Artist"
+    matcher = TrackMatcher(FakeClient([]))
+    result = matcher.best_match("Shape of You - Ed Sheeran", [DECOY, SHAPE_OF_YOU])
+    assert result is not None
+    assert result["track"]["id"] == SHAPE_OF_YOU["id"]
+
+
+def test_best_match_artist_title_line():
+    matcher = TrackMatcher(FakeClient([]))
+    result = matcher.best_match("Ed Sheeran - Shape of You", [DECOY, SHAPE_OF_YOU])
+    assert result["track"]["id"] == SHAPE_OF_YOU["id"]
+
+
+def test_match_falls_back_to_plain_search():
+    client = FakeClient([DECOY, SHAPE_OF_YOU])
+    result = TrackMatcher(client).match("Shape of You - Ed Sheeran")
+    assert result["track"]["id"] == SHAPE_OF_YOU["id"]
+    assert client.queries[-1] == "Shape of You - Ed Sheeran"
+
+
+def test_unrelated_candidates_are_not_matched():
+    matcher = TrackMatcher(FakeClient([]))
+    assert matcher.best_match("Shape of You - Ed Sheeran",
+                              [track("d" * 22, "Bohemian Rhapsody", "Queen")]) is None
+
+
+def test_title_containing_by_is_searched_as_written():
+    stand_by_me = track("e" * 22, "Stand by Me", "Ben E. King", popularity=80)
+    client = FakeClient([stand_by_me])
+    result = TrackMatcher(client).match("Stand by Me")
+    assert result["track"]["id"] == stand_by_me["id"]
+    assert client.queries[-1] == "Stand by Me"
+
+
+def test_structured_query_strips_quotes():
+    client = FakeClient([])
+    TrackMatcher(client).match('Weird Al - "Amish Paradise"')
+    assert client.queries[0] == 'track:"Amish Paradise" artist:"Weird Al"'